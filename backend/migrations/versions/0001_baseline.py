@@ -0,0 +1,80 @@
+"""baseline: validation batches and files
+
+The schema created by ``Base.metadata.create_all`` before migrations were
+introduced. init_db() stamps databases of that era with this revision
+instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 06:08:56
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+STATUS = sa.Enum(
+    "waiting",
+    "processing",
+    "completed",
+    "failed",
+    name="status",
+    native_enum=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "validation_batches",
+        sa.Column("id", sa.Integer(), autoincrement=True, primary_key=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("status", STATUS, nullable=False),
+        sa.Column("completed_prompts", sa.Integer(), nullable=False),
+        sa.Column("prompt_results", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+    )
+    op.create_table(
+        "validation_files",
+        sa.Column("id", sa.Integer(), autoincrement=True, primary_key=True),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("file_type", sa.String(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "batch_id",
+            sa.Integer(),
+            sa.ForeignKey("validation_batches.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_validation_files_batch_id", "validation_files", ["batch_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_validation_files_batch_id", table_name="validation_files")
+    op.drop_table("validation_files")
+    op.drop_table("validation_batches")
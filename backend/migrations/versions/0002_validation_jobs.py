@@ -0,0 +1,70 @@
+"""validation jobs: the persistent, leased job queue
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 06:15:55
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+JOB_STATUS = sa.Enum(
+    "queued",
+    "leased",
+    "done",
+    "failed",
+    name="jobstatus",
+    native_enum=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "validation_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, primary_key=True),
+        sa.Column(
+            "batch_id",
+            sa.Integer(),
+            sa.ForeignKey("validation_batches.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("prompt_index", sa.Integer(), nullable=False),
+        sa.Column("status", JOB_STATUS, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("lease_owner", sa.String(length=255), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.UniqueConstraint("batch_id", "prompt_index"),
+    )
+    op.create_index(
+        "ix_validation_jobs_status_lease",
+        "validation_jobs",
+        ["status", "lease_expires_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_validation_jobs_status_lease", table_name="validation_jobs")
+    op.drop_table("validation_jobs")
@@ -0,0 +1,45 @@
+"""llm result cache
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 06:19:33
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_result_cache",
+        sa.Column("key", sa.String(length=64), primary_key=True),
+        sa.Column("model", sa.String(length=255), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column("total_duration_ns", sa.BigInteger(), nullable=True),
+        sa.Column("eval_duration_ns", sa.BigInteger(), nullable=True),
+        sa.Column("load_duration_ns", sa.BigInteger(), nullable=True),
+        sa.Column("prompt_eval_duration_ns", sa.BigInteger(), nullable=True),
+        sa.Column("hit_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_llm_result_cache_created_at", "llm_result_cache", ["created_at"]
+    )
+    op.create_index(
+        "ix_llm_result_cache_last_used_at", "llm_result_cache", ["last_used_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_result_cache_last_used_at", table_name="llm_result_cache")
+    op.drop_index("ix_llm_result_cache_created_at", table_name="llm_result_cache")
+    op.drop_table("llm_result_cache")
@@ -0,0 +1,141 @@
+"""file blobs: store file contents once per sha256
+
+Moves validation_files.content into file_blobs, one uncompressed blob per
+sha256; contents uploaded afterwards are compressed as configured.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 06:20:38
+
+"""
+
+import hashlib
+import zlib
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+files = sa.table(
+    "validation_files",
+    sa.column("id", sa.Integer),
+    sa.column("content", sa.Text),
+    sa.column("sha256", sa.String),
+)
+blobs = sa.table(
+    "file_blobs",
+    sa.column("sha256", sa.String),
+    sa.column("data", sa.LargeBinary),
+    sa.column("compression", sa.String),
+    sa.column("size", sa.Integer),
+    sa.column("ref_count", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "file_blobs",
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("compression", sa.String(length=16), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+    )
+    _move_file_contents()
+    with op.batch_alter_table("validation_files") as batch_op:
+        batch_op.drop_column("content")
+        batch_op.alter_column(
+            "sha256", existing_type=sa.String(length=64), nullable=False
+        )
+        batch_op.create_index("ix_validation_files_sha256", ["sha256"])
+        batch_op.create_foreign_key(
+            "fk_validation_files_sha256_file_blobs",
+            "file_blobs",
+            ["sha256"],
+            ["sha256"],
+        )
+
+
+def _move_file_contents() -> None:
+    """Store every distinct file content once in file_blobs.
+
+    Blobs are keyed by the sha256 already stored with the files (computed
+    here for files stored without one) and counted once per referencing file.
+    """
+    bind = op.get_bind()
+    for file_id, content in bind.execute(
+        sa.select(files.c.id, files.c.content).where(files.c.sha256.is_(None))
+    ).all():
+        bind.execute(
+            sa.update(files)
+            .where(files.c.id == file_id)
+            .values(sha256=hashlib.sha256(content.encode()).hexdigest())
+        )
+    for sha256, first_id, ref_count in bind.execute(
+        sa.select(files.c.sha256, sa.func.min(files.c.id), sa.func.count()).group_by(
+            files.c.sha256
+        )
+    ).all():
+        data = (
+            bind.execute(sa.select(files.c.content).where(files.c.id == first_id))
+            .scalar_one()
+            .encode()
+        )
+        bind.execute(
+            sa.insert(blobs).values(
+                sha256=sha256,
+                data=data,
+                compression="none",
+                size=len(data),
+                ref_count=ref_count,
+            )
+        )
+
+
+def _decode(data: bytes, compression: str) -> str:
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError(
+                "zstd-compressed file contents need the zstd extra to downgrade"
+            ) from e
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif compression == "zlib":
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("validation_files") as batch_op:
+        batch_op.add_column(sa.Column("content", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    for sha256, data, compression in bind.execute(
+        sa.select(blobs.c.sha256, blobs.c.data, blobs.c.compression)
+    ).all():
+        bind.execute(
+            sa.update(files)
+            .where(files.c.sha256 == sha256)
+            .values(content=_decode(data, compression))
+        )
+    with op.batch_alter_table("validation_files") as batch_op:
+        batch_op.drop_constraint(
+            "fk_validation_files_sha256_file_blobs", type_="foreignkey"
+        )
+        batch_op.drop_index("ix_validation_files_sha256")
+        batch_op.alter_column(
+            "sha256", existing_type=sa.String(length=64), nullable=True
+        )
+        batch_op.alter_column("content", existing_type=sa.Text(), nullable=False)
+    op.drop_table("file_blobs")
@@ -0,0 +1,27 @@
+"""fused jobs: several prompts generated in one job
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 06:32:39
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("validation_jobs") as batch_op:
+        batch_op.add_column(sa.Column("prompt_indices", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("validation_jobs") as batch_op:
+        batch_op.drop_column("prompt_indices")
@@ -0,0 +1,153 @@
+"""prompt results: one row per selected prompt of a batch
+
+Moves the validation_batches.prompt_results JSON column into
+validation_prompt_results rows.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 06:34:16
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+STATUS = sa.Enum(
+    "waiting",
+    "processing",
+    "completed",
+    "failed",
+    name="status",
+    native_enum=False,
+)
+# duration fields of a stored ValidationPromptResult
+DURATIONS = (
+    "total_duration_ns",
+    "eval_duration_ns",
+    "load_duration_ns",
+    "prompt_eval_duration_ns",
+)
+
+batches = sa.table(
+    "validation_batches",
+    sa.column("id", sa.Integer),
+    sa.column("prompt_results", sa.JSON),
+)
+prompt_results = sa.table(
+    "validation_prompt_results",
+    sa.column("batch_id", sa.Integer),
+    sa.column("prompt_index", sa.Integer),
+    sa.column("prompt_name", sa.String),
+    sa.column("prompt_category", sa.String),
+    sa.column("prompt_description", sa.Text),
+    sa.column("prompt_sha256", sa.String),
+    sa.column("status", sa.String),
+    sa.column("error_message", sa.Text),
+    sa.column("result", sa.JSON),
+    *(sa.column(name, sa.BigInteger) for name in DURATIONS),
+    sa.column("cached", sa.Boolean),
+    sa.column("fused", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "validation_prompt_results",
+        sa.Column("id", sa.Integer(), autoincrement=True, primary_key=True),
+        sa.Column(
+            "batch_id",
+            sa.Integer(),
+            sa.ForeignKey("validation_batches.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("prompt_index", sa.Integer(), nullable=False),
+        sa.Column("prompt_name", sa.String(length=255), nullable=False),
+        sa.Column("prompt_category", sa.String(length=255), nullable=False),
+        sa.Column("prompt_description", sa.Text(), nullable=True),
+        sa.Column("prompt_sha256", sa.String(length=64), nullable=True),
+        sa.Column("status", STATUS, nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        *(sa.Column(name, sa.BigInteger(), nullable=True) for name in DURATIONS),
+        sa.Column("cached", sa.Boolean(), nullable=False),
+        sa.Column("fused", sa.Boolean(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.UniqueConstraint("batch_id", "prompt_index"),
+    )
+    bind = op.get_bind()
+    for batch_id, stored_results in bind.execute(
+        sa.select(batches.c.id, batches.c.prompt_results)
+    ).all():
+        rows = [
+            _prompt_row(batch_id, index, stored)
+            for index, stored in enumerate(stored_results or [])
+        ]
+        if rows:
+            bind.execute(sa.insert(prompt_results), rows)
+    with op.batch_alter_table("validation_batches") as batch_op:
+        batch_op.drop_column("prompt_results")
+
+
+def _prompt_row(batch_id: int, prompt_index: int, stored: dict) -> dict:
+    prompt = stored["prompt"]
+    return {
+        "batch_id": batch_id,
+        "prompt_index": prompt_index,
+        "prompt_name": prompt["name"],
+        "prompt_category": prompt["category"],
+        "prompt_description": prompt.get("description"),
+        "prompt_sha256": prompt.get("sha256"),
+        "status": stored.get("status", "processing"),
+        "error_message": stored.get("error_message"),
+        "result": stored.get("result"),
+        **{name: stored.get(name) for name in DURATIONS},
+        "cached": False,
+        "fused": False,
+    }
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("validation_batches") as batch_op:
+        batch_op.add_column(sa.Column("prompt_results", sa.JSON(), nullable=True))
+    bind = op.get_bind()
+    stored: dict[int, list[dict]] = {}
+    for row in bind.execute(
+        sa.select(prompt_results).order_by(
+            prompt_results.c.batch_id, prompt_results.c.prompt_index
+        )
+    ).mappings():
+        stored.setdefault(row["batch_id"], []).append(
+            {
+                "prompt": {
+                    "name": row["prompt_name"],
+                    "category": row["prompt_category"],
+                    "description": row["prompt_description"],
+                    "sha256": row["prompt_sha256"],
+                },
+                "status": row["status"],
+                "error_message": row["error_message"],
+                "result": row["result"],
+                **{name: row[name] for name in DURATIONS},
+            }
+        )
+    for (batch_id,) in bind.execute(sa.select(batches.c.id)).all():
+        bind.execute(
+            sa.update(batches)
+            .where(batches.c.id == batch_id)
+            .values(prompt_results=stored.get(batch_id, []))
+        )
+    with op.batch_alter_table("validation_batches") as batch_op:
+        batch_op.alter_column("prompt_results", existing_type=sa.JSON(), nullable=False)
+    op.drop_table("validation_prompt_results")
@@ -0,0 +1,30 @@
+"""index for paging the log listing by (created_at, id)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 06:55:39
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_validation_batches_created_at_id",
+        "validation_batches",
+        ["created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_validation_batches_created_at_id", table_name="validation_batches"
+    )
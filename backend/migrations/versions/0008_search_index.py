@@ -0,0 +1,157 @@
+"""full-text search over file names, file contents and issues
+
+Creates the SQLite FTS5 tables and indexes the batches already stored. File
+contents are indexed once per blob, under file_blobs.search_id.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 06:58:11
+
+"""
+
+import zlib
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SEARCH_INDEX_DDL = (
+    """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    batch_id UNINDEXED,
+    prompt_index UNINDEXED,
+    file_name,
+    content,
+    description,
+    tokenize = 'trigram'
+)
+""",
+    """
+CREATE VIRTUAL TABLE IF NOT EXISTS file_search USING fts5(
+    content,
+    content = '',
+    tokenize = 'trigram'
+)
+""",
+)
+
+files = sa.table(
+    "validation_files",
+    sa.column("batch_id", sa.Integer),
+    sa.column("file_name", sa.String),
+)
+blobs = sa.table(
+    "file_blobs",
+    sa.column("sha256", sa.String),
+    sa.column("data", sa.LargeBinary),
+    sa.column("compression", sa.String),
+    sa.column("search_id", sa.Integer),
+)
+prompt_results = sa.table(
+    "validation_prompt_results",
+    sa.column("batch_id", sa.Integer),
+    sa.column("prompt_index", sa.Integer),
+    sa.column("status", sa.String),
+    sa.column("result", sa.JSON),
+)
+search_index = sa.table(
+    "search_index",
+    sa.column("batch_id"),
+    sa.column("prompt_index"),
+    sa.column("file_name"),
+    sa.column("content"),
+    sa.column("description"),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("file_blobs") as batch_op:
+        batch_op.add_column(sa.Column("search_id", sa.Integer(), nullable=True))
+        batch_op.create_unique_constraint("uq_file_blobs_search_id", ["search_id"])
+    if _create_search_index():
+        _index_names_and_issues()
+        _index_contents()
+
+
+def _create_search_index() -> bool:
+    """Create the FTS5 tables; False where SQLite lacks FTS5."""
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    try:
+        for ddl in SEARCH_INDEX_DDL:
+            bind.exec_driver_sql(ddl)
+    except sa.exc.OperationalError as e:
+        # TODO NEED LOGGING
+        print(f"Full-text search is not available: {e}")
+        return False
+    return True
+
+
+def _index_names_and_issues() -> None:
+    bind = op.get_bind()
+    names = [
+        {"batch_id": batch_id, "file_name": file_name}
+        for batch_id, file_name in bind.execute(
+            sa.select(files.c.batch_id, files.c.file_name)
+        )
+    ]
+    if names:
+        bind.execute(sa.insert(search_index), names)
+    issues = [
+        {
+            "batch_id": batch_id,
+            "prompt_index": prompt_index,
+            "file_name": issue.get("file"),
+            "content": issue.get("content"),
+            "description": issue.get("description"),
+        }
+        for batch_id, prompt_index, result in bind.execute(
+            sa.select(
+                prompt_results.c.batch_id,
+                prompt_results.c.prompt_index,
+                prompt_results.c.result,
+            ).where(prompt_results.c.status == "completed")
+        )
+        for issue in result or []
+    ]
+    if issues:
+        bind.execute(sa.insert(search_index), issues)
+
+
+def _index_contents() -> None:
+    bind = op.get_bind()
+    for sha256, data, compression in bind.execute(
+        sa.select(blobs.c.sha256, blobs.c.data, blobs.c.compression)
+    ).all():
+        search_id = bind.execute(
+            sa.text("INSERT INTO file_search (content) VALUES (:content)"),
+            {"content": _decode(data, compression)},
+        ).lastrowid
+        bind.execute(
+            sa.update(blobs).where(blobs.c.sha256 == sha256).values(search_id=search_id)
+        )
+
+
+def _decode(data: bytes, compression: str) -> str:
+    if compression == "zstd":
+        import zstandard  # only installed with the zstd extra, which wrote them
+
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif compression == "zlib":
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS file_search")
+        op.execute("DROP TABLE IF EXISTS search_index")
+    with op.batch_alter_table("file_blobs") as batch_op:
+        batch_op.drop_constraint("uq_file_blobs_search_id", type_="unique")
+        batch_op.drop_column("search_id")
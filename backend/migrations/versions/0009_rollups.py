@@ -0,0 +1,178 @@
+"""issue and prompt rollups per batch, for log filters and sorting
+
+Fills the rollups of the batches already stored from their prompt results.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 07:01:29
+
+"""
+
+from collections import Counter
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: str | None = "0008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SEVERITIES = ("high", "medium", "low")
+BATCH_COUNTERS = (
+    "total_prompts",
+    "high_issues",
+    "medium_issues",
+    "low_issues",
+    "total_issues",
+    "failed_prompts",
+)
+SORT_KEYS = (
+    "high_issues",
+    "medium_issues",
+    "low_issues",
+    "total_issues",
+    "failed_prompts",
+    "total_duration_ns",
+)
+
+batches = sa.table(
+    "validation_batches",
+    sa.column("id", sa.Integer),
+    *(sa.column(name, sa.Integer) for name in BATCH_COUNTERS),
+    sa.column("total_duration_ns", sa.BigInteger),
+)
+prompt_results = sa.table(
+    "validation_prompt_results",
+    sa.column("id", sa.Integer),
+    sa.column("batch_id", sa.Integer),
+    sa.column("status", sa.String),
+    sa.column("result", sa.JSON),
+    sa.column("total_duration_ns", sa.BigInteger),
+    sa.column("cached", sa.Boolean),
+    *(sa.column(f"{s}_issues", sa.Integer) for s in SEVERITIES),
+    sa.column("issue_type_counts", sa.JSON),
+)
+issue_types = sa.table(
+    "validation_batch_issue_types",
+    sa.column("batch_id", sa.Integer),
+    sa.column("type", sa.String),
+    sa.column("count", sa.Integer),
+)
+
+
+def _counter_column(name: str, type_=sa.Integer) -> sa.Column:
+    return sa.Column(name, type_, nullable=False, server_default="0")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("validation_batches") as batch_op:
+        for name in BATCH_COUNTERS:
+            batch_op.add_column(_counter_column(name))
+        batch_op.add_column(_counter_column("total_duration_ns", sa.BigInteger))
+        for key in SORT_KEYS:
+            batch_op.create_index(
+                f"ix_validation_batches_{key}", [key, "created_at", "id"]
+            )
+    with op.batch_alter_table("validation_prompt_results") as batch_op:
+        for s in SEVERITIES:
+            batch_op.add_column(_counter_column(f"{s}_issues"))
+        batch_op.add_column(sa.Column("issue_type_counts", sa.JSON(), nullable=True))
+    op.create_table(
+        "validation_batch_issue_types",
+        sa.Column(
+            "batch_id",
+            sa.Integer(),
+            sa.ForeignKey("validation_batches.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("type", sa.String(length=255), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_validation_batch_issue_types_type",
+        "validation_batch_issue_types",
+        ["type", "batch_id"],
+    )
+    _fill_rollups()
+
+
+def _fill_rollups() -> None:
+    """Count the issues of completed prompts, per prompt and per batch."""
+    bind = op.get_bind()
+    rows_of_batch: dict[int, list[dict]] = {
+        batch_id: [] for (batch_id,) in bind.execute(sa.select(batches.c.id))
+    }
+    for row in bind.execute(
+        sa.select(
+            prompt_results.c.id,
+            prompt_results.c.batch_id,
+            prompt_results.c.status,
+            prompt_results.c.result,
+            prompt_results.c.total_duration_ns,
+            prompt_results.c.cached,
+        )
+    ).mappings():
+        issues = (row["result"] or []) if row["status"] == "completed" else []
+        severities = Counter(issue.get("severity") for issue in issues)
+        rollups = {
+            **{f"{s}_issues": severities[s] for s in SEVERITIES},
+            "issue_type_counts": dict(Counter(issue.get("type") for issue in issues))
+            or None,
+        }
+        bind.execute(
+            sa.update(prompt_results)
+            .where(prompt_results.c.id == row["id"])
+            .values(**rollups)
+        )
+        rows_of_batch[row["batch_id"]].append({**row, **rollups})
+
+    for batch_id, rows in rows_of_batch.items():
+        high, medium, low = (
+            sum(row[f"{s}_issues"] for row in rows) for s in SEVERITIES
+        )
+        bind.execute(
+            sa.update(batches)
+            .where(batches.c.id == batch_id)
+            .values(
+                total_prompts=len(rows),
+                high_issues=high,
+                medium_issues=medium,
+                low_issues=low,
+                total_issues=high + medium + low,
+                failed_prompts=sum(row["status"] == "failed" for row in rows),
+                total_duration_ns=sum(
+                    row["total_duration_ns"] or 0 for row in rows if not row["cached"]
+                ),
+            )
+        )
+        type_counts: Counter[str] = Counter()
+        for row in rows:
+            type_counts.update(row["issue_type_counts"] or {})
+        if type_counts:
+            bind.execute(
+                sa.insert(issue_types),
+                [
+                    {"batch_id": batch_id, "type": issue_type, "count": count}
+                    for issue_type, count in type_counts.items()
+                ],
+            )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_validation_batch_issue_types_type",
+        table_name="validation_batch_issue_types",
+    )
+    op.drop_table("validation_batch_issue_types")
+    with op.batch_alter_table("validation_prompt_results") as batch_op:
+        batch_op.drop_column("issue_type_counts")
+        for s in SEVERITIES:
+            batch_op.drop_column(f"{s}_issues")
+    with op.batch_alter_table("validation_batches") as batch_op:
+        for key in SORT_KEYS:
+            batch_op.drop_index(f"ix_validation_batches_{key}")
+        batch_op.drop_column("total_duration_ns")
+        for name in BATCH_COUNTERS:
+            batch_op.drop_column(name)
@@ -0,0 +1,48 @@
+"""batch model and the indexes of the log filters
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 07:03:42
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0010"
+down_revision: str | None = "0009"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("validation_batches") as batch_op:
+        batch_op.add_column(sa.Column("model", sa.String(length=255), nullable=True))
+        batch_op.create_index(
+            "ix_validation_batches_status", ["status", "created_at", "id"]
+        )
+        batch_op.create_index(
+            "ix_validation_batches_model", ["model", "created_at", "id"]
+        )
+        batch_op.create_index(
+            "ix_validation_batches_updated_at", ["updated_at", "created_at", "id"]
+        )
+    op.create_index(
+        "ix_validation_prompt_results_prompt",
+        "validation_prompt_results",
+        ["prompt_category", "prompt_name", "batch_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_validation_prompt_results_prompt",
+        table_name="validation_prompt_results",
+    )
+    with op.batch_alter_table("validation_batches") as batch_op:
+        batch_op.drop_index("ix_validation_batches_updated_at")
+        batch_op.drop_index("ix_validation_batches_model")
+        batch_op.drop_index("ix_validation_batches_status")
+        batch_op.drop_column("model")
@@ -0,0 +1,61 @@
+"""cancelled status for batches, prompt results and jobs
+
+The status columns are plain strings, so on SQLite the upgrade only
+widens the allowed values. The downgrade records cancelled batches,
+prompts and jobs as failed.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 07:33:14
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0012"
+down_revision: str | None = "0011"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+STATUSES = ("waiting", "processing", "completed", "failed")
+JOB_STATUSES = ("queued", "leased", "done", "failed")
+# table name -> (enum name, statuses before cancellation)
+STATUS_COLUMNS = {
+    "validation_batches": ("status", STATUSES),
+    "validation_prompt_results": ("status", STATUSES),
+    "validation_jobs": ("jobstatus", JOB_STATUSES),
+}
+
+
+def _enum(name: str, values: Sequence[str]) -> sa.Enum:
+    return sa.Enum(*values, name=name, native_enum=False)
+
+
+def _alter_status(table_name: str, old: sa.Enum, new: sa.Enum) -> None:
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.alter_column(
+            "status", existing_type=old, type_=new, existing_nullable=False
+        )
+
+
+def upgrade() -> None:
+    for table_name, (name, values) in STATUS_COLUMNS.items():
+        _alter_status(
+            table_name, _enum(name, values), _enum(name, (*values, "cancelled"))
+        )
+
+
+def downgrade() -> None:
+    for table_name, (name, values) in STATUS_COLUMNS.items():
+        table = sa.table(table_name, sa.column("status", sa.String))
+        op.execute(
+            sa.update(table)
+            .where(table.c.status == "cancelled")
+            .values(status="failed")
+        )
+        _alter_status(
+            table_name, _enum(name, (*values, "cancelled")), _enum(name, values)
+        )
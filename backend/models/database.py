@@ -1,31 +1,46 @@
 import os
 from datetime import datetime
+from pathlib import Path
 from typing import Annotated
 
+from alembic import command
+from alembic.config import Config
 from fastapi import Depends
 from sqlalchemy import (
     JSON,
+    BigInteger,
+    Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
-    create_engine,
+    UniqueConstraint,
+    event,
+    inspect,
 )
 from sqlalchemy import (
     Enum as SAEnum,
 )
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
-    Session,
     mapped_column,
     relationship,
-    sessionmaker,
 )
-from sqlalchemy.sql import text
+from sqlalchemy.sql import column, table, text
 
-from schema import Status
+from schema import JobStatus, Status
 
 #########################################################
 # Types
@@ -37,6 +52,9 @@ int_pk = Annotated[int, mapped_column(Integer, primary_key=True, autoincrement=T
 status_enum = Annotated[
     Status, mapped_column(SAEnum(Status, native_enum=False), nullable=False)
 ]
+job_status_enum = Annotated[
+    JobStatus, mapped_column(SAEnum(JobStatus, native_enum=False), nullable=False)
+]
 timestamp = Annotated[
     datetime,
     mapped_column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")),
@@ -45,27 +63,127 @@ timestamp = Annotated[
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./validation.db")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# asyncio drivers used when DATABASE_URL does not name one
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_database_url(url: str) -> str:
+    """``sqlite:///x.db`` -> ``sqlite+aiosqlite:///x.db``; explicit drivers are kept."""
+    scheme, sep, rest = url.partition("://")
+    if not sep or "+" in scheme or scheme not in _ASYNC_DRIVERS:
+        return url
+    return f"{scheme}+{_ASYNC_DRIVERS[scheme]}://{rest}"
+
+
+#########################################################
+# Storage configuration
+#########################################################
+# WAL lets the /logs readers run while a worker commits; NORMAL only syncs at
+# checkpoints, which is safe in WAL mode. Set per deployment, e.g. FULL on
+# storage where losing the last transactions on power loss is not acceptable.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def configure_sqlite(
+    engine: AsyncEngine,
+    journal_mode: str = SQLITE_JOURNAL_MODE,
+    synchronous: str = SQLITE_SYNCHRONOUS,
+    busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS,
+) -> None:
+    """Apply the SQLite pragmas to every new connection of ``engine``.
+
+    Engines of other dialects are left unchanged.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    journal_mode = journal_mode.upper()
+    synchronous = synchronous.upper()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"Unknown SQLite journal mode: {journal_mode}")
+    if synchronous not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown SQLite synchronous setting: {synchronous}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {synchronous}")
+        cursor.close()
+
+
+engine = create_async_engine(async_database_url(DATABASE_URL))
+configure_sqlite(engine)
+# Objects stay usable after commit; attribute access must never trigger I/O
+# on an AsyncSession.
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+# Columns of validation_batches that /logs can sort by; each has an index
+# ending in (created_at, id), the tie-breaker of every listing order.
+BATCH_ROLLUP_SORT_KEYS = (
+    "high_issues",
+    "medium_issues",
+    "low_issues",
+    "total_issues",
+    "failed_prompts",
+    "total_duration_ns",
+    "updated_at",
+)
+
+
 class ValidationBatchORM(Base):
     __tablename__ = "validation_batches"
+    # /logs lists batches newest first and pages by (created_at, id)
+    __table_args__ = (
+        Index("ix_validation_batches_created_at_id", "created_at", "id"),
+        # status and model filters (and /logs/active), newest first
+        Index("ix_validation_batches_status", "status", "created_at", "id"),
+        Index("ix_validation_batches_model", "model", "created_at", "id"),
+        *(
+            Index(f"ix_validation_batches_{key}", key, "created_at", "id")
+            for key in BATCH_ROLLUP_SORT_KEYS
+        ),
+    )
 
     id: Mapped[int_pk] = mapped_column(comment="Batch ID")
     name: Mapped[str] = mapped_column(
         String(255), nullable=False, comment="Name of the validation batch"
     )
     status: Mapped[status_enum] = mapped_column(comment="Current status of the batch")
+    model: Mapped[str | None] = mapped_column(
+        String(255), nullable=True, comment="Ollama model the batch was validated with"
+    )
 
     completed_prompts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
-    prompt_results: Mapped[list[dict]] = mapped_column(
-        JSON, default=list, nullable=False
+    total_prompts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    version: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False, comment="Incremented on every write"
     )
+
+    # Rollups of the prompt results, refreshed whenever a prompt finishes.
+    # Issues are those of completed prompts.
+    high_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    medium_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    low_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed_prompts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_duration_ns: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False,
+        comment="Model time of the prompts not served from the result cache",
+    )
+
     created_at: Mapped[timestamp] = mapped_column(
         comment="Creation timestamp", server_default=text("CURRENT_TIMESTAMP")
     )
@@ -76,7 +194,131 @@ class ValidationBatchORM(Base):
     )
 
     files: Mapped[list["ValidationFileORM"]] = relationship(
-        back_populates="batch", cascade="all, delete-orphan", passive_deletes=True
+        back_populates="batch",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ValidationFileORM.id",
+        lazy="selectin",
+    )
+    prompt_results: Mapped[list["ValidationPromptResultORM"]] = relationship(
+        back_populates="batch",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ValidationPromptResultORM.prompt_index",
+        lazy="selectin",
+    )
+    issue_types: Mapped[list["BatchIssueTypeORM"]] = relationship(
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+class BatchIssueTypeORM(Base):
+    """Number of issues of one type in a batch, for filtering /logs by type."""
+
+    __tablename__ = "validation_batch_issue_types"
+    __table_args__ = (
+        Index("ix_validation_batch_issue_types_type", "type", "batch_id"),
+    )
+
+    batch_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("validation_batches.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    type: Mapped[str] = mapped_column(String(255), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ValidationPromptResultORM(Base):
+    """The result of one selected prompt of a batch.
+
+    Each prompt has its own row so that recording a result only writes that
+    row instead of the whole list of results.
+    """
+
+    __tablename__ = "validation_prompt_results"
+    __table_args__ = (
+        UniqueConstraint("batch_id", "prompt_index"),
+        # /logs prompt filter
+        Index(
+            "ix_validation_prompt_results_prompt",
+            "prompt_category",
+            "prompt_name",
+            "batch_id",
+        ),
+    )
+
+    id: Mapped[int_pk] = mapped_column(comment="Prompt result ID")
+    batch_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("validation_batches.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    prompt_index: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="Position among the batch's selected prompts"
+    )
+    prompt_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_category: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    prompt_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status: Mapped[status_enum] = mapped_column(comment="Current status of the prompt")
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result: Mapped[list[dict] | None] = mapped_column(
+        JSON, nullable=True, comment="Issues found, as ValidationIssue dicts"
+    )
+    # Rollups of result; zero until the prompt has completed
+    high_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    medium_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    low_issues: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    issue_type_counts: Mapped[dict[str, int] | None] = mapped_column(
+        JSON, nullable=True, comment="Number of issues by type"
+    )
+    total_duration_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    eval_duration_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    load_duration_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    prompt_eval_duration_ns: Mapped[int | None] = mapped_column(
+        BigInteger, nullable=True
+    )
+    cached: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    fused: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    version: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False, comment="Batch version of the last write"
+    )
+    updated_at: Mapped[timestamp] = mapped_column(
+        onupdate=text("CURRENT_TIMESTAMP"),
+        server_default=text("CURRENT_TIMESTAMP"),
+        comment="Last update timestamp",
+    )
+
+    batch: Mapped["ValidationBatchORM"] = relationship(back_populates="prompt_results")
+
+
+class FileBlobORM(Base):
+    """File content stored once per distinct sha256 and shared between batches."""
+
+    __tablename__ = "file_blobs"
+
+    sha256: Mapped[str] = mapped_column(
+        String(64), primary_key=True, comment="sha256 of the uncompressed content"
+    )
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    compression: Mapped[str] = mapped_column(
+        String(16), nullable=False, comment="none, zlib or zstd"
+    )
+    size: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="Uncompressed size in bytes"
+    )
+    ref_count: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False, comment="Number of referencing files"
+    )
+    search_id: Mapped[int | None] = mapped_column(
+        Integer,
+        unique=True,
+        nullable=True,
+        comment="rowid of the content in file_search",
+    )
+    created_at: Mapped[timestamp] = mapped_column(
+        server_default=text("CURRENT_TIMESTAMP"), comment="Creation timestamp"
     )
 
 
@@ -85,9 +327,11 @@ class ValidationFileORM(Base):
 
     id: Mapped[int_pk] = mapped_column(comment="File ID")
     file_name: Mapped[str] = mapped_column(String, nullable=False)
-    content: Mapped[str] = mapped_column(Text, nullable=False)
     file_type: Mapped[str] = mapped_column(String, nullable=False)
-    sha256: Mapped[str] = mapped_column(String(64), nullable=True)
+    sha256: Mapped[str] = mapped_column(
+        String(64), ForeignKey("file_blobs.sha256"), nullable=False, index=True
+    )
+    blob: Mapped["FileBlobORM"] = relationship()
     created_at: Mapped[timestamp] = mapped_column(
         server_default=text("CURRENT_TIMESTAMP"), comment="Creation timestamp"
     )
@@ -100,16 +344,178 @@ class ValidationFileORM(Base):
     batch: Mapped["ValidationBatchORM"] = relationship(back_populates="files")
 
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+class ValidationJobORM(Base):
+    """A persistent unit of work: one prompt of one batch, or several prompts
+    generated together in fused mode."""
+
+    __tablename__ = "validation_jobs"
+    __table_args__ = (
+        UniqueConstraint("batch_id", "prompt_index"),
+        Index("ix_validation_jobs_status_lease", "status", "lease_expires_at"),
+    )
+
+    id: Mapped[int_pk] = mapped_column(comment="Job ID")
+    batch_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("validation_batches.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    prompt_index: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="Index into the batch's prompt_results"
+    )
+    prompt_indices: Mapped[list[int] | None] = mapped_column(
+        JSON,
+        nullable=True,
+        comment="All prompts of a fused job (starting with prompt_index)",
+    )
+    status: Mapped[job_status_enum] = mapped_column(comment="Current job state")
+    attempts: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False, comment="Number of times claimed"
+    )
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    lease_owner: Mapped[str | None] = mapped_column(
+        String(255), nullable=True, comment="Worker currently holding the lease"
+    )
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    heartbeat_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[timestamp] = mapped_column(
+        server_default=text("CURRENT_TIMESTAMP"), comment="Creation timestamp"
+    )
+    updated_at: Mapped[timestamp] = mapped_column(
+        onupdate=text("CURRENT_TIMESTAMP"),
+        server_default=text("CURRENT_TIMESTAMP"),
+        comment="Last update timestamp",
+    )
+
+    @property
+    def indices(self) -> list[int]:
+        return self.prompt_indices or [self.prompt_index]
+
+
+class LLMResultCacheORM(Base):
+    """Cached LLM output keyed on everything that determines it."""
+
+    __tablename__ = "llm_result_cache"
+
+    key: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        comment="sha256 over model, options, chunking, schema, prompt and file hashes",
+    )
+    model: Mapped[str] = mapped_column(String(255), nullable=False)
+    result: Mapped[list[dict]] = mapped_column(JSON, nullable=False)
+    total_duration_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    eval_duration_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    load_duration_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    prompt_eval_duration_ns: Mapped[int | None] = mapped_column(
+        BigInteger, nullable=True
+    )
+    hit_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+#########################################################
+# Full-text search
+#########################################################
+# SQLite FTS5 tables maintained by services.search_index. search_index has
+# one row per uploaded file name and one per issue of a finished prompt.
+# file_search indexes each distinct file content once, under the search_id of
+# its blob; it is contentless, so the text is not stored a second time. The
+# trigram tokenizer matches substrings, like the LIKE search it replaces.
+SEARCH_INDEX_DDL = (
+    """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    batch_id UNINDEXED,
+    prompt_index UNINDEXED,
+    file_name,
+    content,
+    description,
+    tokenize = 'trigram'
+)
+""",
+    """
+CREATE VIRTUAL TABLE IF NOT EXISTS file_search USING fts5(
+    content,
+    content = '',
+    tokenize = 'trigram'
+)
+""",
+)
+search_index_table = table(
+    "search_index",
+    column("batch_id"),
+    column("prompt_index"),
+    column("file_name"),
+    column("content"),
+    column("description"),
+    column("rank"),
+)
+file_search_table = table(
+    "file_search",
+    column("rowid"),
+    column("content"),
+    column("rank"),
+)
+
+
+def is_search_table(name: str) -> bool:
+    """Whether ``name`` is one of the FTS5 tables or their shadow tables."""
+    return name.startswith(("search_index", "file_search"))
 
 
-def get_db():
-    db = SessionLocal()
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
     try:
+        for ddl in SEARCH_INDEX_DDL:
+            connection.exec_driver_sql(ddl)
+    except OperationalError as e:
+        # TODO NEED LOGGING
+        print(f"Full-text search is not available: {e}")
+
+
+#########################################################
+# Migrations
+#########################################################
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+# Revision of the schema that create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+
+
+def upgrade_database(connection: Connection) -> None:
+    """Bring the schema behind ``connection`` to the latest revision.
+
+    Databases created before migrations were introduced have the baseline
+    tables but no alembic_version; they are stamped with the baseline first,
+    so their data is migrated instead of the tables being created again.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    tables = inspect(connection).get_table_names()
+    if "validation_batches" in tables and "alembic_version" not in tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_database)
+
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
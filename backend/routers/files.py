@@ -6,6 +6,7 @@ from schema import (
     ValidationFileContentResponse,
 )
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from services.converter import file_orm_to_schema
 
 router = APIRouter()
@@ -18,8 +19,12 @@ router = APIRouter()
 )
 async def get_file_content(db: db_dependency, file_id: list[int] = Query(...)):
     try:
-        stmt = select(ValidationFileORM).where(ValidationFileORM.id.in_(file_id))
-        file_orms: list[ValidationFileORM] = db.execute(stmt).scalars().all()
+        stmt = (
+            select(ValidationFileORM)
+            .options(selectinload(ValidationFileORM.blob))
+            .where(ValidationFileORM.id.in_(file_id))
+        )
+        file_orms: list[ValidationFileORM] = (await db.execute(stmt)).scalars().all()
 
         by_id = {file_orm.id: file_orm for file_orm in file_orms}
 
@@ -1,19 +1,51 @@
+import asyncio
 import math
+import os
+from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from fastapi import status as fastapi_status
-from sqlalchemy import desc, distinct, func, select
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import desc, select
 from sqlalchemy.exc import SQLAlchemyError
 
-from models.database import ValidationBatchORM, ValidationFileORM, db_dependency
+from models.database import ValidationBatchORM, db_dependency
 from schema import (
     ActiveBatchResponse,
+    LogSort,
+    Severity,
+    Status,
+    ValidationBatchDelta,
     ValidationBatchResponse,
     ValidationLogsPaginatedResponse,
 )
-from services.converter import batch_orm_to_active_response, batch_orm_to_schema
+from services.converter import batch_orm_to_active_response, batch_orm_to_json
+from services.events import batch_events
+from services.log_service import LogFilter, LogService
+from services.utils import dumps_json, etag_headers, etag_matches
 
 router = APIRouter()
+log_service = LogService()
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+TERMINAL_STATUSES = (Status.completed, Status.failed, Status.cancelled)
+
+
+def _batch_etag(batch_id: int, version: int) -> str:
+    return f'"b{batch_id}-v{version}"'
+
+
+def _json_response(model: BaseModel, headers: dict[str, str] | None = None) -> Response:
+    return Response(
+        content=model.model_dump_json(), media_type="application/json", headers=headers
+    )
+
+
+def _format_sse(event_id: int, event: str, data: dict | bytes) -> str:
+    if not isinstance(data, bytes):
+        data = dumps_json(data)
+    return f"id: {event_id}\nevent: {event}\ndata: {data.decode()}\n\n"
 
 
 @router.get("/logs", response_model=ValidationLogsPaginatedResponse)
@@ -22,48 +54,131 @@ async def get_validation_logs(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     search: str | None = None,
+    severity: Severity | None = Query(
+        None, description="Only batches with issues of this severity"
+    ),
+    issue_type: str | None = Query(
+        None, description="Only batches with issues of this type"
+    ),
+    failed: bool | None = Query(
+        None, description="Only batches with (true) or without (false) failed prompts"
+    ),
+    status: list[Status] | None = Query(None, description="Batch statuses to list"),
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    updated_from: datetime | None = None,
+    updated_to: datetime | None = None,
+    model: str | None = Query(None, description="Ollama model of the batch"),
+    prompt_category: str | None = Query(
+        None, description="Only batches that ran a prompt of this category"
+    ),
+    prompt_name: str | None = Query(
+        None, description="Only batches that ran a prompt of this name"
+    ),
+    sort: LogSort | None = Query(
+        None, description="Largest first; default newest, or relevance with search"
+    ),
+    cursor: str | None = Query(
+        None, description="next_cursor of the previous page; replaces page"
+    ),
+    with_total: bool | None = Query(
+        None,
+        description="Count all matching batches (default: true with page, false with cursor)",
+    ),
 ):
-    try:
-        # query
-        stmt = select(ValidationBatchORM).order_by(desc(ValidationBatchORM.created_at))
-        if search:
-            stmt = stmt.join(ValidationFileORM).where(
-                ValidationFileORM.file_name.contains(search)
-            )
+    """
+    バッチ一覧を新しい順に取得
+
+    一覧にはプロンプトごとの結果の代わりに件数だけを返す。結果の本体は
+    /logs/batches/{batch_id} で取得する。
+
+    ページ番号の代わりに前のページの next_cursor を cursor に渡すと、
+    OFFSETを使わずに続きを取得する。深いページでも速度が変わらない。
 
+    search はファイル名・ファイル内容・指摘の説明と該当箇所を全文検索し、
+    ページ番号指定では関連度順に返す（3文字未満の場合はファイル名の部分一致）。
+
+    severity・issue_type・failed で指摘や失敗したプロンプトの有無により絞り込み、
+    sort で指摘数・失敗数・LLMの処理時間の多い順や更新の新しい順に並べ替える。
+    cursor を使う場合は同じ sort を指定する。
+
+    status・作成/更新日時の範囲（両端を含む）・model・プロンプトの
+    カテゴリ/名前でも絞り込める。
+    """
+    after: int | None = None
+    if cursor is not None:
+        try:
+            after = log_service.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=fastapi_status.HTTP_400_BAD_REQUEST, detail=str(e)
+            ) from e
+    if with_total is None:
+        with_total = cursor is None
+    log_filter = LogFilter(
+        search=search,
+        severity=severity,
+        issue_type=issue_type,
+        failed=failed,
+        statuses=status,
+        created_from=created_from,
+        created_to=created_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+        model=model,
+        prompt_category=prompt_category,
+        prompt_name=prompt_name,
+    )
+
+    try:
         # count total items
-        count_stmt = select(func.count(distinct(ValidationBatchORM.id)))
-        if search:
-            count_stmt = (
-                count_stmt.select_from(ValidationBatchORM)
-                .join(ValidationFileORM)
-                .where(ValidationFileORM.file_name.contains(search))
-            )
-        total = db.execute(count_stmt).scalar_one()
-        total_pages = math.ceil(total / per_page) if total > 0 else 1
+        total: int | None = None
+        total_pages: int | None = None
+        if with_total:
+            total = await log_service.count_batches(log_filter, db)
+            total_pages = math.ceil(total / per_page) if total > 0 else 1
 
-        if page > total_pages:
+        if cursor is None and total_pages is not None and page > total_pages:
             raise HTTPException(
                 status_code=fastapi_status.HTTP_404_NOT_FOUND,
                 detail="Page number out of range",
             )
 
-        offset = (page - 1) * per_page
-        paged_stmt = stmt.offset(offset).limit(per_page)
-
-        result = db.execute(paged_stmt)
-        batch_orms = result.scalars().all()
-        logs = [batch_orm_to_schema(batch) for batch in batch_orms]
-
-        return ValidationLogsPaginatedResponse(
-            logs=logs,
-            curr_page=page,
-            total_pages=total_pages,
-            per_page=per_page,
-            total=total,
-            has_next=page < total_pages,
-            has_prev=page > 1,
+        # one extra row tells whether there is a next page
+        logs = await log_service.list_batches(
+            log_filter,
+            per_page + 1,
+            db,
+            offset=0 if cursor is not None else (page - 1) * per_page,
+            after=after,
+            sort=sort,
         )
+        has_next = len(logs) > per_page
+        logs = logs[:per_page]
+        # relevance-ordered pages cannot be continued with a cursor
+        cursor_paging = cursor is not None or not await log_service.ranked(
+            log_filter, db, sort
+        )
+
+        # built from our own rows; skip FastAPI's re-validation of the response
+        return _json_response(
+            ValidationLogsPaginatedResponse(
+                logs=logs,
+                curr_page=None if cursor is not None else page,
+                total_pages=total_pages,
+                per_page=per_page,
+                total=total,
+                has_next=has_next,
+                has_prev=cursor is not None or page > 1,
+                next_cursor=(
+                    log_service.encode_cursor(logs[-1].id)
+                    if has_next and cursor_paging
+                    else None
+                ),
+            )
+        )
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=fastapi_status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -76,16 +191,63 @@ async def get_validation_logs(
         ) from e
 
 
-@router.get("/logs/batches/{batch_id}", response_model=ValidationBatchResponse)
-async def get_validation_log_detail(batch_id: int, db: db_dependency):
+@router.get(
+    "/logs/batches/{batch_id}",
+    response_model=ValidationBatchResponse | ValidationBatchDelta,
+    responses={304: {"description": "The batch has not changed (If-None-Match)"}},
+)
+async def get_validation_log_detail(
+    batch_id: int,
+    db: db_dependency,
+    since_version: int | None = Query(
+        None, ge=0, description="Only return prompt results changed after this version"
+    ),
+    if_none_match: str | None = Header(None),
+):
+    """
+    バッチの詳細を取得
+
+    バッチのバージョン（書き込みのたびに増える）を ETag で返し、If-None-Match
+    が一致すれば 304 を返す。since_version を指定すると、そのバージョン以降に
+    変更されたプロンプト結果だけを差分として返す。
+    """
     try:
-        batch_orm: ValidationBatchORM | None = db.get(ValidationBatchORM, batch_id)
-        if not batch_orm:
+        version = await log_service.batch_version(batch_id, db)
+        if version is None:
             raise HTTPException(
                 status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Log not found"
             )
-        batch = batch_orm_to_schema(batch_orm)
-        return batch
+        etag = _batch_etag(batch_id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=fastapi_status.HTTP_304_NOT_MODIFIED,
+                headers=etag_headers(etag),
+            )
+
+        if since_version is not None:
+            delta = await log_service.batch_delta(batch_id, since_version, db)
+            if delta is None:
+                raise HTTPException(
+                    status_code=fastapi_status.HTTP_404_NOT_FOUND,
+                    detail="Log not found",
+                )
+            return _json_response(
+                delta, headers=etag_headers(_batch_etag(batch_id, delta.version))
+            )
+
+        snapshot = await log_service.batch_snapshot(batch_id, version, db)
+        if snapshot is None:
+            raise HTTPException(
+                status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Log not found"
+            )
+        version, body = snapshot
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers=etag_headers(_batch_etag(batch_id, version)),
+        )
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=fastapi_status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -98,6 +260,87 @@ async def get_validation_log_detail(batch_id: int, db: db_dependency):
         ) from e
 
 
+@router.get("/logs/batches/{batch_id}/events")
+async def stream_validation_log_events(
+    batch_id: int,
+    db: db_dependency,
+    last_event_id: int | None = Header(None),
+):
+    """
+    バッチの進捗をServer-Sent Eventsで配信
+
+    最初に現在の状態を "snapshot" イベントで送り、以降はプロンプトごとの変更を
+    "prompt"、バッチの状態変更を "status" イベントで送る。Last-Event-IDヘッダー
+    付きで再接続した場合は、取りこぼしたイベントだけを送る。バッチが終了すると
+    ストリームを閉じる。
+    """
+    # Subscribe before reading the snapshot so no event can fall in between.
+    sub = batch_events.subscribe(batch_id)
+    try:
+        backlog = (
+            batch_events.replay(batch_id, last_event_id)
+            if last_event_id is not None
+            else None
+        )
+        snapshot: bytes | None = None
+        snapshot_status: Status | None = None
+        snapshot_id = 0
+        if backlog is None:
+            batch_orm: ValidationBatchORM | None = await db.get(
+                ValidationBatchORM, batch_id
+            )
+            if not batch_orm:
+                raise HTTPException(
+                    status_code=fastapi_status.HTTP_404_NOT_FOUND,
+                    detail="Log not found",
+                )
+            snapshot_id = batch_events.last_id(batch_id)
+            snapshot = batch_orm_to_json(batch_orm)
+            snapshot_status = batch_orm.status
+    except Exception:
+        batch_events.unsubscribe(sub)
+        raise
+
+    async def event_stream():
+        try:
+            last_id = 0
+            if snapshot is not None:
+                yield _format_sse(snapshot_id, "snapshot", snapshot)
+                if snapshot_status in TERMINAL_STATUSES:
+                    return
+                last_id = snapshot_id
+            else:
+                for event in backlog:
+                    yield _format_sse(event.id, event.event, event.data)
+                    last_id = event.id
+                    if event.data.get("status") in TERMINAL_STATUSES:
+                        return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        sub.queue.get(), SSE_KEEPALIVE_SECONDS
+                    )
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event.id <= last_id:
+                    # already covered by the snapshot or backlog
+                    continue
+                yield _format_sse(event.id, event.event, event.data)
+                last_id = event.id
+                if event.data.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            batch_events.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/logs/active", response_model=list[ActiveBatchResponse])
 async def get_active_validation_batches(db: db_dependency):
     try:
@@ -106,7 +349,7 @@ async def get_active_validation_batches(db: db_dependency):
             .where(ValidationBatchORM.status.in_(["waiting", "processing"]))
             .order_by(desc(ValidationBatchORM.created_at))
         )
-        result = db.execute(stmt)
+        result = await db.execute(stmt)
         active_batch_orms = result.scalars().all()
 
         return [batch_orm_to_active_response(batch) for batch in active_batch_orms]
@@ -1,24 +1,37 @@
-from typing import Any
-
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi import status as fastapi_status
 
+from routers.upload import validation_service
 from schema import PromptCategory, PromptCategoryKind, PromptContentResponse
-from services.prompt_service import PromptService
+from services.utils import etag_headers, etag_matches
 
 router = APIRouter()
-prompt_service = PromptService()
+# shared with the validation worker, so the catalog is kept in memory once
+prompt_service = validation_service.prompt_service
 
 
 @router.get("/prompts", response_model=list[PromptCategory])
-async def get_available_prompts():
+async def get_available_prompts(if_none_match: str | None = Header(None)):
     """
     利用可能なプロンプト一覧を取得
+
+    ETagを返す。If-None-Matchが一致すれば304を返す
     """
     try:
         prompt_category_list = prompt_service.get_available_prompts()
         if prompt_category_list is None:
             raise HTTPException(status_code=404, detail="No prompts found")
-        return prompt_category_list
+        etag = prompt_service.listing_etag
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=fastapi_status.HTTP_304_NOT_MODIFIED,
+                headers=etag_headers(etag),
+            )
+        return Response(
+            content=prompt_service.listing_json(),
+            media_type="application/json",
+            headers=etag_headers(etag),
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -28,9 +41,15 @@ async def get_available_prompts():
 
 
 @router.get("/prompts/content", response_model=PromptContentResponse)
-async def get_prompt_content(name: str = Query(...), cat: str = Query(...)):
+async def get_prompt_content(
+    name: str = Query(...),
+    cat: str = Query(...),
+    if_none_match: str | None = Header(None),
+):
     """
     指定されたプロンプトの内容を取得
+
+    内容のSHA256をETagとして返す。If-None-Matchが一致すれば304を返す
     """
     try:
         prompt_category: PromptCategoryKind = PromptCategoryKind(cat)
@@ -41,7 +60,17 @@ async def get_prompt_content(name: str = Query(...), cat: str = Query(...)):
                 detail=f"Prompt '{name}' in the '{cat}' category was not found",
             )
 
-        return content
+        etag = f'"{content.sha256}"'
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=fastapi_status.HTTP_304_NOT_MODIFIED,
+                headers=etag_headers(etag),
+            )
+        return Response(
+            content=content.model_dump_json(),
+            media_type="application/json",
+            headers=etag_headers(etag),
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=404, detail=f"Category '{cat}' not found"
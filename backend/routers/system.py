@@ -0,0 +1,61 @@
+from fastapi import APIRouter
+
+from routers.upload import validation_service
+from schema import (
+    ModelWarmState,
+    OllamaCallStats,
+    OllamaHostStatus,
+    ResponseParserStats,
+    ResultCacheStats,
+    SchedulerHostStats,
+)
+
+router = APIRouter()
+
+
+@router.get("/system/scheduler", response_model=list[SchedulerHostStats])
+async def get_scheduler_stats():
+    """
+    Ollamaホストごとの同時実行数の上限と待ち行列の長さを取得
+    """
+    return validation_service.ollama_service.scheduler.stats()
+
+
+@router.get("/system/hosts", response_model=list[OllamaHostStatus])
+async def get_ollama_hosts():
+    """
+    設定されたOllamaホストのヘルスチェック結果と負荷を取得
+    """
+    return validation_service.ollama_service.pool.status()
+
+
+@router.get("/system/models", response_model=list[ModelWarmState])
+async def get_model_warm_state():
+    """
+    各Ollamaホストでモデルがロード済み（ウォーム）かどうかを取得
+    """
+    return validation_service.ollama_service.keepalive.status()
+
+
+@router.get("/system/cache", response_model=ResultCacheStats)
+async def get_result_cache_stats():
+    """
+    LLM結果キャッシュのヒット数などを取得
+    """
+    return validation_service.result_cache.stats()
+
+
+@router.get("/system/parser", response_model=ResponseParserStats)
+async def get_response_parser_stats():
+    """
+    LLMの応答JSONをどの段階（そのまま・クオート修正・修復）で解析できたかの件数を取得
+    """
+    return validation_service.ollama_service.parser.stats()
+
+
+@router.get("/system/calls", response_model=OllamaCallStats)
+async def get_ollama_call_stats():
+    """
+    Ollama呼び出しのタイムアウト・リトライ・ヘッジの件数を取得
+    """
+    return validation_service.ollama_service.call_stats()
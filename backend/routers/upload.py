@@ -1,10 +1,9 @@
-import asyncio
-
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from fastapi import status as fastapi_status
 
 from models.database import db_dependency
 from schema import (
+    CancelResponse,
     PromptCategoryKind,
     PromptCatName,
     PromptInfo,
@@ -12,18 +11,14 @@ from schema import (
     ValidationBatchResponse,
     ValidationFileModel,
 )
-from services.validation_service import ValidationService, change_batch_status
+from services.job_queue import JobQueue, JobWorker
 from services.utils import calc_sha256
+from services.validation_service import ValidationService, change_batch_status
 
 router = APIRouter()
 validation_service = ValidationService()
-# TODO do not hardcode
-semaphore = asyncio.Semaphore(3)
-
-
-async def _run_with_limit(coro):
-    async with semaphore:
-        return await coro
+job_queue = JobQueue()
+job_worker = JobWorker(validation_service, job_queue)
 
 
 @router.post(
@@ -41,6 +36,10 @@ async def validate_files(
     batch_name: str = Form(
         ..., description="Name of the job (ValidationBatch)", max_length=255
     ),
+    fuse_prompts: bool | None = Form(
+        None,
+        description="Answer the selected prompts in one LLM request (defaults to VALIDATION_FUSE_PROMPTS)",
+    ),
 ):
     if not upload_files:
         raise HTTPException(
@@ -111,7 +110,7 @@ async def validate_files(
         )
 
     # try:
-    batch, files = validation_service.create_validation_batch_and_files(
+    batch, _ = await validation_service.create_validation_batch_and_files(
         file_models, prompt_infos, batch_name, db
     )
     # except Exception as e:
@@ -121,24 +120,68 @@ async def validate_files(
     #     ) from e
 
     try:
-        change_batch_status(batch, Status.processing, db)
-        print("--")
-        print(batch)
-        for i, prompt_task in enumerate(batch.prompt_results):
-            # TODO currently errors occurred in each tasks are not gathered. Need logging.
-            asyncio.create_task(
-                _run_with_limit(
-                    validation_service.process_file_validation(
-                        batch.id, prompt_task, i, files, db
-                    )
-                )
-            )
+        await change_batch_status(batch, Status.processing, db)
+        # Prompts are run by job_worker (or any other backend instance sharing
+        # the database), so queued work survives a restart of this process.
+        fuse = validation_service.fuse_prompts if fuse_prompts is None else fuse_prompts
+        await job_queue.enqueue(
+            batch.id,
+            list(range(len(batch.prompt_results))),
+            db,
+            group_size=validation_service.fuse_max_prompts if fuse else 1,
+        )
+        job_worker.notify()
     except Exception as e:
-        change_batch_status(batch, Status.failed, db)
-        print("Error starting validation tasks:", e)
+        await change_batch_status(batch, Status.failed, db)
+        print("Error queueing validation tasks:", e)
         raise HTTPException(
             status_code=fastapi_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to validate",
         ) from e
 
     return batch
+
+
+async def _cancel(
+    batch_id: int, prompt_index: int | None, db: db_dependency
+) -> CancelResponse:
+    try:
+        cancelled, aborted = await job_worker.cancel(batch_id, prompt_index, db)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=fastapi_status.HTTP_404_NOT_FOUND, detail=str(e)
+        ) from e
+    if not cancelled:
+        raise HTTPException(
+            status_code=fastapi_status.HTTP_409_CONFLICT,
+            detail="Nothing left to cancel",
+        )
+    return CancelResponse(
+        batch_id=batch_id, cancelled_prompts=cancelled, aborted_jobs=aborted
+    )
+
+
+@router.post("/validate/{batch_id}/cancel", response_model=CancelResponse)
+async def cancel_batch(batch_id: int, db: db_dependency):
+    """
+    バッチをキャンセル
+
+    未完了のプロンプトをすべて cancelled にし、待機中のジョブを取り下げ、
+    実行中のジョブは Ollama へのリクエストごと中断する。完了済みのプロンプトの
+    結果はそのまま残る。
+    """
+    return await _cancel(batch_id, None, db)
+
+
+@router.post(
+    "/validate/{batch_id}/prompts/{prompt_index}/cancel",
+    response_model=CancelResponse,
+)
+async def cancel_prompt(batch_id: int, prompt_index: int, db: db_dependency):
+    """
+    バッチのプロンプトを1つだけキャンセル
+
+    他のプロンプトはそのまま実行される。複数のプロンプトをまとめて実行する
+    ジョブは、そのプロンプトがすべてキャンセルされた時点で中断する。
+    """
+    return await _cancel(batch_id, prompt_index, db)
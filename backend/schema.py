@@ -17,6 +17,17 @@ class Status(str, Enum):
     processing = "processing"
     completed = "completed"
     failed = "failed"
+    cancelled = "cancelled"
+
+
+class JobStatus(str, Enum):
+    """State of a queued (batch, prompt_index) validation job."""
+
+    queued = "queued"
+    leased = "leased"
+    done = "done"
+    failed = "failed"
+    cancelled = "cancelled"
 
 
 class Severity(str, Enum):
@@ -124,6 +135,8 @@ class ValidationPromptResult(BaseModel):
     eval_duration_ns: int | None = None
     load_duration_ns: int | None = None
     prompt_eval_duration_ns: int | None = None
+    cached: bool = False  # True when the result was served from the LLM result cache
+    fused: bool = False  # True when generated together with other prompts of the batch
 
 
 ########################################################
@@ -198,20 +211,86 @@ class ValidationBatchResponse(ValidationBatchModel):
     """Response for /api/validate."""
 
     id: int = Field(...)
+    version: int = 0  # incremented on every write; see /api/logs/batches/{id}
+
+
+class ValidationPromptResultChange(BaseModel):
+    prompt_index: int
+    prompt_result: ValidationPromptResult
+
+
+# 差分レスポンス（/logs/batches/{id}?since_version=）
+class ValidationBatchDelta(BaseModel):
+    """What changed in a batch after ``since_version``."""
+
+    model_config = ConfigDict(use_enum_values=True)
+
+    id: int
+    version: int
+    since_version: int
+    status: Status
+    completed_prompts: int
+    updated_at: datetime
+    prompt_results: list[ValidationPromptResultChange]  # changed prompts only
 
 
 #########################################################
 # Validation log
 #########################################################
+class SeverityCounts(BaseModel):
+    high: int = 0
+    medium: int = 0
+    low: int = 0
+
+
+# ログ一覧の1行（結果の本体は詳細APIで取得する）
+class ValidationBatchSummary(BaseModel):
+    """A batch as listed by /api/logs, with counts instead of prompt results."""
+
+    model_config = ConfigDict(use_enum_values=True)
+
+    id: int
+    name: str
+    status: Status
+    model: str | None
+    file_ids: list[ValidationFileId]
+    completed_prompts: int
+    total_prompts: int
+    failed_prompts: int
+    severity_counts: SeverityCounts  # issues of completed prompts
+    total_issues: int
+    issue_type_counts: dict[str, int]
+    total_duration_ns: int  # model time, not counting cached results
+    created_at: datetime
+    updated_at: datetime
+
+    @computed_field
+    def total_files(self) -> int:
+        return len(self.file_ids)
+
+
+# ログ一覧の並び順（search 指定時の既定は関連度順）
+class LogSort(str, Enum):
+    newest = "newest"
+    high_issues = "high_issues"
+    medium_issues = "medium_issues"
+    low_issues = "low_issues"
+    total_issues = "total_issues"
+    failed_prompts = "failed_prompts"
+    total_duration = "total_duration"
+    updated = "updated"
+
+
 # ページネーションレスポンス
 class ValidationLogsPaginatedResponse(BaseModel):
-    logs: list[ValidationBatchResponse]
-    curr_page: int
-    total_pages: int
+    logs: list[ValidationBatchSummary]
+    curr_page: int | None  # None when paging with a cursor
+    total_pages: int | None  # None when the total was not counted
     per_page: int
-    total: int
+    total: int | None
     has_next: bool
     has_prev: bool
+    next_cursor: str | None = None  # pass as ?cursor= for the following page
 
 
 # 進行中バッチレスポンス
@@ -225,3 +304,102 @@ class ActiveBatchResponse(BaseModel):
     selected_prompts: list[PromptInfo]
     completed_prompts: int
     created_at: datetime
+
+
+class CancelResponse(BaseModel):
+    batch_id: int
+    cancelled_prompts: list[int] = Field(
+        ..., description="Indices of the prompts recorded as cancelled"
+    )
+    aborted_jobs: int = Field(
+        ..., description="Running jobs whose Ollama requests were aborted"
+    )
+
+
+#########################################################
+# System
+#########################################################
+class SchedulerHostStats(BaseModel):
+    """Current state of the adaptive concurrency limit for one Ollama host."""
+
+    host: str
+    limit: int
+    in_flight: int
+    queue_depth: int
+    min_limit: int
+    max_limit: int
+    successes: int
+    errors: int
+    error_rate: float
+    queueing_ratio: float | None = None
+
+
+class OllamaHostStatus(BaseModel):
+    """Health of one configured Ollama host."""
+
+    url: str
+    healthy: bool
+    model_available: bool | None = None
+    version: str | None = None
+    last_checked_at: datetime | None = None
+    last_error: str | None = None
+    consecutive_failures: int
+    load: float = Field(
+        ..., description="(in flight + queued) / current concurrency limit"
+    )
+
+
+class ModelWarmState(BaseModel):
+    """Whether the configured model is loaded on one Ollama host."""
+
+    host: str
+    model: str
+    active: bool = Field(
+        ..., description="Whether a request was sent within the keep-warm window"
+    )
+    warm: bool | None = Field(
+        None, description="Loaded with the expected context size; None if unknown"
+    )
+    loading: bool
+    context_length: int | None = None
+    expires_at: datetime | None = None
+    last_warmed_at: datetime | None = None
+    last_load_duration_ns: int | None = None
+    last_error: str | None = None
+
+
+class OllamaCallStats(BaseModel):
+    """Timeouts, retries and hedged calls since the backend started."""
+
+    timeout_seconds: float | None = Field(..., description="Limit per attempt")
+    timeouts: int
+    retries: int
+    retries_denied: int = Field(..., description="Retries refused by a batch budget")
+    hedging: bool
+    hedge_after_seconds: float | None = Field(
+        ..., description="Latency after which a call is hedged (recent p95)"
+    )
+    hedges: int
+    hedge_wins: int = Field(..., description="Hedges that answered first")
+
+
+class ResponseParserStats(BaseModel):
+    """How the model's responses were decoded since the backend started."""
+
+    strict: int = Field(..., description="Valid JSON as returned")
+    quotes: int = Field(..., description="Valid after escaping quotes in strings")
+    repair: int = Field(..., description="Needed json_repair")
+    failures: int = Field(..., description="Unusable responses")
+
+
+class ResultCacheStats(BaseModel):
+    """Counters of the LLM result cache since the backend started."""
+
+    enabled: bool
+    memory_entries: int
+    memory_size: int
+    ttl_seconds: int
+    max_rows: int
+    hits: int
+    memory_hits: int
+    misses: int
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import zlib
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models.database import FileBlobORM, SessionLocal, ValidationFileORM
+from services.search_index import search_index
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, see the "zstd" extra
+    zstandard = None
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    if compression == "zlib":
+        return zlib.compress(data)
+    return data
+
+
+def decode_blob(blob: FileBlobORM) -> str:
+    """Return the text content of a blob, decompressing it if needed."""
+    if blob.compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError(
+                f"Blob {blob.sha256} is zstd-compressed but zstandard is not installed"
+            )
+        data = zstandard.ZstdDecompressor().decompress(blob.data)
+    elif blob.compression == "zlib":
+        data = zlib.decompress(blob.data)
+    else:
+        data = blob.data
+    return data.decode("utf-8")
+
+
+class BlobStore:
+    """Content-addressed storage for uploaded file contents.
+
+    Each distinct content is stored once in file_blobs under its sha256, with a
+    count of the validation_files rows that point at it. Uploads add to the
+    counts; batches are only ever removed by ON DELETE CASCADE, so the counts
+    are recomputed, and unreferenced blobs deleted, by collect_garbage at
+    startup and every ``FILE_BLOB_GC_INTERVAL_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        compression: str | None = None,
+        min_size: int | None = None,
+        gc_interval: float | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+    ):
+        compression = compression or os.getenv("FILE_BLOB_COMPRESSION", "auto")
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "zlib"
+        if compression not in ("none", "zlib", "zstd"):
+            raise ValueError(f"Unknown FILE_BLOB_COMPRESSION: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("FILE_BLOB_COMPRESSION=zstd requires zstandard")
+        self.compression = compression
+        # Compressing tiny files costs more than it saves.
+        self.min_size = (
+            min_size
+            if min_size is not None
+            else int(os.getenv("FILE_BLOB_COMPRESSION_MIN_BYTES", "512"))
+        )
+        self.gc_interval = (
+            gc_interval
+            if gc_interval is not None
+            else float(os.getenv("FILE_BLOB_GC_INTERVAL_SECONDS", "3600"))
+        )
+        self.session_factory = session_factory
+        self._gc_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.gc_interval > 0 and self._gc_task is None:
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def stop(self) -> None:
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            await asyncio.gather(self._gc_task, return_exceptions=True)
+            self._gc_task = None
+
+    async def _gc_loop(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    deleted = await self.collect_garbage(db)
+                if deleted:
+                    print(f"Deleted {deleted} unreferenced file blob(s)")
+            except Exception as e:
+                # TODO NEED LOGGING
+                print(f"Error while collecting file blobs: {e}")
+            await asyncio.sleep(self.gc_interval)
+
+    async def put(self, sha256: str, data: bytes, db: AsyncSession) -> FileBlobORM:
+        """Add a reference to the blob for ``data``, creating it if needed.
+
+        Does not commit; the reference belongs to the caller's transaction.
+        """
+        if await self._add_reference(sha256, db):
+            return await db.get(FileBlobORM, sha256)
+
+        compression = self.compression if len(data) >= self.min_size else "none"
+        blob = FileBlobORM(
+            sha256=sha256,
+            data=_compress(data, compression),
+            compression=compression,
+            size=len(data),
+            ref_count=1,
+        )
+        try:
+            async with db.begin_nested():
+                db.add(blob)
+        except IntegrityError:
+            # another upload inserted the same content concurrently
+            if not await self._add_reference(sha256, db):
+                raise
+            return await db.get(FileBlobORM, sha256)
+        return blob
+
+    async def _add_reference(self, sha256: str, db: AsyncSession) -> bool:
+        result = await db.execute(
+            update(FileBlobORM)
+            .where(FileBlobORM.sha256 == sha256)
+            .values(ref_count=FileBlobORM.ref_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def collect_garbage(self, db: AsyncSession) -> int:
+        """Recount references from validation_files and delete unreferenced blobs.
+
+        Returns the number of blobs deleted.
+        """
+        refs = (
+            select(func.count(ValidationFileORM.id))
+            .where(ValidationFileORM.sha256 == FileBlobORM.sha256)
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(FileBlobORM)
+            .values(ref_count=refs)
+            .execution_options(synchronize_session=False)
+        )
+        indexed = (
+            await db.scalars(
+                select(FileBlobORM).where(
+                    FileBlobORM.ref_count <= 0, FileBlobORM.search_id.is_not(None)
+                )
+            )
+        ).all()
+        await search_index.remove_contents(
+            [(blob.search_id, decode_blob(blob)) for blob in indexed], db
+        )
+        deleted = (
+            await db.execute(
+                delete(FileBlobORM)
+                .where(FileBlobORM.ref_count <= 0)
+                .execution_options(synchronize_session=False)
+            )
+        ).rowcount
+        await db.commit()
+        return deleted
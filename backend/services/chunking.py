@@ -0,0 +1,196 @@
+import math
+import os
+import re
+from dataclasses import dataclass
+
+from schema import Severity, ValidationFile, ValidationIssue
+
+# Added around each file by OllamaService._construct_prompt.
+FILE_HEADER_TOKENS = 32
+
+
+def estimate_tokens(text: str, bytes_per_token: float = 3.0) -> int:
+    """Cheap upper-bound estimate of the number of tokens in ``text``.
+
+    Counting UTF-8 bytes keeps the estimate conservative for non-ASCII text,
+    which tokenizers split into more pieces than ASCII of the same length.
+    """
+    return math.ceil(len(text.encode("utf-8")) / bytes_per_token)
+
+
+@dataclass
+class FileChunk:
+    """A file, or a range of its lines, placed in one prompt window."""
+
+    file: ValidationFile
+    content: str
+    start_line: int
+    end_line: int
+    total_lines: int
+    tokens: int
+
+    @property
+    def is_partial(self) -> bool:
+        return self.start_line > 1 or self.end_line < self.total_lines
+
+
+class ChunkPlanner:
+    """Pack files into prompts that fit the model's context window.
+
+    Files are kept whole and packed in upload order while they fit. A file
+    that is too large for a window on its own is split at line boundaries.
+    """
+
+    def __init__(
+        self,
+        context_tokens: int | None = None,
+        output_tokens: int | None = None,
+        bytes_per_token: float | None = None,
+    ):
+        self.context_tokens = context_tokens or int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+        # Room left for the JSON the model writes back.
+        self.output_tokens = (
+            output_tokens
+            if output_tokens is not None
+            else int(os.getenv("OLLAMA_OUTPUT_TOKENS", "2048"))
+        )
+        self.bytes_per_token = bytes_per_token or float(
+            os.getenv("OLLAMA_BYTES_PER_TOKEN", "3")
+        )
+
+    def cache_params(self) -> dict[str, float]:
+        """The settings that decide how files are split into windows.
+
+        The context size is sent to Ollama as ``num_ctx`` and is part of the
+        options already.
+        """
+        return {
+            "output_tokens": self.output_tokens,
+            "bytes_per_token": self.bytes_per_token,
+        }
+
+    def estimate(self, text: str) -> int:
+        return estimate_tokens(text, self.bytes_per_token)
+
+    def budget(self, prompt_content: str, output_sections: int = 1) -> int:
+        """Tokens available for file contents in each window.
+
+        ``output_sections`` is the number of prompts answered in one response.
+        """
+        budget = (
+            self.context_tokens
+            - self.output_tokens * output_sections
+            - self.estimate(prompt_content)
+        )
+        if budget <= FILE_HEADER_TOKENS:
+            raise ValueError(
+                f"Prompt does not leave room for files in a context of {self.context_tokens} tokens"
+            )
+        return budget
+
+    def plan(
+        self,
+        files: list[ValidationFile],
+        prompt_content: str,
+        output_sections: int = 1,
+    ) -> list[list[FileChunk]]:
+        budget = self.budget(prompt_content, output_sections)
+        windows: list[list[FileChunk]] = []
+        current: list[FileChunk] = []
+        used = 0
+        for file in files:
+            for chunk in self._split(file, budget):
+                cost = chunk.tokens + FILE_HEADER_TOKENS
+                if current and used + cost > budget:
+                    windows.append(current)
+                    current, used = [], 0
+                current.append(chunk)
+                used += cost
+        if current:
+            windows.append(current)
+        return windows
+
+    def _split(self, file: ValidationFile, budget: int) -> list[FileChunk]:
+        lines = file.content.splitlines(keepends=True)
+        total_lines = max(len(lines), 1)
+        tokens = self.estimate(file.content)
+        if tokens + FILE_HEADER_TOKENS <= budget:
+            return [FileChunk(file, file.content, 1, total_lines, total_lines, tokens)]
+
+        limit = budget - FILE_HEADER_TOKENS
+        chunks: list[FileChunk] = []
+        parts: list[str] = []
+        used = 0
+        start = 1
+        for number, line in enumerate(lines, start=1):
+            cost = self.estimate(line)
+            if parts and used + cost > limit:
+                chunks.append(
+                    FileChunk(
+                        file, "".join(parts), start, number - 1, total_lines, used
+                    )
+                )
+                parts, used, start = [], 0, number
+            if cost > limit:
+                # A single line longer than a window is cut where it must be.
+                for piece in self._cut_line(line, limit):
+                    chunks.append(
+                        FileChunk(
+                            file,
+                            piece,
+                            number,
+                            number,
+                            total_lines,
+                            self.estimate(piece),
+                        )
+                    )
+                start = number + 1
+                continue
+            parts.append(line)
+            used += cost
+        if parts:
+            chunks.append(
+                FileChunk(file, "".join(parts), start, len(lines), total_lines, used)
+            )
+        return chunks
+
+    def _cut_line(self, line: str, limit: int) -> list[str]:
+        # Characters take at most 4 UTF-8 bytes.
+        size = max(int(limit * self.bytes_per_token) // 4, 1)
+        return [line[i : i + size] for i in range(0, len(line), size)]
+
+
+_SEVERITY_RANK = {Severity.high: 3, Severity.medium: 2, Severity.low: 1}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str | None) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip().casefold()
+
+
+def _issue_key(issue: ValidationIssue) -> tuple[str, str, str]:
+    # The offending line identifies an issue better than the model's wording;
+    # fall back to the description for file-level findings.
+    location = _normalize(issue.content) or _normalize(issue.description)
+    return (issue.file, str(issue.type), location)
+
+
+def merge_issues(results: list[list[ValidationIssue]]) -> list[ValidationIssue]:
+    """Concatenate the issues of several windows, dropping duplicates.
+
+    Windows that saw parts of the same file often report the same problem;
+    the first report is kept, at the highest severity any window gave it.
+    """
+    merged: dict[tuple[str, str, str], ValidationIssue] = {}
+    for issues in results:
+        for issue in issues:
+            key = _issue_key(issue)
+            kept = merged.get(key)
+            if kept is None:
+                merged[key] = issue
+            elif (
+                _SEVERITY_RANK[Severity(issue.severity)]
+                > _SEVERITY_RANK[Severity(kept.severity)]
+            ):
+                merged[key] = kept.model_copy(update={"severity": issue.severity})
+    return list(merged.values())
@@ -1,13 +1,31 @@
+from collections import Counter
+from datetime import datetime
+
+from pydantic import TypeAdapter
 from pydantic import ValidationError as PydanticValidationError
 
-from models.database import ValidationBatchORM, ValidationFileORM
+from models.database import (
+    ValidationBatchORM,
+    ValidationFileORM,
+    ValidationPromptResultORM,
+)
 from schema import (
     ActiveBatchResponse,
+    PromptInfo,
+    Severity,
+    Status,
     ValidationBatchResponse,
     ValidationFile,
     ValidationFileId,
+    ValidationIssue,
     ValidationPromptResult,
 )
+from services.blob_store import decode_blob
+from services.utils import dumps_json
+
+# Compiled once; validating a whole list is one call into pydantic-core.
+_issues_adapter = TypeAdapter(list[ValidationIssue])
+_datetime_adapter = TypeAdapter(datetime)
 
 
 def batch_orm_to_schema(batch_orm: ValidationBatchORM) -> ValidationBatchResponse:
@@ -20,24 +38,156 @@ def batch_orm_to_schema(batch_orm: ValidationBatchORM) -> ValidationBatchRespons
             for file in batch_orm.files
         ],
         completed_prompts=batch_orm.completed_prompts,
-        prompt_results=[dict_to_prompt_result(pr) for pr in batch_orm.prompt_results],
+        prompt_results=[
+            prompt_result_orm_to_schema(pr) for pr in batch_orm.prompt_results
+        ],
         created_at=batch_orm.created_at,
         updated_at=batch_orm.updated_at,
+        version=batch_orm.version,
+    )
+
+
+def prompt_info_of(pr_orm: ValidationPromptResultORM) -> PromptInfo:
+    return PromptInfo(
+        name=pr_orm.prompt_name,
+        category=pr_orm.prompt_category,
+        description=pr_orm.prompt_description,
+        sha256=pr_orm.prompt_sha256,
     )
 
 
-def dict_to_prompt_result(d: dict) -> ValidationPromptResult:
+def prompt_result_orm_to_schema(
+    pr_orm: ValidationPromptResultORM,
+) -> ValidationPromptResult:
     try:
-        return ValidationPromptResult.model_validate(d)
+        return ValidationPromptResult(
+            prompt=prompt_info_of(pr_orm),
+            status=pr_orm.status,
+            error_message=pr_orm.error_message,
+            result=(
+                _issues_adapter.validate_python(pr_orm.result)
+                if pr_orm.result is not None
+                else None
+            ),
+            total_duration_ns=pr_orm.total_duration_ns,
+            eval_duration_ns=pr_orm.eval_duration_ns,
+            load_duration_ns=pr_orm.load_duration_ns,
+            prompt_eval_duration_ns=pr_orm.prompt_eval_duration_ns,
+            cached=pr_orm.cached,
+            fused=pr_orm.fused,
+        )
     except PydanticValidationError as e:
         raise ValueError(f"Invalid prompt result data: {e}") from e
 
 
+def issue_rollups(prompt_result: ValidationPromptResult) -> dict:
+    """Issue counts of a prompt result; zero until the prompt has completed."""
+    issues = (
+        prompt_result.result or [] if prompt_result.status == Status.completed else []
+    )
+    severities = Counter(issue.severity for issue in issues)
+    return {
+        **{f"{s.value}_issues": severities[s.value] for s in Severity},
+        "issue_type_counts": dict(Counter(issue.type for issue in issues)) or None,
+    }
+
+
+#########################################################
+# Trusted fast path
+#########################################################
+# Rows written by the backend itself already hold JSON-ready values (issues are
+# stored as ValidationIssue.model_dump()), so responses are built from them
+# directly instead of validating every issue into a model and dumping it
+# again. The output equals the model_dump(mode="json") of the schema models.
+def _json_time(value: datetime | None) -> str | None:
+    # formatted like pydantic does, e.g. "Z" for UTC
+    return _datetime_adapter.dump_python(value, mode="json") if value else None
+
+
+def prompt_result_orm_to_json(pr_orm: ValidationPromptResultORM) -> dict:
+    """``prompt_result_orm_to_schema(pr_orm).model_dump(mode="json")``, trusted."""
+    return {
+        "prompt": {
+            "name": pr_orm.prompt_name,
+            "category": pr_orm.prompt_category,
+            "description": pr_orm.prompt_description,
+            "sha256": pr_orm.prompt_sha256,
+            "has_all": pr_orm.prompt_name == "all",
+        },
+        "status": Status(pr_orm.status).value,
+        "error_message": pr_orm.error_message,
+        "result": pr_orm.result,
+        "total_duration_ns": pr_orm.total_duration_ns,
+        "eval_duration_ns": pr_orm.eval_duration_ns,
+        "load_duration_ns": pr_orm.load_duration_ns,
+        "prompt_eval_duration_ns": pr_orm.prompt_eval_duration_ns,
+        "cached": pr_orm.cached,
+        "fused": pr_orm.fused,
+    }
+
+
+def batch_orm_to_json(batch_orm: ValidationBatchORM) -> bytes:
+    """``batch_orm_to_schema(batch_orm).model_dump_json()``, trusted."""
+    return dumps_json(
+        {
+            "name": batch_orm.name,
+            "status": Status(batch_orm.status).value,
+            "file_ids": [
+                {"file_name": file.file_name, "id": file.id} for file in batch_orm.files
+            ],
+            "completed_prompts": batch_orm.completed_prompts,
+            "prompt_results": [
+                prompt_result_orm_to_json(pr) for pr in batch_orm.prompt_results
+            ],
+            "created_at": _json_time(batch_orm.created_at),
+            "updated_at": _json_time(batch_orm.updated_at),
+            "id": batch_orm.id,
+            "version": batch_orm.version,
+            "total_files": len(batch_orm.files),
+            "total_prompts": len(batch_orm.prompt_results),
+        }
+    )
+
+
+def prompt_result_values(prompt_result: ValidationPromptResult) -> dict:
+    """Column values of validation_prompt_results that change as a prompt runs."""
+    return {
+        "status": prompt_result.status,
+        "error_message": prompt_result.error_message,
+        "result": (
+            [issue.model_dump() for issue in prompt_result.result]
+            if prompt_result.result is not None
+            else None
+        ),
+        "total_duration_ns": prompt_result.total_duration_ns,
+        "eval_duration_ns": prompt_result.eval_duration_ns,
+        "load_duration_ns": prompt_result.load_duration_ns,
+        "prompt_eval_duration_ns": prompt_result.prompt_eval_duration_ns,
+        "cached": prompt_result.cached,
+        "fused": prompt_result.fused,
+        **issue_rollups(prompt_result),
+    }
+
+
+def prompt_result_to_orm(
+    prompt_index: int, prompt_result: ValidationPromptResult
+) -> ValidationPromptResultORM:
+    prompt = prompt_result.prompt
+    return ValidationPromptResultORM(
+        prompt_index=prompt_index,
+        prompt_name=prompt.name,
+        prompt_category=prompt.category,
+        prompt_description=prompt.description,
+        prompt_sha256=prompt.sha256,
+        **prompt_result_values(prompt_result),
+    )
+
+
 def file_orm_to_schema(file_orm: ValidationFileORM) -> ValidationFile:
     return ValidationFile(
         id=file_orm.id,
         file_name=file_orm.file_name,
-        content=file_orm.content,
+        content=decode_blob(file_orm.blob),
         file_type=file_orm.file_type,
         sha256=file_orm.sha256,
         created_at=file_orm.created_at,
@@ -55,9 +205,7 @@ def batch_orm_to_active_response(
             ValidationFileId(id=file.id, file_name=file.file_name)
             for file in batch_orm.files
         ],
-        selected_prompts=[
-            dict_to_prompt_result(pr).prompt for pr in batch_orm.prompt_results
-        ],
+        selected_prompts=[prompt_info_of(pr) for pr in batch_orm.prompt_results],
         completed_prompts=batch_orm.completed_prompts,
         created_at=batch_orm.created_at,
     )
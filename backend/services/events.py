@@ -0,0 +1,96 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class BatchEvent:
+    """A prompt- or batch-level state change, numbered per batch."""
+
+    id: int
+    batch_id: int
+    event: str
+    data: dict[str, Any]
+
+
+@dataclass(eq=False)
+class Subscription:
+    batch_id: int
+    queue: asyncio.Queue[BatchEvent] = field(default_factory=asyncio.Queue)
+
+
+class BatchEventBroker:
+    """In-process pub/sub of batch progress.
+
+    The last ``history_size`` events of the ``max_batches`` most recently
+    active batches are kept so that a client reconnecting with Last-Event-ID
+    can be sent only what it missed.
+    """
+
+    def __init__(self, history_size: int | None = None, max_batches: int | None = None):
+        self.history_size = history_size or int(
+            os.getenv("BATCH_EVENT_HISTORY_SIZE", "256")
+        )
+        self.max_batches = max_batches or int(
+            os.getenv("BATCH_EVENT_MAX_BATCHES", "1024")
+        )
+        self._history: OrderedDict[int, deque[BatchEvent]] = OrderedDict()
+        self._last_id: dict[int, int] = {}
+        self._subscribers: dict[int, set[Subscription]] = {}
+
+    def publish(self, batch_id: int, event: str, data: dict[str, Any]) -> BatchEvent:
+        event_id = self._last_id.get(batch_id, 0) + 1
+        self._last_id[batch_id] = event_id
+        batch_event = BatchEvent(id=event_id, batch_id=batch_id, event=event, data=data)
+
+        history = self._history.get(batch_id)
+        if history is None:
+            history = deque(maxlen=self.history_size)
+            self._history[batch_id] = history
+        self._history.move_to_end(batch_id)
+        history.append(batch_event)
+        while len(self._history) > self.max_batches:
+            dropped, _ = self._history.popitem(last=False)
+            if dropped not in self._subscribers:
+                self._last_id.pop(dropped, None)
+
+        for sub in self._subscribers.get(batch_id, ()):
+            sub.queue.put_nowait(batch_event)
+        return batch_event
+
+    def last_id(self, batch_id: int) -> int:
+        return self._last_id.get(batch_id, 0)
+
+    def replay(self, batch_id: int, after_id: int) -> list[BatchEvent] | None:
+        """Events newer than ``after_id``, or None if some were already dropped."""
+        last_id = self.last_id(batch_id)
+        if after_id > last_id:
+            # The id belongs to an earlier incarnation of this process.
+            return None
+        if after_id == last_id:
+            return []
+        history = self._history.get(batch_id)
+        if not history or history[0].id > after_id + 1:
+            return None
+        return [e for e in history if e.id > after_id]
+
+    def subscribe(self, batch_id: int) -> Subscription:
+        sub = Subscription(batch_id=batch_id)
+        self._subscribers.setdefault(batch_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.batch_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subscribers[sub.batch_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+
+batch_events = BatchEventBroker()
@@ -0,0 +1,435 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models.database import SessionLocal, ValidationJobORM
+from schema import JobStatus
+
+if TYPE_CHECKING:
+    from services.validation_service import ValidationService
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+class JobQueue:
+    """Database-backed queue of (batch, prompt_index) validation jobs.
+
+    A job is claimed by taking a time-limited lease on its row. Holders renew
+    the lease with heartbeats; a lease that is not renewed expires and the job
+    becomes claimable again, until ``max_attempts`` claims have been used up.
+    """
+
+    def __init__(
+        self,
+        lease_seconds: int | None = None,
+        max_attempts: int | None = None,
+        worker_id: str | None = None,
+    ):
+        self.lease_seconds = lease_seconds or int(os.getenv("JOB_LEASE_SECONDS", "120"))
+        self.max_attempts = max_attempts or int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+    async def enqueue(
+        self,
+        batch_id: int,
+        prompt_indices: list[int],
+        db: AsyncSession,
+        group_size: int = 1,
+    ) -> list[ValidationJobORM]:
+        """Queue the prompts of a batch.
+
+        With ``group_size`` > 1 consecutive prompts are put into fused jobs of
+        up to that many prompts, which are generated in a single request.
+        """
+        size = max(group_size, 1)
+        groups = [
+            prompt_indices[i : i + size] for i in range(0, len(prompt_indices), size)
+        ]
+        jobs = [
+            ValidationJobORM(
+                batch_id=batch_id,
+                prompt_index=group[0],
+                prompt_indices=group if len(group) > 1 else None,
+                status=JobStatus.queued,
+                attempts=0,
+                max_attempts=self.max_attempts,
+            )
+            for group in groups
+        ]
+        db.add_all(jobs)
+        await db.commit()
+        return jobs
+
+    def _claimable(self, now: datetime):
+        return and_(
+            ValidationJobORM.attempts < ValidationJobORM.max_attempts,
+            or_(
+                ValidationJobORM.status == JobStatus.queued,
+                and_(
+                    ValidationJobORM.status == JobStatus.leased,
+                    ValidationJobORM.lease_expires_at < now,
+                ),
+            ),
+        )
+
+    async def claim(self, db: AsyncSession) -> ValidationJobORM | None:
+        """Lease the oldest claimable job, or return None if there is none.
+
+        The lease is taken with a conditional UPDATE so that two workers racing
+        for the same row cannot both win it.
+        """
+        while True:
+            now = _now()
+            candidate_id = (
+                await db.execute(
+                    select(ValidationJobORM.id)
+                    .where(self._claimable(now))
+                    .order_by(ValidationJobORM.id)
+                    .limit(1)
+                )
+            ).scalar_one_or_none()
+            if candidate_id is None:
+                return None
+
+            result = await db.execute(
+                update(ValidationJobORM)
+                .where(ValidationJobORM.id == candidate_id, self._claimable(now))
+                .values(
+                    status=JobStatus.leased,
+                    lease_owner=self.worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    heartbeat_at=now,
+                    attempts=ValidationJobORM.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if result.rowcount == 1:
+                return await db.get(
+                    ValidationJobORM, candidate_id, populate_existing=True
+                )
+            # lost the race for this row, try the next one
+
+    async def heartbeat(self, job_id: int, db: AsyncSession) -> bool:
+        """Extend the lease. Returns False if this worker no longer holds it."""
+        now = _now()
+        result = await db.execute(
+            update(ValidationJobORM)
+            .where(
+                ValidationJobORM.id == job_id,
+                ValidationJobORM.status == JobStatus.leased,
+                ValidationJobORM.lease_owner == self.worker_id,
+            )
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    async def complete(self, job_id: int, db: AsyncSession) -> None:
+        await db.execute(
+            update(ValidationJobORM)
+            .where(
+                ValidationJobORM.id == job_id,
+                ValidationJobORM.status != JobStatus.cancelled,
+            )
+            .values(status=JobStatus.done, lease_owner=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def fail(self, job_id: int, error: str, db: AsyncSession) -> bool:
+        """Release a job after an error.
+
+        Returns True if the job was put back in the queue, False if it has used
+        up its attempts and is now permanently failed.
+        """
+        job: ValidationJobORM | None = await db.get(
+            ValidationJobORM, job_id, populate_existing=True
+        )
+        if job is None or job.status == JobStatus.cancelled:
+            return False
+
+        job.last_error = error
+        job.lease_owner = None
+        job.lease_expires_at = None
+        requeued = job.attempts < job.max_attempts
+        job.status = JobStatus.queued if requeued else JobStatus.failed
+        await db.commit()
+        return requeued
+
+    async def cancel(
+        self,
+        batch_id: int,
+        prompt_indices: list[int],
+        finished: set[int],
+        db: AsyncSession,
+    ) -> list[int]:
+        """Withdraw the unfinished jobs of a batch that run one of
+        ``prompt_indices``, once all of their prompts are in ``finished``,
+        whether queued or leased. Returns their ids.
+
+        A leased job keeps running until its holder notices, see
+        ``JobWorker.cancel``.
+        """
+        jobs = (
+            await db.scalars(
+                select(ValidationJobORM)
+                .where(
+                    ValidationJobORM.batch_id == batch_id,
+                    ValidationJobORM.status.in_((JobStatus.queued, JobStatus.leased)),
+                )
+                .execution_options(populate_existing=True)
+            )
+        ).all()
+        cancelled = [
+            job
+            for job in jobs
+            if set(job.indices) <= finished
+            and not set(job.indices).isdisjoint(prompt_indices)
+        ]
+        if not cancelled:
+            return []
+        # conditional, so a job finishing meanwhile stays done
+        result = await db.execute(
+            update(ValidationJobORM)
+            .where(
+                ValidationJobORM.id.in_([job.id for job in cancelled]),
+                ValidationJobORM.status.in_((JobStatus.queued, JobStatus.leased)),
+            )
+            .values(
+                status=JobStatus.cancelled,
+                last_error="Cancelled",
+                lease_expires_at=None,
+            )
+            .returning(ValidationJobORM.id)
+            .execution_options(synchronize_session=False)
+        )
+        job_ids = list(result.scalars())
+        await db.commit()
+        return job_ids
+
+    async def is_cancelled(self, job_id: int, db: AsyncSession) -> bool:
+        return (
+            await db.scalar(
+                select(ValidationJobORM.status).where(ValidationJobORM.id == job_id)
+            )
+        ) == JobStatus.cancelled
+
+    async def reclaim_expired(self, db: AsyncSession) -> list[ValidationJobORM]:
+        """Return expired leases to the queue.
+
+        Jobs that have no attempts left are marked failed and returned so the
+        caller can record the failure on the batch.
+        """
+        now = _now()
+        expired = (
+            await db.scalars(
+                select(ValidationJobORM)
+                .where(
+                    ValidationJobORM.status == JobStatus.leased,
+                    ValidationJobORM.lease_expires_at < now,
+                )
+                .execution_options(populate_existing=True)
+            )
+        ).all()
+
+        exhausted: list[ValidationJobORM] = []
+        for job in expired:
+            job.lease_owner = None
+            job.lease_expires_at = None
+            if job.attempts < job.max_attempts:
+                job.status = JobStatus.queued
+                job.last_error = "Lease expired"
+            else:
+                job.status = JobStatus.failed
+                job.last_error = (
+                    f"Lease expired after {job.attempts} attempt(s), giving up"
+                )
+                exhausted.append(job)
+        await db.commit()
+        return exhausted
+
+
+class JobWorker:
+    """Claims jobs from a JobQueue and runs them in this process.
+
+    ``concurrency`` only bounds how many jobs this process holds leases on;
+    how many of them actually talk to Ollama at once is decided per host by
+    OllamaScheduler.
+    """
+
+    def __init__(
+        self,
+        validation_service: "ValidationService",
+        queue: JobQueue,
+        concurrency: int | None = None,
+        poll_interval: float | None = None,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+    ):
+        self.validation_service = validation_service
+        self.queue = queue
+        # Jobs outlive the request that queued them, so they never share its
+        # session; each job opens its own.
+        self.session_factory = session_factory
+        self.concurrency = concurrency or int(
+            os.getenv("VALIDATION_WORKER_CONCURRENCY", "32")
+        )
+        self.poll_interval = poll_interval or float(
+            os.getenv("JOB_POLL_INTERVAL_SECONDS", "2")
+        )
+        self._wakeup = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._jobs: dict[int, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        """Recover jobs left behind by a previous process and start claiming."""
+        async with self.session_factory() as db:
+            await self._fail_exhausted(await self.queue.reclaim_expired(db), db)
+        self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop claiming and cancel in-flight jobs.
+
+        Their leases are left to expire so another worker (or this one after a
+        restart) picks them up again.
+        """
+        tasks = [t for t in (self._loop_task, *self._running) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+
+    def notify(self) -> None:
+        """Wake the claim loop, e.g. right after enqueueing new jobs."""
+        self._wakeup.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    await self._fail_exhausted(await self.queue.reclaim_expired(db), db)
+                    while len(self._running) < self.concurrency:
+                        job = await self.queue.claim(db)
+                        if job is None:
+                            break
+                        self._spawn(job)
+            except Exception as e:
+                # TODO NEED LOGGING
+                print(f"Error while claiming validation jobs: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+
+    def _spawn(self, job: ValidationJobORM) -> asyncio.Task:
+        task = asyncio.create_task(self._run(job.id, job.batch_id, job.indices))
+        self._running.add(task)
+        self._jobs[job.id] = task
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        for job_id, job_task in list(self._jobs.items()):
+            if job_task is task:
+                del self._jobs[job_id]
+        # a slot has been freed
+        self._wakeup.set()
+
+    async def cancel(
+        self, batch_id: int, prompt_index: int | None, db: AsyncSession
+    ) -> tuple[list[int], int]:
+        """Cancel a batch, or one of its prompts, including the work in flight.
+
+        The prompts are recorded as cancelled first, so a job claimed or
+        finishing meanwhile has nothing left to write. Jobs left without
+        unfinished prompts are then withdrawn from the queue, and those running
+        in this process are cancelled, which aborts their Ollama requests and
+        frees their slots right away. Workers of other processes notice at
+        their next heartbeat.
+
+        Returns the cancelled prompt indices and the number of jobs aborted
+        here. A fused job is only aborted once all of its prompts are cancelled.
+        """
+        cancelled = await self.validation_service.cancel(batch_id, prompt_index, db)
+        if not cancelled:
+            return [], 0
+        finished = await self.validation_service.finished_prompts(batch_id, db)
+        job_ids = await self.queue.cancel(batch_id, cancelled, finished, db)
+
+        tasks = [
+            task
+            for job_id in job_ids
+            if (task := self._jobs.get(job_id)) is not None and not task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            # not gathered: cancelling this request must not touch the jobs
+            await asyncio.wait(tasks, timeout=5)
+        return cancelled, len(tasks)
+
+    async def _heartbeat(self, job_id: int, run: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            async with self.session_factory() as db:
+                if not await self.queue.heartbeat(job_id, db):
+                    if await self.queue.is_cancelled(job_id, db):
+                        # TODO NEED LOGGING
+                        print(f"Validation job {job_id} was cancelled")
+                    else:
+                        # TODO NEED LOGGING
+                        print(f"Lost lease on validation job {job_id}")
+                    # Another worker may already have reclaimed the job;
+                    # running on would send its prompts to Ollama twice.
+                    run.cancel()
+                    return
+
+    async def _run(self, job_id: int, batch_id: int, prompt_indices: list[int]) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, asyncio.current_task()))
+        try:
+            async with self.session_factory() as db:
+                try:
+                    await self.validation_service.process_job(
+                        batch_id, prompt_indices, db
+                    )
+                except Exception as e:
+                    await db.rollback()
+                    # TODO NEED LOGGING
+                    print(f"Validation job {job_id} failed: {e}")
+                    if not await self.queue.fail(job_id, str(e), db):
+                        for prompt_index in prompt_indices:
+                            await self.validation_service.fail_prompt(
+                                batch_id, prompt_index, str(e), db
+                            )
+                    self._wakeup.set()
+                else:
+                    await self.queue.complete(job_id, db)
+        finally:
+            heartbeat.cancel()
+
+    async def _fail_exhausted(
+        self, jobs: list[ValidationJobORM], db: AsyncSession
+    ) -> None:
+        for job in jobs:
+            for prompt_index in job.indices:
+                await self.validation_service.fail_prompt(
+                    job.batch_id, prompt_index, job.last_error or "Job failed", db
+                )
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from ollama import Options
+
+from schema import ModelWarmState
+from services.ollama_pool import OllamaHost, OllamaHostPool
+
+
+@dataclass
+class _HostWarmth:
+    warm: bool | None = None
+    loading: bool = False
+    context_length: int | None = None
+    expires_at: datetime | None = None
+    last_warmed_at: datetime | None = None
+    last_load_duration_ns: int | None = None
+    last_error: str | None = None
+
+
+class ModelKeepAlive:
+    """Keep the model loaded on every host while the backend is busy.
+
+    Every request and warm-up asks Ollama to keep the model for the rest of
+    the idle window. While requests keep coming, each host's loaded models
+    are checked every ``interval`` seconds and the model is loaded again if
+    it was evicted or is about to expire. Once the backend has been idle for
+    ``idle_seconds`` nothing more is sent and Ollama unloads the model.
+    """
+
+    def __init__(
+        self,
+        pool: OllamaHostPool,
+        model: str,
+        options: Callable[[], Options],
+        idle_seconds: float | None = None,
+        interval: float | None = None,
+        warmup: bool | None = None,
+    ):
+        self.pool = pool
+        self.model = model
+        self.options = options
+        self.idle_seconds = (
+            idle_seconds
+            if idle_seconds is not None
+            else float(os.getenv("OLLAMA_KEEP_WARM_SECONDS", "900"))
+        )
+        self.interval = interval or float(
+            os.getenv("OLLAMA_KEEPALIVE_INTERVAL_SECONDS", "60")
+        )
+        self.warmup = (
+            warmup
+            if warmup is not None
+            else os.getenv("OLLAMA_WARMUP", "true").lower()
+            in ("1", "true", "yes", "on")
+        )
+        self._last_activity: float | None = None
+        self._state: dict[str, _HostWarmth] = {h.url: _HostWarmth() for h in pool.hosts}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_seconds > 0
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        if self.warmup:
+            # Startup counts as activity so the model is preloaded before
+            # the first batch arrives.
+            self.touch()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def touch(self) -> None:
+        """Record that a request is being sent."""
+        self._last_activity = time.monotonic()
+
+    def active(self) -> bool:
+        return (
+            self._last_activity is not None
+            and time.monotonic() - self._last_activity < self.idle_seconds
+        )
+
+    def keep_alive(self) -> int | None:
+        """Seconds Ollama should keep the model after the current request.
+
+        None leaves it to the server's default (OLLAMA_KEEP_ALIVE).
+        """
+        if not self.enabled:
+            return None
+        if self._last_activity is None:
+            return 0
+        remaining = self._last_activity + self.idle_seconds - time.monotonic()
+        return max(int(remaining), 0)
+
+    async def _loop(self) -> None:
+        while True:
+            await self.refresh_all()
+            await asyncio.sleep(self.interval)
+
+    async def refresh_all(self) -> None:
+        await asyncio.gather(*(self.refresh(host) for host in self.pool.hosts))
+
+    async def refresh(self, host: OllamaHost) -> None:
+        state = self._state[host.url]
+        if not host.healthy:
+            state.warm = None
+            return
+        await self._check_loaded(host, state)
+        if not self.active() or state.loading:
+            return
+        # Reload if evicted, or if it would expire before the next check.
+        expires_soon = (
+            state.expires_at is not None
+            and (state.expires_at - datetime.now(UTC)).total_seconds()
+            < 2 * self.interval
+            and self.keep_alive() > 2 * self.interval
+        )
+        if not state.warm or expires_soon:
+            await self._load(host, state)
+
+    async def _check_loaded(self, host: OllamaHost, state: _HostWarmth) -> None:
+        try:
+            running = await host.client.ps()
+        except Exception as e:
+            state.warm = None
+            state.last_error = f"Failed to list loaded models: {e}"
+            return
+        wanted = self.model if ":" in self.model else f"{self.model}:latest"
+        loaded = next(
+            (m for m in running.models if m.model in (self.model, wanted)), None
+        )
+        num_ctx = self.options().num_ctx
+        state.context_length = loaded.context_length if loaded else None
+        state.expires_at = loaded.expires_at if loaded else None
+        if state.expires_at is not None and state.expires_at.tzinfo is None:
+            state.expires_at = state.expires_at.replace(tzinfo=UTC)
+        # A model loaded with another context size is reloaded by the next
+        # request, so it does not count as warm.
+        state.warm = loaded is not None and (
+            num_ctx is None
+            or loaded.context_length is None
+            or loaded.context_length == num_ctx
+        )
+
+    async def _load(self, host: OllamaHost, state: _HostWarmth) -> None:
+        state.loading = True
+        try:
+            # An empty prompt loads the model without generating anything.
+            response = await host.client.generate(
+                model=self.model,
+                prompt="",
+                options=self.options(),
+                keep_alive=self.keep_alive(),
+            )
+        except Exception as e:
+            print(f"Failed to warm up {self.model} on {host.url}: {e}")
+            # TODO NEED LOGGING
+            state.last_error = f"Warm-up failed: {e}"
+            return
+        finally:
+            state.loading = False
+        state.warm = True
+        state.last_error = None
+        state.last_warmed_at = datetime.now(UTC)
+        state.last_load_duration_ns = response.load_duration
+        print(
+            f"Warmed up {self.model} on {host.url} (load {response.load_duration} ns)"
+        )
+
+    def status(self) -> list[ModelWarmState]:
+        active = self.active()
+        states = []
+        for host in self.pool.hosts:
+            state = self._state[host.url]
+            states.append(
+                ModelWarmState(
+                    host=host.url,
+                    model=self.model,
+                    active=active,
+                    warm=state.warm,
+                    loading=state.loading,
+                    context_length=state.context_length,
+                    expires_at=state.expires_at,
+                    last_warmed_at=state.last_warmed_at,
+                    last_load_duration_ns=state.last_load_duration_ns,
+                    last_error=state.last_error,
+                )
+            )
+        return states
@@ -0,0 +1,388 @@
+import base64
+import binascii
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, desc, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import (
+    BatchIssueTypeORM,
+    ValidationBatchORM,
+    ValidationFileORM,
+    ValidationPromptResultORM,
+)
+from schema import (
+    LogSort,
+    Severity,
+    SeverityCounts,
+    Status,
+    ValidationBatchDelta,
+    ValidationBatchSummary,
+    ValidationFileId,
+    ValidationPromptResultChange,
+)
+from services.converter import batch_orm_to_json, prompt_result_orm_to_schema
+from services.search_index import search_index
+from services.snapshot_cache import batch_snapshots
+
+
+@dataclass
+class LogFilter:
+    """Conditions a listed batch has to meet; None means any."""
+
+    search: str | None = None
+    severity: Severity | None = None  # has at least one issue of this severity
+    issue_type: str | None = None  # has at least one issue of this type
+    failed: bool | None = None  # has (or has no) failed prompts
+    statuses: list[Status] | None = None
+    created_from: datetime | None = None  # date ranges include both ends
+    created_to: datetime | None = None
+    updated_from: datetime | None = None
+    updated_to: datetime | None = None
+    model: str | None = None
+    prompt_category: str | None = None  # has a prompt of this category/name
+    prompt_name: str | None = None
+
+
+def _stored_time(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC (CURRENT_TIMESTAMP).
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+class LogService:
+    """Queries behind the /logs listing.
+
+    A page is built from a fixed number of column-only queries over the
+    batches' rollup columns, so the cost of a page depends on its size rather
+    than on how many batches and issues are stored. Full results are left to
+    the detail endpoint.
+
+    Batches are ordered by (created_at, id), newest first, which is covered
+    by ix_validation_batches_created_at_id, or by one of the rollup columns
+    (largest first) or updated_at and then newest first, each with an index of
+    its own. Status and model filters have indexes that keep the newest-first
+    order, and the prompt filter looks batches up by prompt.
+    Besides offsets, a page can start after a cursor; cursor pages cost the
+    same however deep they are.
+
+    A search goes through the full-text index when it can, and its offset
+    pages are ordered by relevance instead; cursor pages of a search keep
+    the newest-first order.
+    """
+
+    NEWEST_FIRST = (desc(ValidationBatchORM.created_at), desc(ValidationBatchORM.id))
+    SORT_COLUMNS = {
+        LogSort.high_issues: ValidationBatchORM.high_issues,
+        LogSort.medium_issues: ValidationBatchORM.medium_issues,
+        LogSort.low_issues: ValidationBatchORM.low_issues,
+        LogSort.total_issues: ValidationBatchORM.total_issues,
+        LogSort.failed_prompts: ValidationBatchORM.failed_prompts,
+        LogSort.total_duration: ValidationBatchORM.total_duration_ns,
+        LogSort.updated: ValidationBatchORM.updated_at,
+    }
+
+    @staticmethod
+    def encode_cursor(batch_id: int) -> str:
+        return base64.urlsafe_b64encode(f"b:{batch_id}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """Raises ValueError for a cursor this service did not issue."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            prefix, _, batch_id = raw.decode().partition(":")
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if prefix != "b" or not batch_id.isdigit():
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return int(batch_id)
+
+    def _order_columns(self, sort: LogSort | None) -> list:
+        """Columns of the listing order, each descending."""
+        columns = [ValidationBatchORM.created_at, ValidationBatchORM.id]
+        if sort in self.SORT_COLUMNS:
+            columns.insert(0, self.SORT_COLUMNS[sort])
+        return columns
+
+    def _after(self, batch_id: int, sort: LogSort | None = None):
+        # The cursor batch's values are read in SQL, so they are compared in
+        # their stored form.
+        columns = self._order_columns(sort)
+        values = [
+            select(column).where(ValidationBatchORM.id == batch_id).scalar_subquery()
+            for column in columns[:-1]
+        ] + [batch_id]
+        return or_(
+            *(
+                and_(
+                    *(
+                        column == value
+                        for column, value in zip(columns[:i], values[:i], strict=True)
+                    ),
+                    columns[i] < values[i],
+                )
+                for i in range(len(columns))
+            )
+        )
+
+    async def _filters(self, log_filter: LogFilter, db: AsyncSession) -> list:
+        search = log_filter.search
+        if not search:
+            return self._column_filters(log_filter)
+        if await search_index.usable(search, db):
+            matches = search_index.matches(search).subquery()
+            search_filter = ValidationBatchORM.id.in_(select(matches.c.batch_id))
+        else:
+            # EXISTS rather than a join, so a batch matching in several
+            # files is listed once
+            search_filter = ValidationBatchORM.files.any(
+                ValidationFileORM.file_name.contains(search)
+            )
+        return [search_filter, *self._column_filters(log_filter)]
+
+    def _column_filters(self, log_filter: LogFilter) -> list:
+        batch = ValidationBatchORM
+        filters = []
+        if log_filter.statuses:
+            filters.append(batch.status.in_(log_filter.statuses))
+        if log_filter.model is not None:
+            filters.append(batch.model == log_filter.model)
+        for column, low, high in (
+            (batch.created_at, log_filter.created_from, log_filter.created_to),
+            (batch.updated_at, log_filter.updated_from, log_filter.updated_to),
+        ):
+            if low is not None:
+                # ">" a microsecond earlier: SQLite compares the stored text,
+                # and CURRENT_TIMESTAMP has no fraction ("12:00:00" would
+                # sort before a bound of "12:00:00.000000")
+                filters.append(column > _stored_time(low) - timedelta(microseconds=1))
+            if high is not None:
+                filters.append(column <= _stored_time(high))
+        prompt = ValidationPromptResultORM
+        prompt_conditions = [
+            column == value
+            for column, value in (
+                (prompt.prompt_category, log_filter.prompt_category),
+                (prompt.prompt_name, log_filter.prompt_name),
+            )
+            if value is not None
+        ]
+        if prompt_conditions:
+            # IN rather than a correlated EXISTS, so the batches are looked up
+            # on ix_validation_prompt_results_prompt alone
+            filters.append(
+                batch.id.in_(select(prompt.batch_id).where(*prompt_conditions))
+            )
+        if log_filter.severity is not None:
+            severity = Severity(log_filter.severity).value
+            filters.append(getattr(ValidationBatchORM, f"{severity}_issues") > 0)
+        if log_filter.issue_type is not None:
+            filters.append(
+                batch.issue_types.any(BatchIssueTypeORM.type == log_filter.issue_type)
+            )
+        if log_filter.failed is not None:
+            filters.append(
+                batch.failed_prompts > 0
+                if log_filter.failed
+                else batch.failed_prompts == 0
+            )
+        return filters
+
+    async def ranked(
+        self, log_filter: LogFilter, db: AsyncSession, sort: LogSort | None = None
+    ) -> bool:
+        """Whether offset pages are ordered by relevance (no explicit sort)."""
+        return sort is None and await search_index.usable(log_filter.search, db)
+
+    async def count_batches(self, log_filter: LogFilter, db: AsyncSession) -> int:
+        return (
+            await db.execute(
+                select(func.count(ValidationBatchORM.id)).where(
+                    *await self._filters(log_filter, db)
+                )
+            )
+        ).scalar_one()
+
+    async def list_batches(
+        self,
+        log_filter: LogFilter,
+        limit: int,
+        db: AsyncSession,
+        offset: int = 0,
+        after: int | None = None,
+        sort: LogSort | None = None,
+    ) -> list[ValidationBatchSummary]:
+        """Batches in ``sort`` order, by default newest (or best matching) first.
+
+        Skips ``offset`` rows, or starts after batch ``after``.
+        """
+        order = [desc(column) for column in self._order_columns(sort)]
+        if after is None and await self.ranked(log_filter, db, sort):
+            matches = search_index.matches(log_filter.search).subquery()
+            page = (
+                select(ValidationBatchORM.id, matches.c.rank)
+                .join(matches, matches.c.batch_id == ValidationBatchORM.id)
+                .where(*self._column_filters(log_filter))
+                .order_by(matches.c.rank, *order)
+            )
+        else:
+            filters = await self._filters(log_filter, db)
+            if after is not None:
+                filters.append(self._after(after, sort))
+            page = (
+                select(ValidationBatchORM.id, literal(0).label("rank"))
+                .where(*filters)
+                .order_by(*order)
+            )
+        # Offsets are walked on the index alone; only the page's rows are read.
+        page_ids = page.offset(offset).limit(limit).subquery()
+        batch_rows = (
+            await db.execute(
+                select(
+                    ValidationBatchORM.id,
+                    ValidationBatchORM.name,
+                    ValidationBatchORM.status,
+                    ValidationBatchORM.model,
+                    ValidationBatchORM.completed_prompts,
+                    ValidationBatchORM.total_prompts,
+                    ValidationBatchORM.failed_prompts,
+                    ValidationBatchORM.high_issues,
+                    ValidationBatchORM.medium_issues,
+                    ValidationBatchORM.low_issues,
+                    ValidationBatchORM.total_issues,
+                    ValidationBatchORM.total_duration_ns,
+                    ValidationBatchORM.created_at,
+                    ValidationBatchORM.updated_at,
+                )
+                .join(page_ids, ValidationBatchORM.id == page_ids.c.id)
+                .order_by(page_ids.c.rank, *order)
+            )
+        ).all()
+        if not batch_rows:
+            return []
+        batch_ids = [row.id for row in batch_rows]
+
+        file_ids: dict[int, list[ValidationFileId]] = defaultdict(list)
+        file_rows = await db.execute(
+            select(
+                ValidationFileORM.batch_id,
+                ValidationFileORM.id,
+                ValidationFileORM.file_name,
+            )
+            .where(ValidationFileORM.batch_id.in_(batch_ids))
+            .order_by(ValidationFileORM.id)
+        )
+        for row in file_rows:
+            file_ids[row.batch_id].append(
+                ValidationFileId(id=row.id, file_name=row.file_name)
+            )
+
+        issue_type_counts: dict[int, dict[str, int]] = defaultdict(dict)
+        type_rows = await db.execute(
+            select(
+                BatchIssueTypeORM.batch_id,
+                BatchIssueTypeORM.type,
+                BatchIssueTypeORM.count,
+            ).where(BatchIssueTypeORM.batch_id.in_(batch_ids))
+        )
+        for row in type_rows:
+            issue_type_counts[row.batch_id][row.type] = row.count
+
+        return [
+            ValidationBatchSummary(
+                id=row.id,
+                name=row.name,
+                status=row.status,
+                model=row.model,
+                file_ids=file_ids[row.id],
+                completed_prompts=row.completed_prompts,
+                total_prompts=row.total_prompts,
+                failed_prompts=row.failed_prompts,
+                severity_counts=SeverityCounts(
+                    high=row.high_issues,
+                    medium=row.medium_issues,
+                    low=row.low_issues,
+                ),
+                total_issues=row.total_issues,
+                issue_type_counts=issue_type_counts[row.id],
+                total_duration_ns=row.total_duration_ns,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in batch_rows
+        ]
+
+    async def batch_version(self, batch_id: int, db: AsyncSession) -> int | None:
+        """The batch's version, or None if there is no such batch."""
+        return (
+            await db.execute(
+                select(ValidationBatchORM.version).where(
+                    ValidationBatchORM.id == batch_id
+                )
+            )
+        ).scalar_one_or_none()
+
+    async def batch_snapshot(
+        self, batch_id: int, version: int, db: AsyncSession
+    ) -> tuple[int, bytes] | None:
+        """The serialized detail of a batch and the version it shows.
+
+        Served from the snapshot cache while the batch is at ``version``.
+        """
+        body = batch_snapshots.get(batch_id, version)
+        if body is not None:
+            return version, body
+        batch_orm = await db.get(ValidationBatchORM, batch_id, populate_existing=True)
+        if batch_orm is None:
+            return None
+        # the batch may have been written since its version was read
+        body = batch_orm_to_json(batch_orm)
+        batch_snapshots.put(batch_id, batch_orm.version, body)
+        return batch_orm.version, body
+
+    async def batch_delta(
+        self, batch_id: int, since_version: int, db: AsyncSession
+    ) -> ValidationBatchDelta | None:
+        """The batch's state and the prompt results written after ``since_version``."""
+        batch_row = (
+            await db.execute(
+                select(
+                    ValidationBatchORM.id,
+                    ValidationBatchORM.version,
+                    ValidationBatchORM.status,
+                    ValidationBatchORM.completed_prompts,
+                    ValidationBatchORM.updated_at,
+                ).where(ValidationBatchORM.id == batch_id)
+            )
+        ).one_or_none()
+        if batch_row is None:
+            return None
+        # Read after the batch, so a prompt written in between is sent (again)
+        # rather than missed.
+        changed = await db.scalars(
+            select(ValidationPromptResultORM)
+            .where(
+                ValidationPromptResultORM.batch_id == batch_id,
+                ValidationPromptResultORM.version > since_version,
+            )
+            .order_by(ValidationPromptResultORM.prompt_index)
+        )
+        return ValidationBatchDelta(
+            id=batch_row.id,
+            version=batch_row.version,
+            since_version=since_version,
+            status=batch_row.status,
+            completed_prompts=batch_row.completed_prompts,
+            updated_at=batch_row.updated_at,
+            prompt_results=[
+                ValidationPromptResultChange(
+                    prompt_index=pr.prompt_index,
+                    prompt_result=prompt_result_orm_to_schema(pr),
+                )
+                for pr in changed
+            ],
+        )
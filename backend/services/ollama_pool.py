@@ -0,0 +1,202 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+import httpx
+from ollama import AsyncClient, ResponseError
+
+from schema import OllamaHostStatus
+from services.scheduler import OllamaScheduler
+
+
+def parse_hosts(value: str | None) -> list[str]:
+    """Split a comma separated OLLAMA_HOSTS value into host URLs."""
+    return [h.strip() for h in (value or "").split(",") if h.strip()]
+
+
+def _base_url(host: str) -> str:
+    return host if "://" in host else f"http://{host}"
+
+
+def is_failover_error(e: Exception) -> bool:
+    """Whether an error from a host means another host should be tried."""
+    if isinstance(e, ConnectionError | TimeoutError | httpx.TransportError):
+        return True
+    if isinstance(e, ResponseError):
+        # 404: the model is not present on this node
+        return e.status_code == 404 or e.status_code >= 500
+    return False
+
+
+def is_transient_error(e: Exception) -> bool:
+    """Whether the same call may succeed when tried again a little later."""
+    if isinstance(e, ConnectionError | TimeoutError | httpx.TransportError):
+        return True
+    if isinstance(e, ResponseError):
+        return e.status_code == 429 or e.status_code >= 500
+    return False
+
+
+def client_timeout() -> httpx.Timeout:
+    """Timeouts of the generate clients.
+
+    The read timeout bounds the time between two received chunks; without
+    streaming the whole answer is one chunk, so it must cover a generation.
+    """
+    return httpx.Timeout(
+        float(os.getenv("OLLAMA_READ_TIMEOUT_SECONDS", "600")),
+        connect=float(os.getenv("OLLAMA_CONNECT_TIMEOUT_SECONDS", "10")),
+    )
+
+
+@dataclass
+class OllamaHost:
+    """One Ollama node and its pooled client."""
+
+    url: str
+    client: AsyncClient
+    probe_client: httpx.AsyncClient
+    # Hosts are assumed usable until the first probe says otherwise.
+    healthy: bool = True
+    model_available: bool | None = None
+    version: str | None = None
+    last_checked_at: datetime | None = None
+    last_error: str | None = None
+    consecutive_failures: int = field(default=0)
+
+
+class OllamaHostPool:
+    """Routes Ollama calls over several hosts.
+
+    A background task probes every host's /api/version and checks that the
+    configured model is present. Calls go to the healthy host with the
+    lowest load relative to its current concurrency limit.
+    """
+
+    def __init__(
+        self,
+        hosts: list[str],
+        model: str,
+        scheduler: OllamaScheduler,
+        probe_interval: float | None = None,
+        probe_timeout: float | None = None,
+    ):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        self.model = model
+        self.scheduler = scheduler
+        self.probe_interval = probe_interval or float(
+            os.getenv("OLLAMA_HEALTH_INTERVAL_SECONDS", "15")
+        )
+        probe_timeout = probe_timeout or float(
+            os.getenv("OLLAMA_HEALTH_TIMEOUT_SECONDS", "5")
+        )
+        timeout = client_timeout()
+        self.hosts: list[OllamaHost] = [
+            OllamaHost(
+                url=url,
+                client=AsyncClient(host=url, timeout=timeout),
+                probe_client=httpx.AsyncClient(
+                    base_url=_base_url(url), timeout=probe_timeout
+                ),
+            )
+            for url in dict.fromkeys(hosts)
+        ]
+        self._probe_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await self.probe_all()
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+        for host in self.hosts:
+            await host.probe_client.aclose()
+            # ollama's AsyncClient has no aclose() of its own
+            await host.client._client.aclose()
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe_all()
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(self.probe(host) for host in self.hosts))
+
+    async def probe(self, host: OllamaHost) -> bool:
+        host.last_checked_at = datetime.now(UTC)
+        try:
+            resp = await host.probe_client.get("/api/version")
+            resp.raise_for_status()
+            host.version = resp.json().get("version")
+        except Exception as e:
+            self._mark_down(host, f"Health check failed: {e}")
+            return False
+
+        host.model_available = await self.check_model_availability(host)
+        if not host.model_available:
+            self._mark_down(host, f"Model '{self.model}' is not available")
+            return False
+
+        if not host.healthy:
+            print(f"Ollama host {host.url} is healthy again")
+        host.healthy = True
+        host.consecutive_failures = 0
+        host.last_error = None
+        return True
+
+    async def check_model_availability(self, host: OllamaHost) -> bool:
+        try:
+            models = await host.client.list()
+        except Exception:
+            return False
+        names = {m.model for m in models.models if m.model}
+        wanted = self.model if ":" in self.model else f"{self.model}:latest"
+        return self.model in names or wanted in names
+
+    def _mark_down(self, host: OllamaHost, error: str) -> None:
+        if host.healthy:
+            print(f"Ollama host {host.url} marked unhealthy: {error}")
+        host.healthy = False
+        host.consecutive_failures += 1
+        host.last_error = error
+
+    def report_failure(self, host: OllamaHost, error: Exception) -> None:
+        """Take a host out of rotation after a failed call; the probe brings it back."""
+        self._mark_down(host, str(error))
+
+    def _load(self, host: OllamaHost) -> float:
+        limiter = self.scheduler.limiter(host.url)
+        return (limiter.in_flight + limiter.waiting) / limiter.limit
+
+    def pick(self, exclude: set[str] | None = None) -> OllamaHost | None:
+        """Least-loaded healthy host, ignoring URLs in ``exclude``.
+
+        If no host is healthy the remaining ones are still tried rather than
+        failing outright, since probes may lag behind a recovered node.
+        """
+        exclude = exclude or set()
+        candidates = [h for h in self.hosts if h.url not in exclude]
+        if not candidates:
+            return None
+        healthy = [h for h in candidates if h.healthy]
+        return min(healthy or candidates, key=self._load)
+
+    def status(self) -> list[OllamaHostStatus]:
+        return [
+            OllamaHostStatus(
+                url=host.url,
+                healthy=host.healthy,
+                model_available=host.model_available,
+                version=host.version,
+                last_checked_at=host.last_checked_at,
+                last_error=host.last_error,
+                consecutive_failures=host.consecutive_failures,
+                load=round(self._load(host), 4),
+            )
+            for host in self.hosts
+        ]
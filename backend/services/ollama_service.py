@@ -1,21 +1,38 @@
 import asyncio
-import json_repair
 import json
 import os
+import time
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from pathlib import Path
 
-from ollama import AsyncClient, GenerateResponse, Options
+from ollama import GenerateResponse, Options
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import ValidationError
 
 from schema import (
+    OllamaCallStats,
     PromptInfo,
     Status,
     ValidationFile,
     ValidationIssue,
     ValidationPromptResult,
 )
+from services.chunking import ChunkPlanner, FileChunk, merge_issues
+from services.keepalive import ModelKeepAlive
+from services.ollama_pool import (
+    OllamaHost,
+    OllamaHostPool,
+    is_failover_error,
+    is_transient_error,
+    parse_hosts,
+)
+from services.response_parser import ResponseParser, fix_unescaped_quotes
+from services.result_cache import ResultCache
+from services.retry import HedgePolicy, RetryBudget, RetryPolicy
+from services.scheduler import OllamaScheduler
+from services.schema_registry import FormatSchemaRegistry
+from services.stream_parser import IncrementalIssueParser
 
 
 @dataclass
@@ -29,74 +46,101 @@ class OllamaOptions:
 class OllamaService:
     def __init__(
         self,
-        host: str | None = None,
+        hosts: list[str] | None = None,
         model: str | None = None,
         options: OllamaOptions | None = None,
     ):
-        self.host = host or os.getenv("OLLAMA_HOST", "http://ollama:11434")
+        # OLLAMA_HOSTS takes a comma separated list of nodes; OLLAMA_HOST is
+        # still honoured for single-node setups.
+        self.hosts = (
+            hosts
+            or parse_hosts(os.getenv("OLLAMA_HOSTS"))
+            or [os.getenv("OLLAMA_HOST", "http://ollama:11434")]
+        )
         self.model = model or os.getenv("OLLAMA_MODEL", "gemma3n:e4b")
-        # self.client = Client(host=self.host)
-        self.client = AsyncClient(host=self.host)
+        # Stream tokens and report issues as soon as each one is complete.
+        self.stream = os.getenv("OLLAMA_STREAM", "false").lower() in (
+            "1",
+            "true",
+            "yes",
+            "on",
+        )
+        self.scheduler = OllamaScheduler()
+        self.pool = OllamaHostPool(self.hosts, self.model, self.scheduler)
+        self.planner = ChunkPlanner()
+        self.parser = ResponseParser()
+        # A hung node must not hold its slot forever: every attempt is given
+        # up after this many seconds (0 = no limit) and may then be retried.
+        self.timeout = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "900")) or None
+        self.timeouts = 0
+        self.retry = RetryPolicy()
+        self.hedging = HedgePolicy()
         self._options: Options = self._construct_options(options or OllamaOptions())
 
-        self._schema: JsonSchemaValue = self._load_format_schema(
-            Path(os.getenv("OLLAMA_FORMAT_PATH", "format/generate.schema.json"))
+        self.schemas = FormatSchemaRegistry(
+            Path(os.getenv("OLLAMA_FORMAT_PATH", "format/generate.schema.json")),
+            Path(__file__).parent.parent / "prompts",
+        )
+        self.keepalive = ModelKeepAlive(self.pool, self.model, lambda: self._options)
+
+    async def start(self) -> None:
+        await self.pool.start()
+        await self.keepalive.start()
+
+    async def stop(self) -> None:
+        await self.keepalive.stop()
+        await self.pool.stop()
+
+    def is_deterministic(self) -> bool:
+        """Whether identical requests are expected to produce identical output."""
+        return self._options.temperature == 0 and self._options.seed is not None
+
+    def format_schema(self, prompt_info: PromptInfo) -> JsonSchemaValue:
+        """The output schema the prompt is answered in."""
+        return self.schemas.get(prompt_info.category, prompt_info.name).schema
+
+    def fused_format_schema(self, prompt_infos: list[PromptInfo]) -> JsonSchemaValue:
+        """The output schema with one section per fused prompt, each in the
+        prompt's own schema."""
+        sections = self._sections(len(prompt_infos))
+        return {
+            "type": "object",
+            "required": sections,
+            "properties": {
+                section: self.format_schema(prompt_info)
+                for section, prompt_info in zip(sections, prompt_infos, strict=True)
+            },
+        }
+
+    def result_cache_key(
+        self,
+        format_schema: JsonSchemaValue,
+        prompt_sha256: str,
+        file_sha256s: list[str],
+    ) -> str:
+        """Key of the LLM result cache for this model, options and format schema."""
+        return ResultCache.make_key(
+            self.model,
+            self._options.model_dump(exclude_none=True),
+            self.planner.cache_params(),
+            format_schema,
+            prompt_sha256,
+            file_sha256s,
         )
 
     def _construct_options(self, options: OllamaOptions) -> Options:
+        # num_ctx is what the chunk planner sizes prompts for, so the server
+        # must not fall back to its (smaller) default context.
         return Options(
-            seed=options.seed, temperature=options.temperature, stop=options.stop
+            seed=options.seed,
+            temperature=options.temperature,
+            stop=options.stop,
+            num_ctx=self.planner.context_tokens,
         )
 
     def fix_unescaped_quotes_in_json_strings(self, json_str: str) -> str:
         """JSON文字列値内の未エスケープダブルクオートを修正"""
-
-        out = []
-        in_string = False
-        escape = False
-
-        i = 0
-        n = len(json_str)
-        while i < n:
-            ch = json_str[i]
-
-            if ch == '"' and not escape:
-                if not in_string:
-                    # 文字列開始
-                    in_string = True
-                    out.append(ch)
-                else:
-                    # 文字列の中で " を発見。終端かどうかを推定
-                    j = i + 1
-                    while j < n and json_str[j].isspace():
-                        j += 1
-                    # 終端候補かどうか：直後が , } ] または入力末尾
-                    is_closing = (j >= n) or (json_str[j] in ":,}]")
-                    if is_closing:
-                        in_string = False
-                        out.append(ch)  # 終端の " はそのまま
-                    else:
-                        out.append('\\"')  # 文字列内の裸の " をエスケープ
-                i += 1
-                continue
-
-            if ch == "\\" and not escape:
-                escape = True
-                out.append(ch)
-                i += 1
-                continue
-
-            if escape:
-                # 直前がバックスラッシュだったので通常処理に戻る
-                escape = False
-                out.append(ch)
-                i += 1
-                continue
-
-            out.append(ch)
-            i += 1
-
-        return "".join(out)
+        return fix_unescaped_quotes(json_str)
 
     # async def validate_files_with_prompt(
     #     self,
@@ -121,34 +165,192 @@ class OllamaService:
         prompt_info: PromptInfo,
         prompt_content: str,
         prompt_task: ValidationPromptResult,
+        on_partial: Callable[[list[ValidationIssue]], Awaitable[None]] | None = None,
+        retry_budget: RetryBudget | None = None,
+    ) -> None:
+        """Validate multiple with a single prompt.
+
+        Files that do not fit in the model's context together are spread over
+        several prompt windows by the chunk planner. The windows are generated
+        concurrently and their issues merged into ``prompt_task``.
+
+        In streaming mode ``on_partial`` is awaited with all issues parsed so far
+        each time another element of the "issues" array is complete.
+
+        Retries of failed calls are taken from ``retry_budget`` when given.
+        """
+        await self._validate(
+            files,
+            prompt_content,
+            [prompt_task],
+            self.format_schema(prompt_info),
+            on_partial=on_partial,
+            retry_budget=retry_budget,
+        )
+
+    async def validate_files_with_prompts(
+        self,
+        files: list[ValidationFile],
+        prompts: list[tuple[PromptInfo, str]],
+        prompt_tasks: list[ValidationPromptResult],
+        retry_budget: RetryBudget | None = None,
+    ) -> None:
+        """Validate files with several prompts in one request per window.
+
+        Each prompt is answered in its own section of the output, so the file
+        contents are evaluated once for all of them. The sections are split
+        back into ``prompt_tasks``, which share the timings of the request.
+        Partial results are not streamed in this mode.
+        """
+        sections = self._sections(len(prompts))
+        await self._validate(
+            files,
+            self._construct_fused_instructions(sections, prompts),
+            prompt_tasks,
+            self.fused_format_schema([prompt_info for prompt_info, _ in prompts]),
+            sections=sections,
+            retry_budget=retry_budget,
+        )
+        for prompt_task in prompt_tasks:
+            prompt_task.fused = True
+
+    async def _validate(
+        self,
+        files: list[ValidationFile],
+        prompt_content: str,
+        prompt_tasks: list[ValidationPromptResult],
+        format_schema: JsonSchemaValue,
+        sections: list[str] | None = None,
+        on_partial: Callable[[list[ValidationIssue]], Awaitable[None]] | None = None,
+        retry_budget: RetryBudget | None = None,
     ) -> None:
-        """Validate multiple with a single prompt."""
-        print("-------------------model, schema-------------------")
-        print(f"Model: {self.model}")
-        self._options: Options = self._construct_options(OllamaOptions())
-        self._schema: JsonSchemaValue = self._load_format_schema(
-            Path("format/generate.schema.json")
+        try:
+            windows = self.planner.plan(
+                files, prompt_content, output_sections=len(prompt_tasks)
+            )
+        except ValueError as e:
+            # TODO NEED LOGGING
+            for prompt_task in prompt_tasks:
+                prompt_task.status = Status.failed
+                prompt_task.error_message = str(e)
+            return
+
+        window_tasks = [[task.model_copy() for task in prompt_tasks] for _ in windows]
+        partials: list[list[ValidationIssue]] = [[] for _ in windows]
+
+        def report_partial(index: int):
+            async def report(issues: list[ValidationIssue]) -> None:
+                partials[index] = issues
+                if on_partial is not None:
+                    await on_partial(merge_issues(partials))
+
+            return report
+
+        await asyncio.gather(
+            *(
+                self._validate_window(
+                    window,
+                    prompt_content,
+                    tasks,
+                    format_schema,
+                    sections,
+                    report_partial(index),
+                    retry_budget,
+                )
+                for index, (window, tasks) in enumerate(
+                    zip(windows, window_tasks, strict=True)
+                )
+            )
         )
-        print(f"Schema: \n{self._schema}\n")
-        prompt = self._construct_prompt(files, prompt_content)
+        for position, prompt_task in enumerate(prompt_tasks):
+            self._merge_window_results(
+                [tasks[position] for tasks in window_tasks], prompt_task
+            )
+
+    def _merge_window_results(
+        self,
+        window_tasks: list[ValidationPromptResult],
+        prompt_task: ValidationPromptResult,
+    ) -> None:
+        failed = [
+            (index, task)
+            for index, task in enumerate(window_tasks)
+            if task.status != Status.completed
+        ]
+        if failed:
+            prompt_task.status = Status.failed
+            if len(window_tasks) == 1:
+                prompt_task.error_message = failed[0][1].error_message
+            else:
+                prompt_task.error_message = "; ".join(
+                    f"Window {index + 1}/{len(window_tasks)}: {task.error_message}"
+                    for index, task in failed
+                )
+            return
+
+        def total(field: str) -> int | None:
+            # Model time spent on the prompt, not wall-clock time.
+            values = [getattr(task, field) for task in window_tasks]
+            if any(value is None for value in values):
+                return None
+            return sum(values)
+
+        prompt_task.status = Status.completed
+        prompt_task.result = merge_issues([task.result or [] for task in window_tasks])
+        prompt_task.total_duration_ns = total("total_duration_ns")
+        prompt_task.eval_duration_ns = total("eval_duration_ns")
+        prompt_task.load_duration_ns = total("load_duration_ns")
+        prompt_task.prompt_eval_duration_ns = total("prompt_eval_duration_ns")
+
+    async def _validate_window(
+        self,
+        window: list[FileChunk],
+        prompt_content: str,
+        prompt_tasks: list[ValidationPromptResult],
+        format_schema: JsonSchemaValue,
+        sections: list[str] | None,
+        on_partial: Callable[[list[ValidationIssue]], Awaitable[None]],
+        retry_budget: RetryBudget | None,
+    ) -> None:
+        prompt = self._construct_prompt(window, prompt_content)
         print(f"----\nConstructed prompt: \n{prompt}\n")
         print("---------------------------------------------------")
 
+        on_text: Callable[[str], Awaitable[None]] | None = None
+        if self.stream and sections is None:
+            parser = IncrementalIssueParser()
+            partial: list[ValidationIssue] = []
+
+            async def on_text(fragment: str) -> None:
+                new_issues = []
+                for item in parser.feed(fragment):
+                    try:
+                        new_issues.append(ValidationIssue.model_validate(item))
+                    except ValidationError:
+                        # left for the full parse of the final response
+                        continue
+                if new_issues:
+                    partial.extend(new_issues)
+                    await on_partial(list(partial))
+
+        def fail(prompt_task: ValidationPromptResult, message: str) -> None:
+            # TODO NEED LOGGING
+            prompt_task.status = Status.failed
+            prompt_task.error_message = message
+
         try:
             # TODO: do we need "thinking" options when the model supports it
-            # generate_response: GenerateResponse = self.client.generate(
-            generate_response: GenerateResponse = await self.client.generate(
-                model=self.model,
+            generate_response: GenerateResponse = await self._generate(
                 prompt=prompt,
-                stream=False,
                 options=self._options,
-                format=self._schema,
+                format=format_schema,
+                on_text=on_text,
+                retry_budget=retry_budget,
             )
         except Exception as e:
             print(f"Error occurred while generating response: {str(e)}")
-            # TODO NEED LOGGING
-            prompt_task.status = Status.failed
-            prompt_task.error_message = str(e)
+            for prompt_task in prompt_tasks:
+                fail(prompt_task, str(e))
             return
 
         print(
@@ -164,67 +366,231 @@ class OllamaService:
             ]  # in nanoseconds
             eval_duration: int = generate_response["eval_duration"]  # in nanoseconds
 
-            response: list[ValidationIssue] | None = (
-                self._extract_issues_from_response_text(response_text)
-            )
-            print(f"Extracted issues: {response}")
-        except ValidationError as e:
-            # TODO NEED LOGGING
-            prompt_task.status = Status.failed
-            prompt_task.error_message = (
-                f"Response from Ollama has invalid schema: {str(e)}"
-            )
-            return
-        except json.decoder.JSONDecodeError as e:
-            # TODO NEED LOGGING
-            prompt_task.status = Status.failed
-            prompt_task.error_message = f"Failed to parse response: {str(e)}"
-            return
-        except ValueError as e:
-            # TODO NEED LOGGING
-            prompt_task.status = Status.failed
-            prompt_task.error_message = (
-                f"Received invalid response from Ollama: {str(e)}"
-            )
+            if sections is None:
+                parsed = [self._extract_issues_from_response_text(response_text)]
+            else:
+                parsed = self._split_fused_response(response_text, sections)
+        except (ValidationError, json.decoder.JSONDecodeError, ValueError) as e:
+            for prompt_task in prompt_tasks:
+                fail(prompt_task, self._response_error_message(e))
             return
 
-        prompt_task.status = Status.completed
-        prompt_task.result = response
-        prompt_task.total_duration_ns = total_duration
-        prompt_task.eval_duration_ns = eval_duration
-        prompt_task.load_duration_ns = load_duration
-        prompt_task.prompt_eval_duration_ns = prompt_eval_duration
-        return
+        for prompt_task, response in zip(prompt_tasks, parsed, strict=True):
+            if isinstance(response, ValueError):
+                fail(prompt_task, self._response_error_message(response))
+                continue
+            print(f"Extracted issues: {response}")
+            prompt_task.status = Status.completed
+            prompt_task.result = response
+            prompt_task.total_duration_ns = total_duration
+            prompt_task.eval_duration_ns = eval_duration
+            prompt_task.load_duration_ns = load_duration
+            prompt_task.prompt_eval_duration_ns = prompt_eval_duration
+
+    def _response_error_message(self, e: ValueError) -> str:
+        if isinstance(e, ValidationError):
+            return f"Response from Ollama has invalid schema: {str(e)}"
+        if isinstance(e, json.decoder.JSONDecodeError):
+            return f"Failed to parse response: {str(e)}"
+        return f"Received invalid response from Ollama: {str(e)}"
+
+    async def _generate(
+        self,
+        on_text: Callable[[str], Awaitable[None]] | None = None,
+        retry_budget: RetryBudget | None = None,
+        **kwargs,
+    ) -> GenerateResponse:
+        """Send a generate request to the least-loaded healthy host.
+
+        If the host cannot be reached (or does not have the model) the request
+        is retried once on each of the other hosts. When every host failed
+        with a transient error the round is repeated after a jittered backoff,
+        up to ``self.retry.max_attempts`` rounds and as long as
+        ``retry_budget`` has retries left. With ``on_text`` the response is
+        streamed and each fragment is passed to it; the returned response
+        then holds the whole text and the final timings.
+        """
+        streamed = False
+
+        async def forward(fragment: str) -> None:
+            nonlocal streamed
+            streamed = True
+            await on_text(fragment)
+
+        attempt = 1
+        tried: set[str] = set()
+        while True:
+            host = self.pool.pick(exclude=tried)
+            if host is None:
+                raise ConnectionError(
+                    f"No Ollama host could serve the request (tried {len(tried)})"
+                )
+            tried.add(host.url)
+            try:
+                if on_text is None:
+                    return await self._hedged_call(host, tried, **kwargs)
+                return await self._call(host, forward, **kwargs)
+            except Exception as e:
+                # Once output has been consumed the request cannot be replayed
+                # without duplicating partial results.
+                if streamed:
+                    raise
+                if is_failover_error(e):
+                    print(f"Ollama host {host.url} failed, failing over: {e}")
+                    self.pool.report_failure(host, e)
+                    if len(tried) < len(self.pool.hosts):
+                        continue
+                if not is_transient_error(e) or attempt >= self.retry.max_attempts:
+                    raise
+                if retry_budget is not None and not retry_budget.spend():
+                    self.retry.denied += 1
+                    print(f"Retry budget of the batch is spent, giving up: {e}")
+                    raise
+                delay = self.retry.delay(attempt)
+                print(f"Ollama call failed, retrying in {delay:.1f}s: {e}")
+                self.retry.retries += 1
+                attempt += 1
+                tried.clear()
+                await asyncio.sleep(delay)
+
+    async def _call(
+        self,
+        host: OllamaHost,
+        on_text: Callable[[str], Awaitable[None]] | None,
+        **kwargs,
+    ) -> GenerateResponse:
+        """One generate call on ``host``, given up after ``self.timeout``."""
+        self.keepalive.touch()
+        started_at = time.monotonic()
+        try:
+            # The scheduler decides how many generate calls may be in flight
+            # against this host at once and adapts that limit to its load.
+            async with self.scheduler.slot(host.url) as slot:
+                async with asyncio.timeout(self.timeout):
+                    if on_text is None:
+                        generate_response: GenerateResponse = (
+                            await host.client.generate(
+                                model=self.model,
+                                stream=False,
+                                keep_alive=self.keepalive.keep_alive(),
+                                **kwargs,
+                            )
+                        )
+                    else:
+                        fragments: list[str] = []
+                        final: GenerateResponse | None = None
+                        async for part in await host.client.generate(
+                            model=self.model,
+                            stream=True,
+                            keep_alive=self.keepalive.keep_alive(),
+                            **kwargs,
+                        ):
+                            if part.response:
+                                fragments.append(part.response)
+                                await on_text(part.response)
+                            if part.done:
+                                final = part
+                        if final is None:
+                            raise ValueError("Stream ended without a final response")
+                        generate_response = final.model_copy(
+                            update={"response": "".join(fragments)}
+                        )
+                slot.record_response(generate_response)
+        except TimeoutError as e:
+            self.timeouts += 1
+            raise TimeoutError(
+                f"Ollama host {host.url} did not answer within {self.timeout}s"
+            ) from e
+        self.hedging.record(time.monotonic() - started_at)
+        return generate_response
+
+    async def _hedged_call(
+        self, host: OllamaHost, tried: set[str], **kwargs
+    ) -> GenerateResponse:
+        """A call on ``host`` that is duplicated on another host once it takes
+        longer than most calls did; the first answer wins and the other call
+        is cancelled, which closes its connection and frees its slot."""
+        delay = self.hedging.delay()
+        if delay is None:
+            return await self._call(host, None, **kwargs)
+
+        primary = asyncio.create_task(self._call(host, None, **kwargs))
+        calls = [primary]
+        try:
+            done, _ = await asyncio.wait(calls, timeout=delay)
+            backup_host = None if done else self.pool.pick(exclude=tried)
+            if backup_host is None:
+                return await primary
+            tried.add(backup_host.url)
+            self.hedging.hedges += 1
+            backup = asyncio.create_task(self._call(backup_host, None, **kwargs))
+            calls.append(backup)
+
+            pending = set(calls)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for call in done:
+                    if call.exception() is None:
+                        if call is backup:
+                            self.hedging.wins += 1
+                        return call.result()
+                    if call is backup and is_failover_error(call.exception()):
+                        self.pool.report_failure(backup_host, call.exception())
+            return primary.result()  # raises the primary's error
+        finally:
+            for call in calls:
+                call.cancel()
+            await asyncio.gather(*calls, return_exceptions=True)
+
+    def call_stats(self) -> OllamaCallStats:
+        return OllamaCallStats(
+            timeout_seconds=self.timeout,
+            timeouts=self.timeouts,
+            retries=self.retry.retries,
+            retries_denied=self.retry.denied,
+            hedging=self.hedging.enabled,
+            hedge_after_seconds=self.hedging.latency(),
+            hedges=self.hedging.hedges,
+            hedge_wins=self.hedging.wins,
+        )
 
     def _extract_issues_from_response_text(
         self, text: str
     ) -> list[ValidationIssue] | None:
-        # TODO escaping quotes in json string may be needed if exists
-
-        if not text.strip():
-            raise ValueError("Response is empty")
-
-        # tmp_result = json.loads(text)
-        tmp_result = json_repair.loads(text)
-        print(f"---\nRepaired JSON:\n{json.dumps(tmp_result)}\n---")
-        has_issues = tmp_result.get("has_issues")
-        if isinstance(has_issues, bool) and has_issues:
-            issues = tmp_result.get("issues")
-            if isinstance(issues, list):
-                return [ValidationIssue.model_validate(item) for item in issues]
-            else:
-                raise ValueError("Response is not in a format as expected")
-        elif isinstance(has_issues, bool) and not has_issues:
-            return []
-        else:
-            raise ValueError("Response is not in a format as expected")
+        return self.parser.parse(text)
 
-    def _construct_prompt(
-        self, files: list[ValidationFile], prompt_content: str
+    def _split_fused_response(
+        self, text: str, sections: list[str]
+    ) -> list[list[ValidationIssue] | ValueError]:
+        return self.parser.parse_sections(text, sections)
+
+    def _sections(self, count: int) -> list[str]:
+        return [f"prompt_{index + 1}" for index in range(count)]
+
+    def _construct_fused_instructions(
+        self, sections: list[str], prompts: list[tuple[PromptInfo, str]]
     ) -> str:
+        instructions = (
+            "Carry out each of the following reviews of the same files independently. "
+            "Write the answer to each review in the property of the output named in its heading.\n\n"
+        )
+        for section, (prompt_info, prompt_content) in zip(
+            sections, prompts, strict=True
+        ):
+            instructions += f"=== {section}: {prompt_info.category}::{prompt_info.name} ===\n\n{prompt_content}\n\n"
+        return instructions
+
+    def _construct_prompt(self, chunks: list[FileChunk], prompt_content: str) -> str:
         prompt = f"{prompt_content}\n\n"
-        for index, file in enumerate(files):
-            prompt += f'---\n\n#{index + 1} File "{file.file_name}"\nFile Content:\n\n```\n{file.content}\n```\n\n'
+        for index, chunk in enumerate(chunks):
+            part = (
+                f" (lines {chunk.start_line}-{chunk.end_line} of {chunk.total_lines})"
+                if chunk.is_partial
+                else ""
+            )
+            prompt += f'---\n\n#{index + 1} File "{chunk.file.file_name}"{part}\nFile Content:\n\n```\n{chunk.content}\n```\n\n'
         return prompt
 
     def _construct_prompt_lines_added(
@@ -243,24 +609,9 @@ class OllamaService:
             prompt += f"{content_with_line_numbers}\n```\n\n"
         return prompt
 
-    def _load_format_schema(self, path: Path) -> JsonSchemaValue:
-        """Load JSON schema from a file."""
-        if not path.exists():
-            raise FileNotFoundError(f"Schema file not found: {path}")
-
-        with path.open("r", encoding="utf-8") as f:
-            try:
-                schema = json.load(f)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON schema in the file {path}: {e}") from e
-
-        return schema
-
-    def check_model_availability(self) -> bool:
-        try:
-            models = self.client.list()
-            return any(
-                model["name"] == self.model for model in models.get("models", [])
-            )
-        except Exception:
-            return False
+    async def check_model_availability(self) -> bool:
+        """Whether at least one configured host has the model."""
+        results = await asyncio.gather(
+            *(self.pool.check_model_availability(host) for host in self.pool.hosts)
+        )
+        return any(results)
@@ -1,54 +1,63 @@
-import hashlib
+import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
-from schema import PromptCategory, PromptCategoryKind, PromptContentResponse, PromptInfo
+from pydantic import TypeAdapter
 
+from schema import PromptCategory, PromptCategoryKind, PromptContentResponse, PromptInfo
 from services.utils import calc_sha256
 
+_listing_adapter = TypeAdapter(list[PromptCategory])
+
+
+@dataclass(frozen=True)
+class _PromptFile:
+    info: PromptInfo
+    content: PromptContentResponse
+    mtime_ns: int
+    size: int
+
 
 class PromptService:
-    def __init__(self):
-        self.prompts_dir = Path(__file__).parent.parent / "prompts"
+    """Prompt files, kept in memory.
+
+    The catalog is read when the service is created. Listings, contents and
+    hashes are then served from memory; the prompts directory is rescanned
+    for added, removed or changed (mtime or size) files at most every
+    ``PROMPT_RELOAD_SECONDS``.
+    """
+
+    def __init__(
+        self, prompts_dir: Path | None = None, reload_seconds: float | None = None
+    ):
+        self.prompts_dir = prompts_dir or Path(__file__).parent.parent / "prompts"
+        self.reload_seconds = (
+            reload_seconds
+            if reload_seconds is not None
+            else float(os.getenv("PROMPT_RELOAD_SECONDS", "2"))
+        )
+        self._files: dict[Path, _PromptFile] = {}
+        self._index: dict[tuple[PromptCategoryKind, str], _PromptFile] = {}
+        self._listing: list[PromptCategory] | None = None
+        self._listing_json: bytes | None = None
+        self.listing_etag = '""'
+        self._checked_at = time.monotonic()
+        self.refresh(force=True)
 
     def get_available_prompts(self) -> list[PromptCategory] | None:
         """
         promptsディレクトリからプロンプトファイル一覧を取得
         """
-        prompt_list: list[PromptCategory] = []
-
-        if not self.prompts_dir.exists():
-            return None
-
-        for category in PromptCategoryKind:
-            category_dir = self.prompts_dir / category.value
-            if not category_dir.exists():
-                continue
-
-            prompt_files_in_category = category_dir.glob("*.txt")
-            prompt_infos = []
-
-            for prompt_file in prompt_files_in_category:
-                name = prompt_file.stem
-                description = self._extract_description(prompt_file)
-                sha256 = calc_sha256(prompt_file.read_bytes())
-                prompt_infos.append(
-                    PromptInfo(
-                        name=name,
-                        category=category,
-                        description=description,
-                        sha256=sha256,
-                    )
-                )
-
-            if prompt_infos:
-                prompt_list.append(
-                    PromptCategory(category=category, prompts=prompt_infos)
-                )
-
+        self.refresh()
         # return None when no prompts found
-        if not prompt_list:
-            return None
-        return prompt_list
+        return self._listing
+
+    def listing_json(self) -> bytes:
+        """The current listing, serialized once per change of the catalog."""
+        if self._listing_json is None:
+            self._listing_json = _listing_adapter.dump_json(self._listing or [])
+        return self._listing_json
 
     def load_prompt_content(
         self, prompt_name: str, category: PromptCategoryKind
@@ -56,42 +65,112 @@ class PromptService:
         """
         指定されたプロンプト名のファイル内容を読み込み
         """
-        file_path = self.prompts_dir / category / f"{prompt_name}.txt"
-
-        if not file_path.exists():
+        self.refresh()
+        try:
+            prompt_file = self._index.get((PromptCategoryKind(category), prompt_name))
+        except ValueError:
             return None
+        return prompt_file.content if prompt_file is not None else None
 
+    def refresh(self, force: bool = False) -> None:
+        """Pick up prompt files added, removed or changed since the last scan."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+
+        files: dict[Path, _PromptFile] = {}
+        changed = False
+        for category in PromptCategoryKind:
+            try:
+                entries = list(os.scandir(self.prompts_dir / category.value))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for entry in entries:
+                if not entry.name.endswith(".txt") or not entry.is_file():
+                    continue
+                path = Path(entry.path)
+                stat = entry.stat()
+                prompt_file = self._files.get(path)
+                if (
+                    prompt_file is None
+                    or prompt_file.mtime_ns != stat.st_mtime_ns
+                    or prompt_file.size != stat.st_size
+                ):
+                    prompt_file = self._read(path, category, stat)
+                    changed = True
+                if prompt_file is not None:
+                    files[path] = prompt_file
+
+        if changed or files.keys() != self._files.keys():
+            self._files = files
+            self._index = {
+                (PromptCategoryKind(f.info.category), f.info.name): f
+                for f in files.values()
+            }
+            self._build_listing()
+
+    def _read(
+        self, path: Path, category: PromptCategoryKind, stat: os.stat_result
+    ) -> _PromptFile | None:
+        name = path.stem
         try:
-            content_bytes = file_path.read_bytes()
+            content_bytes = path.read_bytes()
             content = content_bytes.decode("utf-8")
-            sha256 = calc_sha256(content_bytes)
-            return PromptContentResponse(
-                name=prompt_name, category=category, content=content, sha256=sha256
-            )
         except Exception as e:
-            print(f"Error loading prompt {prompt_name}: {e}")
+            print(f"Error loading prompt {name}: {e}")
             return None
+        sha256 = calc_sha256(content_bytes)
+        return _PromptFile(
+            info=PromptInfo(
+                name=name,
+                category=category,
+                description=self._describe(content.partition("\n")[0]),
+                sha256=sha256,
+            ),
+            content=PromptContentResponse(
+                name=name, category=category, content=content, sha256=sha256
+            ),
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+        )
+
+    def _build_listing(self) -> None:
+        by_category: dict[str, list[PromptInfo]] = {}
+        for prompt_file in sorted(self._files.values(), key=lambda f: f.info.name):
+            by_category.setdefault(prompt_file.info.category, []).append(
+                prompt_file.info
+            )
+        prompt_list = [
+            PromptCategory(category=category, prompts=by_category[category.value])
+            for category in PromptCategoryKind
+            if category.value in by_category
+        ]
+        self._listing = prompt_list or None
+        self._listing_json = None
+        # the listing is derived from names and contents only
+        self.listing_etag = '"{}"'.format(
+            calc_sha256(
+                "\n".join(
+                    f"{info.category}/{info.name}:{info.sha256}"
+                    for prompts in prompt_list
+                    for info in prompts.prompts
+                ).encode("utf-8")
+            )
+        )
 
-    def _extract_description(self, file_path: Path) -> str | None:
-        """
-        プロンプトファイルの最初のコメント行から説明を抽出
-        """
-        try:
-            with open(file_path, encoding="utf-8") as f:
-                first_line = f.readline().strip()
-
-                # # で始まるコメント行があれば説明として使用
-                if first_line.startswith("#"):
-                    return first_line[1:].strip()
+    def _describe(self, first_line: str) -> str | None:
+        first_line = first_line.strip()
 
-                # 最初の文（ピリオドまで）を説明として使用
-                first_sentence = first_line.split(".")[0]
-                if (
-                    first_sentence and len(first_sentence) < 100
-                ):  # 空文字列でなく、短い場合のみ説明として使用
-                    return first_sentence
+        # # で始まるコメント行があれば説明として使用
+        if first_line.startswith("#"):
+            return first_line[1:].strip()
 
-        except Exception:
-            pass
+        # 最初の文（ピリオドまで）を説明として使用
+        first_sentence = first_line.split(".")[0]
+        if (
+            first_sentence and len(first_sentence) < 100
+        ):  # 空文字列でなく、短い場合のみ説明として使用
+            return first_sentence
 
         return None
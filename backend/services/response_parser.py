@@ -0,0 +1,134 @@
+import json
+import re
+from typing import Any
+
+import json_repair
+from pydantic import TypeAdapter
+from pydantic_core import ValidationError
+
+from schema import ResponseParserStats, ValidationIssue
+from services.utils import loads_json
+
+# An escape sequence, a quote that may close a string (the next non-space
+# character is one of ``:,}]`` or the text ends), or any other quote.
+_QUOTE_OR_ESCAPE = re.compile(r'(\\.)|(")(?=\s*(?:[:,}\]]|\Z))|"', re.DOTALL)
+
+_issues_adapter = TypeAdapter(list[ValidationIssue])
+
+
+def fix_unescaped_quotes(json_str: str) -> str:
+    """Escape double quotes inside JSON strings that the model left bare.
+
+    A quote inside a string is taken as its end only when the next
+    non-space character is one of ``:,}]`` (or the text ends there). Runs in
+    linear time: the regex jumps from quote to quote, and the whitespace after
+    a quote is scanned once.
+    """
+    out: list[str] = []
+    in_string = False
+    copied = 0
+    for match in _QUOTE_OR_ESCAPE.finditer(json_str):
+        if match.lastindex == 1:
+            continue  # an escape sequence, kept as it is
+        if not in_string:
+            in_string = True
+            continue
+        if match.lastindex == 2:
+            in_string = False
+            continue
+        i = match.start()
+        out.append(json_str[copied:i])
+        out.append('\\"')
+        copied = i + 1
+    out.append(json_str[copied:])
+    return "".join(out)
+
+
+class ResponseParser:
+    """Turns the model's JSON output into issues, trying the cheap decoders first.
+
+    Tiers, in order:
+      - strict: the response is valid JSON, as it is with structured output
+      - quotes: valid JSON once bare quotes inside strings are escaped
+      - repair: json_repair, which also fixes truncated or malformed output
+
+    The issues are then validated in one TypeAdapter pass. ``tier_counts``
+    records which tier each response needed.
+    """
+
+    TIERS = ("strict", "quotes", "repair")
+
+    def __init__(self):
+        self.tier_counts: dict[str, int] = dict.fromkeys(self.TIERS, 0)
+        self.failures = 0
+
+    def loads(self, text: str) -> Any:
+        if not text.strip():
+            raise ValueError("Response is empty")
+        try:
+            document = loads_json(text)
+            self.tier_counts["strict"] += 1
+            return document
+        except json.JSONDecodeError:
+            pass
+        try:
+            document = loads_json(fix_unescaped_quotes(text))
+            self.tier_counts["quotes"] += 1
+            return document
+        except json.JSONDecodeError:
+            pass
+        document = json_repair.loads(text)
+        self.tier_counts["repair"] += 1
+        print(f"---\nRepaired JSON:\n{json.dumps(document)}\n---")
+        return document
+
+    def issues(self, document: Any) -> list[ValidationIssue]:
+        """The issues of one ``{"has_issues": ..., "issues": [...]}`` object."""
+        if not isinstance(document, dict):
+            raise ValueError("Response is not in a format as expected")
+        has_issues = document.get("has_issues")
+        if has_issues is True:
+            issues = document.get("issues")
+            if isinstance(issues, list):
+                return _issues_adapter.validate_python(issues)
+            raise ValueError("Response is not in a format as expected")
+        if has_issues is False:
+            return []
+        raise ValueError("Response is not in a format as expected")
+
+    def parse(self, text: str) -> list[ValidationIssue]:
+        try:
+            return self.issues(self.loads(text))
+        except ValueError:
+            # ValidationError is a ValueError too
+            self.failures += 1
+            raise
+
+    def parse_sections(
+        self, text: str, sections: list[str]
+    ) -> list[list[ValidationIssue] | ValueError]:
+        """Issues of each section of a fused response, or the error that made
+        a section unusable; one broken section does not fail the others."""
+        try:
+            document = self.loads(text)
+            if not isinstance(document, dict):
+                raise ValueError("Response is not in a format as expected")
+        except ValueError:
+            self.failures += 1
+            raise
+
+        parsed: list[list[ValidationIssue] | ValueError] = []
+        for section in sections:
+            try:
+                parsed.append(self.issues(document.get(section)))
+            except (ValidationError, ValueError) as e:
+                parsed.append(e)
+        return parsed
+
+    def stats(self) -> ResponseParserStats:
+        return ResponseParserStats(
+            strict=self.tier_counts["strict"],
+            quotes=self.tier_counts["quotes"],
+            repair=self.tier_counts["repair"],
+            failures=self.failures,
+        )
@@ -0,0 +1,253 @@
+import json
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import LLMResultCacheORM
+from schema import (
+    ResultCacheStats,
+    Status,
+    ValidationIssue,
+    ValidationPromptResult,
+)
+from services.utils import calc_sha256
+
+
+@dataclass
+class CachedResult:
+    result: list[dict]
+    total_duration_ns: int | None
+    eval_duration_ns: int | None
+    load_duration_ns: int | None
+    prompt_eval_duration_ns: int | None
+    created_at: datetime
+
+    def apply_to(self, prompt_task: ValidationPromptResult) -> None:
+        """Complete ``prompt_task`` with this cached result."""
+        prompt_task.status = Status.completed
+        prompt_task.error_message = None
+        prompt_task.result = [ValidationIssue.model_validate(i) for i in self.result]
+        prompt_task.total_duration_ns = self.total_duration_ns
+        prompt_task.eval_duration_ns = self.eval_duration_ns
+        prompt_task.load_duration_ns = self.load_duration_ns
+        prompt_task.prompt_eval_duration_ns = self.prompt_eval_duration_ns
+        prompt_task.cached = True
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+class ResultCache:
+    """Content-addressed cache of LLM validation results.
+
+    Entries live in the llm_result_cache table with a small in-process LRU in
+    front. Entries older than ``ttl_seconds`` are ignored and removed, and the
+    table is trimmed to ``max_rows`` by least recent use.
+    """
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        memory_size: int | None = None,
+        ttl_seconds: int | None = None,
+        max_rows: int | None = None,
+        evict_every: int = 100,
+    ):
+        self.enabled = (
+            enabled if enabled is not None else _env_bool("LLM_CACHE_ENABLED", "true")
+        )
+        self.memory_size = (
+            memory_size
+            if memory_size is not None
+            else int(os.getenv("LLM_CACHE_MEMORY_SIZE", "256"))
+        )
+        # 0 disables expiry
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        )
+        self.max_rows = (
+            max_rows
+            if max_rows is not None
+            else int(os.getenv("LLM_CACHE_MAX_ROWS", "10000"))
+        )
+        self.evict_every = evict_every
+
+        self._lru: OrderedDict[str, CachedResult] = OrderedDict()
+        self._puts_since_evict = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        options: Mapping[str, Any],
+        chunking: Mapping[str, Any],
+        format_schema: Any,
+        prompt_sha256: str,
+        file_sha256s: list[str],
+    ) -> str:
+        """Hash of every input that determines the model's output.
+
+        ``chunking`` holds the chunk planner settings, which decide how the
+        files are split into prompt windows. File hashes are kept in upload
+        order because the prompt lists files in that order.
+        """
+        schema_sha256 = calc_sha256(
+            json.dumps(format_schema, sort_keys=True).encode("utf-8")
+        )
+        payload = {
+            "model": model,
+            "options": dict(options),
+            "chunking": dict(chunking),
+            "format_sha256": schema_sha256,
+            "prompt_sha256": prompt_sha256,
+            "file_sha256s": list(file_sha256s),
+        }
+        return calc_sha256(
+            json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        )
+
+    def _expired(self, created_at: datetime, now: datetime) -> bool:
+        if not self.ttl_seconds:
+            return False
+        if created_at.tzinfo is None:
+            # SQLite hands back naive datetimes; they were stored as UTC.
+            created_at = created_at.replace(tzinfo=UTC)
+        return created_at < now - timedelta(seconds=self.ttl_seconds)
+
+    def _remember(self, key: str, entry: CachedResult) -> None:
+        if self.memory_size <= 0:
+            return
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_size:
+            self._lru.popitem(last=False)
+
+    async def get(self, key: str, db: AsyncSession) -> CachedResult | None:
+        if not self.enabled:
+            return None
+        now = datetime.now(UTC)
+
+        entry = self._lru.get(key)
+        if entry is not None:
+            if not self._expired(entry.created_at, now):
+                self._lru.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry
+            del self._lru[key]
+
+        row: LLMResultCacheORM | None = await db.get(LLMResultCacheORM, key)
+        if row is None or self._expired(row.created_at, now):
+            self.misses += 1
+            return None
+
+        row.hit_count += 1
+        row.last_used_at = now
+        await db.commit()
+
+        entry = CachedResult(
+            result=row.result,
+            total_duration_ns=row.total_duration_ns,
+            eval_duration_ns=row.eval_duration_ns,
+            load_duration_ns=row.load_duration_ns,
+            prompt_eval_duration_ns=row.prompt_eval_duration_ns,
+            created_at=row.created_at,
+        )
+        self._remember(key, entry)
+        self.hits += 1
+        return entry
+
+    async def put(
+        self,
+        key: str,
+        model: str,
+        prompt_task: ValidationPromptResult,
+        db: AsyncSession,
+    ) -> None:
+        """Store a completed result. Failed or cached results are not stored."""
+        if not self.enabled or prompt_task.status != Status.completed:
+            return
+        if prompt_task.cached:
+            return
+
+        now = datetime.now(UTC)
+        entry = CachedResult(
+            result=[issue.model_dump() for issue in prompt_task.result or []],
+            total_duration_ns=prompt_task.total_duration_ns,
+            eval_duration_ns=prompt_task.eval_duration_ns,
+            load_duration_ns=prompt_task.load_duration_ns,
+            prompt_eval_duration_ns=prompt_task.prompt_eval_duration_ns,
+            created_at=now,
+        )
+        await db.merge(
+            LLMResultCacheORM(
+                key=key,
+                model=model,
+                result=entry.result,
+                total_duration_ns=entry.total_duration_ns,
+                eval_duration_ns=entry.eval_duration_ns,
+                load_duration_ns=entry.load_duration_ns,
+                prompt_eval_duration_ns=entry.prompt_eval_duration_ns,
+                hit_count=0,
+                created_at=now,
+                last_used_at=now,
+            )
+        )
+        await db.commit()
+        self._remember(key, entry)
+
+        self._puts_since_evict += 1
+        if self._puts_since_evict >= self.evict_every:
+            self._puts_since_evict = 0
+            await self.evict(db)
+
+    async def evict(self, db: AsyncSession) -> int:
+        """Delete expired rows and trim the table to max_rows. Returns rows removed."""
+        removed = 0
+        if self.ttl_seconds:
+            cutoff = datetime.now(UTC) - timedelta(seconds=self.ttl_seconds)
+            removed += (
+                await db.execute(
+                    delete(LLMResultCacheORM)
+                    .where(LLMResultCacheORM.created_at < cutoff)
+                    .execution_options(synchronize_session=False)
+                )
+            ).rowcount
+        if self.max_rows > 0:
+            keep = (
+                select(LLMResultCacheORM.key)
+                .order_by(LLMResultCacheORM.last_used_at.desc())
+                .limit(self.max_rows)
+            )
+            removed += (
+                await db.execute(
+                    delete(LLMResultCacheORM)
+                    .where(LLMResultCacheORM.key.not_in(keep))
+                    .execution_options(synchronize_session=False)
+                )
+            ).rowcount
+        await db.commit()
+        return removed
+
+    def stats(self) -> ResultCacheStats:
+        return ResultCacheStats(
+            enabled=self.enabled,
+            memory_entries=len(self._lru),
+            memory_size=self.memory_size,
+            ttl_seconds=self.ttl_seconds,
+            max_rows=self.max_rows,
+            hits=self.hits,
+            memory_hits=self.memory_hits,
+            misses=self.misses,
+        )
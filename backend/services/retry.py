@@ -0,0 +1,133 @@
+import os
+import random
+from collections import OrderedDict, deque
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient Ollama errors.
+
+    A call is attempted at most ``max_attempts`` times; the n-th retry waits
+    a random time between 0 and ``min(max_delay, base_delay * 2 ** (n - 1))``
+    so that calls failing together do not come back together.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int | None = None,
+        base_delay: float | None = None,
+        max_delay: float | None = None,
+    ):
+        self.max_attempts = (
+            max_attempts
+            if max_attempts is not None
+            else int(os.getenv("OLLAMA_RETRY_ATTEMPTS", "3"))
+        )
+        self.base_delay = (
+            base_delay
+            if base_delay is not None
+            else float(os.getenv("OLLAMA_RETRY_BASE_SECONDS", "1"))
+        )
+        self.max_delay = (
+            max_delay
+            if max_delay is not None
+            else float(os.getenv("OLLAMA_RETRY_MAX_SECONDS", "30"))
+        )
+        self.retries = 0
+        self.denied = 0
+
+    def delay(self, retry: int) -> float:
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        )
+
+
+class RetryBudget:
+    """Retries one batch may still spend, shared by all of its calls.
+
+    Keeps a batch against a failing node from multiplying its load by the
+    number of attempts per call.
+    """
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+
+    def spend(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+class RetryBudgets:
+    """Budgets per batch, created on first use; the least recently used are
+    forgotten once ``max_batches`` are kept."""
+
+    def __init__(self, retries: int | None = None, max_batches: int = 1024):
+        self.retries = (
+            retries
+            if retries is not None
+            else int(os.getenv("OLLAMA_RETRY_BUDGET", "10"))
+        )
+        self.max_batches = max_batches
+        self._budgets: OrderedDict[int, RetryBudget] = OrderedDict()
+
+    def for_batch(self, batch_id: int) -> RetryBudget:
+        budget = self._budgets.get(batch_id)
+        if budget is None:
+            budget = RetryBudget(self.retries)
+            self._budgets[batch_id] = budget
+            while len(self._budgets) > self.max_batches:
+                self._budgets.popitem(last=False)
+        self._budgets.move_to_end(batch_id)
+        return budget
+
+
+class HedgePolicy:
+    """When a call is slow enough to get a duplicate on another host.
+
+    A call that has not finished after the ``quantile`` of the recent call
+    latencies is sent to a second host as well; the first answer is used and
+    the other call is cancelled. Off unless ``OLLAMA_HEDGE`` is set, since
+    every hedge spends GPU time on a second host.
+    """
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        quantile: float | None = None,
+        min_samples: int | None = None,
+        window: int = 200,
+    ):
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else os.getenv("OLLAMA_HEDGE", "false").lower()
+            in ("1", "true", "yes", "on")
+        )
+        self.quantile = (
+            quantile
+            if quantile is not None
+            else float(os.getenv("OLLAMA_HEDGE_QUANTILE", "0.95"))
+        )
+        self.min_samples = (
+            min_samples
+            if min_samples is not None
+            else int(os.getenv("OLLAMA_HEDGE_MIN_SAMPLES", "20"))
+        )
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.hedges = 0
+        self.wins = 0
+
+    def record(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def latency(self) -> float | None:
+        """The ``quantile`` of the recent latencies, once there are enough."""
+        if len(self._latencies) < max(self.min_samples, 1):
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(self.quantile * len(latencies)))]
+
+    def delay(self) -> float | None:
+        """Seconds after which a call is hedged, or None for no hedging."""
+        return self.latency() if self.enabled else None
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from schema import SchedulerHostStats
+
+
+@dataclass
+class SlotTicket:
+    """Handed out by AdaptiveLimiter.acquire(); identifies one in-flight call."""
+
+    limiter: "AdaptiveLimiter"
+    started_at: float = field(default_factory=time.monotonic)
+    reported: bool = False
+
+    def record_response(self, response: Mapping[str, Any]) -> None:
+        """Feed Ollama's timing fields for this call back into the controller."""
+        self.limiter.on_success(
+            self,
+            total_ns=response.get("total_duration"),
+            load_ns=response.get("load_duration"),
+            prompt_eval_ns=response.get("prompt_eval_duration"),
+            eval_ns=response.get("eval_duration"),
+        )
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for calls to a single Ollama host.
+
+    Ollama reports how long a request spent loading the model, evaluating the
+    prompt and generating, while total_duration also includes the time the
+    request waited for a free runner slot on the server. When that waiting
+    share exceeds ``queueing_threshold``, or a call fails, the limit is cut by
+    ``backoff``. Otherwise it grows by roughly one per round of calls.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        backoff: float = 0.7,
+        queueing_threshold: float = 0.2,
+        error_alpha: float = 0.1,
+    ):
+        self.host = host
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.queueing_threshold = queueing_threshold
+        self.error_alpha = error_alpha
+
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiting = 0
+        self._cond = asyncio.Condition()
+        self._last_decrease_at = 0.0
+
+        self.successes = 0
+        self.errors = 0
+        self.error_rate = 0.0
+        self.queueing_ratio: float | None = None
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> SlotTicket:
+        async with self._cond:
+            self._waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+        return SlotTicket(limiter=self)
+
+    async def release(self, ticket: SlotTicket) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(
+        self,
+        ticket: SlotTicket,
+        total_ns: int | None,
+        load_ns: int | None,
+        prompt_eval_ns: int | None,
+        eval_ns: int | None,
+    ) -> None:
+        if ticket.reported:
+            return
+        ticket.reported = True
+        self.successes += 1
+        self.error_rate *= 1 - self.error_alpha
+
+        if total_ns:
+            busy_ns = (load_ns or 0) + (prompt_eval_ns or 0) + (eval_ns or 0)
+            self.queueing_ratio = max(0.0, (total_ns - busy_ns) / total_ns)
+            if self.queueing_ratio > self.queueing_threshold:
+                self._decrease(ticket)
+                return
+
+        self._increase()
+
+    def on_error(self, ticket: SlotTicket) -> None:
+        if ticket.reported:
+            return
+        ticket.reported = True
+        self.errors += 1
+        self.error_rate = self.error_rate * (1 - self.error_alpha) + self.error_alpha
+        self._decrease(ticket)
+
+    def _increase(self) -> None:
+        self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+
+    def _decrease(self, ticket: SlotTicket) -> None:
+        # Calls that were already running when the limit was last cut reflect
+        # the old limit; letting each of them cut again would collapse the
+        # limit after a single overloaded round.
+        if ticket.started_at < self._last_decrease_at:
+            return
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        self._last_decrease_at = time.monotonic()
+
+    def stats(self) -> SchedulerHostStats:
+        return SchedulerHostStats(
+            host=self.host,
+            limit=self.limit,
+            in_flight=self._in_flight,
+            queue_depth=self._waiting,
+            min_limit=self.min_limit,
+            max_limit=self.max_limit,
+            successes=self.successes,
+            errors=self.errors,
+            error_rate=round(self.error_rate, 4),
+            queueing_ratio=(
+                round(self.queueing_ratio, 4)
+                if self.queueing_ratio is not None
+                else None
+            ),
+        )
+
+
+class OllamaScheduler:
+    """Keeps one AdaptiveLimiter per Ollama host."""
+
+    def __init__(
+        self,
+        initial: int | None = None,
+        min_limit: int | None = None,
+        max_limit: int | None = None,
+    ):
+        self.initial = initial or int(os.getenv("OLLAMA_CONCURRENCY_INITIAL", "3"))
+        self.min_limit = min_limit or int(os.getenv("OLLAMA_CONCURRENCY_MIN", "1"))
+        self.max_limit = max_limit or int(os.getenv("OLLAMA_CONCURRENCY_MAX", "16"))
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+
+    def limiter(self, host: str) -> AdaptiveLimiter:
+        if host not in self._limiters:
+            self._limiters[host] = AdaptiveLimiter(
+                host,
+                initial=self.initial,
+                min_limit=self.min_limit,
+                max_limit=self.max_limit,
+            )
+        return self._limiters[host]
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[SlotTicket]:
+        """Hold one in-flight slot on ``host`` for the duration of the block.
+
+        An exception leaving the block counts as an error for the controller.
+        Call ``ticket.record_response(...)`` on success to report timings.
+        """
+        limiter = self.limiter(host)
+        ticket = await limiter.acquire()
+        try:
+            yield ticket
+        except Exception:
+            limiter.on_error(ticket)
+            raise
+        finally:
+            await limiter.release(ticket)
+
+    def stats(self) -> list[SchedulerHostStats]:
+        return [limiter.stats() for limiter in self._limiters.values()]
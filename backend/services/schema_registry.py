@@ -0,0 +1,161 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from pydantic.json_schema import JsonSchemaValue
+
+from schema import ValidationIssue
+
+# Fields the model must always return for an issue to be usable.
+_REQUIRED_ISSUE_FIELDS = {
+    name for name, field in ValidationIssue.model_fields.items() if field.is_required()
+}
+
+
+@dataclass(frozen=True)
+class FormatSchema:
+    path: Path
+    schema: JsonSchemaValue
+    mtime_ns: int
+    size: int
+
+
+def load_format_schema(path: Path) -> FormatSchema:
+    """Read a format schema and check that its output parses into issues."""
+    if not path.exists():
+        raise FileNotFoundError(f"Schema file not found: {path}")
+    stat = path.stat()
+    with path.open("r", encoding="utf-8") as f:
+        try:
+            schema = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON schema in the file {path}: {e}") from e
+    check_format_schema(schema, path)
+    return FormatSchema(path, schema, stat.st_mtime_ns, stat.st_size)
+
+
+def check_format_schema(schema: JsonSchemaValue, path: Path) -> None:
+    """The model's answer is read as ``{"has_issues": ..., "issues": [...]}``
+    with ValidationIssue items; a schema describing anything else is rejected."""
+
+    def invalid(reason: str) -> ValueError:
+        return ValueError(f"Invalid format schema in the file {path}: {reason}")
+
+    if not isinstance(schema, dict) or schema.get("type") != "object":
+        raise invalid('the root must be {"type": "object"}')
+    properties = schema.get("properties") or {}
+    missing = {"has_issues", "issues"} - set(schema.get("required") or [])
+    if missing or not {"has_issues", "issues"} <= properties.keys():
+        raise invalid('"has_issues" and "issues" must be required properties')
+    items = properties["issues"].get("items")
+    if properties["issues"].get("type") != "array" or not isinstance(items, dict):
+        raise invalid('"issues" must be an array of objects')
+    unknown = set(items.get("properties") or {}) - ValidationIssue.model_fields.keys()
+    if unknown:
+        raise invalid(f"unknown issue properties {sorted(unknown)}")
+    missing = _REQUIRED_ISSUE_FIELDS - set(items.get("required") or [])
+    if missing:
+        raise invalid(f"issue properties {sorted(missing)} must be required")
+
+
+class FormatSchemaRegistry:
+    """Output schemas, read once and reloaded when their files change.
+
+    A prompt ``prompts/<category>/<name>.txt`` uses the first schema found of
+      - ``prompts/<category>/<name>.schema.json``
+      - ``prompts/<category>/schema.json``
+      - the default schema (``OLLAMA_FORMAT_PATH``)
+
+    Files are checked for changes (mtime and size) at most every
+    ``FORMAT_SCHEMA_RELOAD_SECONDS``. A file that becomes invalid keeps its
+    last valid version, so an edit in progress does not fail prompts.
+    """
+
+    def __init__(
+        self,
+        default_path: Path,
+        prompts_dir: Path,
+        reload_seconds: float | None = None,
+    ):
+        self.default_path = default_path
+        self.prompts_dir = prompts_dir
+        self.reload_seconds = (
+            reload_seconds
+            if reload_seconds is not None
+            else float(os.getenv("FORMAT_SCHEMA_RELOAD_SECONDS", "5"))
+        )
+        # None marks a candidate override that does not exist (yet)
+        self._files: dict[Path, FormatSchema | None] = {}
+        self._resolved: dict[tuple[str, str], FormatSchema] = {}
+        self._checked_at = time.monotonic()
+
+        # Fail at startup, not on the first prompt, for a broken schema.
+        self.default = load_format_schema(default_path)
+        self._files[default_path] = self.default
+        if prompts_dir.exists():
+            for path in prompts_dir.glob("*/*.json"):
+                if path.name.endswith(".schema.json") or path.name == "schema.json":
+                    self._files[path] = load_format_schema(path)
+
+    def get(self, category: str, name: str) -> FormatSchema:
+        """The schema the prompt ``category::name`` is answered in."""
+        self._refresh()
+        key = (category, name)
+        format_schema = self._resolved.get(key)
+        if format_schema is None:
+            format_schema = self._resolve(category, name)
+            self._resolved[key] = format_schema
+        return format_schema
+
+    def _resolve(self, category: str, name: str) -> FormatSchema:
+        category_dir = self.prompts_dir / category
+        for path in (
+            category_dir / f"{name}.schema.json",
+            category_dir / "schema.json",
+        ):
+            if path not in self._files:
+                self._files[path] = self._load(path) if path.exists() else None
+            if self._files[path] is not None:
+                return self._files[path]
+        return self.default
+
+    def _load(self, path: Path) -> FormatSchema | None:
+        try:
+            return load_format_schema(path)
+        except (OSError, ValueError) as e:
+            # TODO NEED LOGGING
+            print(f"Ignoring format schema {path}: {e}")
+            return self._files.get(path)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+
+        changed = False
+        for path, current in list(self._files.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                if current is not None and path != self.default_path:
+                    self._files[path] = None
+                    changed = True
+                continue
+            if (
+                current is not None
+                and current.mtime_ns == stat.st_mtime_ns
+                and current.size == stat.st_size
+            ):
+                continue
+            reloaded = self._load(path)
+            if reloaded is not current:
+                print(f"Format schema reloaded: {path}")
+                self._files[path] = reloaded
+                if path == self.default_path and reloaded is not None:
+                    self.default = reloaded
+                changed = True
+        if changed:
+            self._resolved.clear()
@@ -0,0 +1,163 @@
+from sqlalchemy import (
+    Select,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import (
+    FileBlobORM,
+    ValidationFileORM,
+    file_search_table,
+    search_index_table,
+)
+from schema import ValidationIssue
+
+# trigrams: shorter queries cannot match anything
+MIN_QUERY_LENGTH = 3
+
+
+class SearchIndex:
+    """Full-text index over file names, file contents and issues of batches.
+
+    File names are indexed when a batch is created, and issues whenever a
+    prompt reaches a terminal state. File contents are indexed once per blob,
+    when the blob is first uploaded, and reach their batches through
+    validation_files. Without FTS5 (or on other databases) nothing is indexed
+    and ``usable`` is False, so callers fall back to file name matching.
+    """
+
+    def __init__(self):
+        self._available: bool | None = None
+
+    async def available(self, db: AsyncSession) -> bool:
+        if self._available is None:
+            if db.bind.dialect.name != "sqlite":
+                self._available = False
+            else:
+                self._available = (
+                    await db.execute(
+                        text(
+                            "SELECT count(*) FROM sqlite_master WHERE type = 'table'"
+                            " AND name IN ('search_index', 'file_search')"
+                        )
+                    )
+                ).scalar_one() == 2
+        return self._available
+
+    async def usable(self, query: str | None, db: AsyncSession) -> bool:
+        return (
+            query is not None
+            and len(query.strip()) >= MIN_QUERY_LENGTH
+            and await self.available(db)
+        )
+
+    async def add_files(
+        self,
+        batch_id: int,
+        files: list[tuple[str, FileBlobORM, str]],
+        db: AsyncSession,
+    ) -> None:
+        """Index the (file_name, blob, content) triples of a new batch.
+
+        Contents of blobs that are already indexed are not indexed again.
+        """
+        if not files or not await self.available(db):
+            return
+        await db.execute(
+            insert(search_index_table),
+            [
+                {"batch_id": batch_id, "file_name": file_name}
+                for file_name, _, _ in files
+            ],
+        )
+        for _, blob, content in files:
+            if blob.search_id is None:
+                result = await db.execute(
+                    insert(file_search_table).values(content=content)
+                )
+                blob.search_id = result.lastrowid
+
+    async def remove_contents(
+        self, contents: list[tuple[int, str]], db: AsyncSession
+    ) -> None:
+        """Drop the (search_id, content) pairs of blobs about to be deleted.
+
+        file_search is contentless, so a row can only be removed by passing
+        the content it was indexed with.
+        """
+        if not contents or not await self.available(db):
+            return
+        await db.execute(
+            text(
+                "INSERT INTO file_search(file_search, rowid, content)"
+                " VALUES ('delete', :rowid, :content)"
+            ),
+            [{"rowid": rowid, "content": content} for rowid, content in contents],
+        )
+
+    async def replace_issues(
+        self,
+        batch_id: int,
+        prompt_index: int,
+        issues: list[ValidationIssue],
+        db: AsyncSession,
+    ) -> None:
+        """Index the issues of a prompt, replacing those of an earlier result."""
+        if not await self.available(db):
+            return
+        await db.execute(
+            delete(search_index_table).where(
+                search_index_table.c.batch_id == batch_id,
+                search_index_table.c.prompt_index == prompt_index,
+            )
+        )
+        if not issues:
+            return
+        await db.execute(
+            insert(search_index_table),
+            [
+                {
+                    "batch_id": batch_id,
+                    "prompt_index": prompt_index,
+                    "file_name": issue.file,
+                    "content": issue.content,
+                    "description": issue.description,
+                }
+                for issue in issues
+            ],
+        )
+
+    def matches(self, query: str) -> Select:
+        """Batches matching ``query`` with their best rank (lower is better).
+
+        The query is matched as a phrase, so FTS5 operators in it have no
+        effect.
+        """
+        phrase = '"' + query.strip().replace('"', '""') + '"'
+        names_and_issues = select(
+            search_index_table.c.batch_id.label("batch_id"),
+            search_index_table.c.rank.label("rank"),
+        ).where(literal_column("search_index").op("MATCH")(phrase))
+        contents = (
+            select(
+                ValidationFileORM.batch_id.label("batch_id"),
+                file_search_table.c.rank.label("rank"),
+            )
+            .select_from(file_search_table)
+            .join(FileBlobORM, FileBlobORM.search_id == file_search_table.c.rowid)
+            .join(ValidationFileORM, ValidationFileORM.sha256 == FileBlobORM.sha256)
+            .where(literal_column("file_search").op("MATCH")(phrase))
+        )
+        hits = union_all(names_and_issues, contents).subquery()
+        return select(hits.c.batch_id, func.min(hits.c.rank).label("rank")).group_by(
+            hits.c.batch_id
+        )
+
+
+search_index = SearchIndex()
@@ -0,0 +1,51 @@
+import os
+from collections import OrderedDict
+
+
+class BatchSnapshotCache:
+    """In-process LRU of serialized /logs/batches/{id} responses.
+
+    Entries are keyed on the batch version, so a stale one is never served
+    even when a write happened in another process; ``invalidate`` frees the
+    entry as soon as a write of this process is committed.
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("BATCH_SNAPSHOT_CACHE_SIZE", "256"))
+        )
+        self._entries: OrderedDict[int, tuple[int, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, batch_id: int, version: int) -> bytes | None:
+        entry = self._entries.get(batch_id)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(batch_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, batch_id: int, version: int, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        entry = self._entries.get(batch_id)
+        if entry is not None and entry[0] > version:
+            # a slower request must not replace a newer snapshot
+            return
+        self._entries[batch_id] = (version, body)
+        self._entries.move_to_end(batch_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, batch_id: int) -> None:
+        self._entries.pop(batch_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+batch_snapshots = BatchSnapshotCache()
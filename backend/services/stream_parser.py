@@ -0,0 +1,104 @@
+import json
+
+
+class IncrementalIssueParser:
+    """Pull completed elements of the top-level "issues" array out of a JSON
+    document that is still being streamed.
+
+    Feed response fragments in order; each call returns the issue objects whose
+    closing brace arrived in that fragment. Elements that are not valid JSON on
+    their own are skipped here and left to the full parse at the end.
+    """
+
+    def __init__(self, key: str = "issues"):
+        self.key = key
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: int | None = None
+        self._expect_key = False
+        self._current_key: str | None = None
+        self._array_depth: int | None = None
+        self._element_start: int | None = None
+        # Only the text of the element currently being read is kept.
+        self._buf = ""
+
+    def feed(self, chunk: str) -> list[dict]:
+        completed: list[dict] = []
+        start = len(self._buf)
+        self._buf += chunk
+
+        for i in range(start, len(self._buf)):
+            ch = self._buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._current_key = self._buf[self._string_start + 1 : i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "{" and self._depth == 1:
+                    self._expect_key = True
+                elif (
+                    ch == "["
+                    and self._depth == 2
+                    and self._current_key == self.key
+                    and self._array_depth is None
+                ):
+                    self._array_depth = 2
+                elif (
+                    ch == "{"
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._element_start = i
+            elif ch in "}]":
+                if (
+                    ch == "}"
+                    and self._element_start is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    element = self._buf[self._element_start : i + 1]
+                    self._element_start = None
+                    try:
+                        item = json.loads(element)
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        completed.append(item)
+                elif ch == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+            elif self._depth == 1:
+                if ch == ",":
+                    self._expect_key = True
+                elif ch == ":":
+                    self._expect_key = False
+
+        self._trim()
+        return completed
+
+    def _trim(self) -> None:
+        # Drop text that can no longer be part of an element or key.
+        if not self._in_string:
+            self._string_start = None
+        keep_from = len(self._buf)
+        for pos in (self._element_start, self._string_start):
+            if pos is not None:
+                keep_from = min(keep_from, pos)
+        if keep_from:
+            self._buf = self._buf[keep_from:]
+            if self._element_start is not None:
+                self._element_start -= keep_from
+            if self._string_start is not None:
+                self._string_start -= keep_from
@@ -1,5 +1,48 @@
 import hashlib
+import json
+from typing import Any
+
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # optional dependency, see the "orjson" extra
+    orjson = None
 
 
 def calc_sha256(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
+
+
+def dumps_json(data: Any) -> bytes:
+    """Encode JSON-ready data (dicts, lists, strings, numbers, enums).
+
+    Uses orjson when installed, otherwise pydantic's encoder; both are much
+    faster than the standard library on large payloads.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return to_json(data)
+
+
+def loads_json(text: str | bytes) -> Any:
+    """Decode JSON strictly; raises json.JSONDecodeError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(text)  # orjson.JSONDecodeError is a subclass
+    return json.loads(text)
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    # no-cache: browsers keep the response but revalidate it with the ETag
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as for GET
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
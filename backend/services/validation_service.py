@@ -1,28 +1,66 @@
-from datetime import UTC
-
-from models.database import ValidationBatchORM, ValidationFileORM, db_dependency
+import os
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import selectinload
+
+from models.database import (
+    BatchIssueTypeORM,
+    ValidationBatchORM,
+    ValidationFileORM,
+    ValidationPromptResultORM,
+    db_dependency,
+)
 from schema import (
     PromptInfo,
     Status,
-    ValidationBatchModel,
     ValidationBatchResponse,
     ValidationFile,
-    ValidationFileId,
     ValidationFileModel,
+    ValidationIssue,
     ValidationPromptResult,
 )
+from services.blob_store import BlobStore
 from services.converter import (
     batch_orm_to_schema,
     file_orm_to_schema,
+    prompt_result_orm_to_schema,
+    prompt_result_to_orm,
+    prompt_result_values,
 )
+from services.events import batch_events
 from services.ollama_service import OllamaService
 from services.prompt_service import PromptService
+from services.result_cache import ResultCache
+from services.retry import RetryBudgets
+from services.search_index import search_index
+from services.snapshot_cache import batch_snapshots
+from services.utils import calc_sha256
+from services.write_behind import WriteBehindCommitter
+
+TERMINAL_STATUSES = (Status.completed, Status.failed, Status.cancelled)
 
 
 class ValidationService:
     def __init__(self):
         self.ollama_service = OllamaService()
         self.prompt_service = PromptService()
+        self.result_cache = ResultCache()
+        self.blob_store = BlobStore()
+        # Prompt progress from all running jobs is committed in shared
+        # transactions instead of one commit per update.
+        self.committer = WriteBehindCommitter()
+        # Fused mode answers several prompts of a batch in one request, so the
+        # files are evaluated once instead of once per prompt.
+        self.fuse_prompts = os.getenv("VALIDATION_FUSE_PROMPTS", "false").lower() in (
+            "1",
+            "true",
+            "yes",
+            "on",
+        )
+        self.fuse_max_prompts = int(os.getenv("VALIDATION_FUSE_MAX_PROMPTS", "6"))
+        # One failing batch may only retry so many Ollama calls in total.
+        self.retry_budgets = RetryBudgets()
 
     @classmethod
     def _get_file_type(cls, filename: str) -> str:
@@ -43,7 +81,7 @@ class ValidationService:
         }
         return type_mapping.get(extension, "text")
 
-    def create_validation_batch_and_files(
+    async def create_validation_batch_and_files(
         self,
         file_models: list[ValidationFileModel],
         prompts: list[PromptInfo],
@@ -53,25 +91,46 @@ class ValidationService:
         batch_orm = ValidationBatchORM(
             name=batch_name,
             status=Status.waiting,
+            model=self.ollama_service.model,
             completed_prompts=0,
+            total_prompts=len(prompts),
             prompt_results=[
-                ValidationPromptResult(prompt=prompt).model_dump() for prompt in prompts
+                prompt_result_to_orm(index, ValidationPromptResult(prompt=prompt))
+                for index, prompt in enumerate(prompts)
             ],
         )
 
+        # File contents are stored once per sha256 and shared between batches.
         batch_orm.files = [
-            ValidationFileORM(**file.model_dump()) for file in file_models
+            ValidationFileORM(
+                file_name=file.file_name,
+                file_type=file.file_type,
+                sha256=file.sha256,
+                created_at=file.created_at,
+                blob=await self.blob_store.put(
+                    file.sha256, file.content.encode("utf-8"), db
+                ),
+            )
+            for file in file_models
         ]
 
         db.add(batch_orm)
-        db.flush()
+        await db.flush()
+        await search_index.add_files(
+            batch_orm.id,
+            [
+                (file_orm.file_name, file_orm.blob, file.content)
+                for file_orm, file in zip(batch_orm.files, file_models, strict=True)
+            ],
+            db,
+        )
 
         files: list[ValidationFile] = [
             file_orm_to_schema(file_orm) for file_orm in batch_orm.files
         ]
 
-        db.refresh(batch_orm)
-        db.commit()
+        await db.refresh(batch_orm)
+        await db.commit()
 
         return (batch_orm_to_schema(batch_orm), files)
 
@@ -104,6 +163,54 @@ class ValidationService:
 
         # return (batch_orm_to_schema(batch_orm), files)
 
+    async def process_job(
+        self, batch_id: int, prompt_indices: list[int], db: db_dependency
+    ) -> None:
+        """Run one queued job, loading its inputs from the DB.
+
+        A job with several prompt indices is a fused job.
+        """
+        pr_orms = (
+            await db.scalars(
+                select(ValidationPromptResultORM)
+                .where(
+                    ValidationPromptResultORM.batch_id == batch_id,
+                    ValidationPromptResultORM.prompt_index.in_(prompt_indices),
+                )
+                .order_by(ValidationPromptResultORM.prompt_index)
+                .execution_options(populate_existing=True)
+            )
+        ).all()
+        if not pr_orms:
+            raise ValueError(f"Batch with ID {batch_id} not found")
+
+        # Prompts already recorded by an earlier attempt that died before the
+        # job itself was marked done are skipped.
+        pending: list[tuple[int, ValidationPromptResult]] = [
+            (pr_orm.prompt_index, prompt_result_orm_to_schema(pr_orm))
+            for pr_orm in pr_orms
+            if pr_orm.status not in TERMINAL_STATUSES
+        ]
+        if not pending:
+            return
+
+        file_orms = (
+            await db.scalars(
+                select(ValidationFileORM)
+                .options(selectinload(ValidationFileORM.blob))
+                .where(ValidationFileORM.batch_id == batch_id)
+                .order_by(ValidationFileORM.id)
+            )
+        ).all()
+        files = [file_orm_to_schema(file_orm) for file_orm in file_orms]
+        if len(pending) == 1:
+            prompt_index, prompt_task = pending[0]
+            await self.process_file_validation(
+                batch_id, prompt_task, prompt_index, files, db
+            )
+        else:
+            await self.process_fused_file_validation(batch_id, pending, files, db)
+
     async def process_file_validation(
         self,
         batch_id: int,
@@ -124,66 +231,572 @@ class ValidationService:
                 f"Prompt '{prompt_info.category}::{prompt_info.name}' not found"
             )
 
+        # Only deterministic generation (temperature 0, fixed seed) may be
+        # answered from the cache.
+        cache_key: str | None = None
+        if self.ollama_service.is_deterministic():
+            cache_key = self.ollama_service.result_cache_key(
+                self.ollama_service.format_schema(prompt_info),
+                prompt_content_resp.sha256,
+                [file.sha256 for file in files],
+            )
+            cached = await self.result_cache.get(cache_key, db)
+            if cached is not None:
+                cached.apply_to(prompt_task)
+                await self.save_prompt_result(batch_id, prompt_task, prompt_index)
+                return
+
+        async def persist_partial(issues: list[ValidationIssue]) -> None:
+            # Reviewers see findings while the model is still generating.
+            prompt_task.result = issues
+            await self.save_prompt_result(
+                batch_id, prompt_task, prompt_index, final=False
+            )
+
         await self.ollama_service.validate_files_with_prompt(
-            files, prompt_info, prompt_content_resp.content, prompt_task
+            files,
+            prompt_info,
+            prompt_content_resp.content,
+            prompt_task,
+            on_partial=persist_partial,
+            retry_budget=self.retry_budgets.for_batch(batch_id),
         )
 
-        batch: ValidationBatchORM | None = db.get(ValidationBatchORM, batch_id)
-        if not batch:
-            raise ValueError(f"Batch with ID {batch_id} not found")
+        if cache_key is not None:
+            await self.result_cache.put(
+                cache_key, self.ollama_service.model, prompt_task, db
+            )
+        await self.save_prompt_result(batch_id, prompt_task, prompt_index)
 
-        updated_results = batch.prompt_results.copy()
-        updated_results[prompt_index] = prompt_task.model_dump()
-        batch.prompt_results = updated_results
+        return
 
-        batch.completed_prompts += 1
-        if batch.completed_prompts >= len(batch.prompt_results):
-            batch.status = Status.completed
-        db.commit()
-        db.refresh(batch)
+    async def process_fused_file_validation(
+        self,
+        batch_id: int,
+        prompt_tasks: list[tuple[int, ValidationPromptResult]],
+        files: list[ValidationFile],
+        db: db_dependency,
+    ) -> None:
+        """Validate files with several prompts in one request per window."""
+        prompts: list[tuple[PromptInfo, str]] = []
+        prompt_sha256s: list[str] = []
+        for _, prompt_task in prompt_tasks:
+            prompt_info = prompt_task.prompt
+            prompt_content_resp = self.prompt_service.load_prompt_content(
+                prompt_info.name, prompt_info.category
+            )
+            if prompt_content_resp is None:
+                # TODO need to create proper error
+                raise ValueError(
+                    f"Prompt '{prompt_info.category}::{prompt_info.name}' not found"
+                )
+            prompts.append((prompt_info, prompt_content_resp.content))
+            prompt_sha256s.append(prompt_content_resp.sha256)
+
+        # A fused answer depends on every prompt it was generated with, so each
+        # section is cached under the whole set of prompts.
+        cache_keys: list[str] | None = None
+        if self.ollama_service.is_deterministic():
+            fused_sha256 = calc_sha256("\n".join(prompt_sha256s).encode("utf-8"))
+            file_sha256s = [file.sha256 for file in files]
+            format_schema = self.ollama_service.fused_format_schema(
+                [prompt_info for prompt_info, _ in prompts]
+            )
+            cache_keys = [
+                self.ollama_service.result_cache_key(
+                    format_schema,
+                    calc_sha256(f"fused:{fused_sha256}:{position}".encode()),
+                    file_sha256s,
+                )
+                for position in range(len(prompt_tasks))
+            ]
+            cached = [await self.result_cache.get(key, db) for key in cache_keys]
+            if all(entry is not None for entry in cached):
+                for (prompt_index, prompt_task), entry in zip(
+                    prompt_tasks, cached, strict=True
+                ):
+                    entry.apply_to(prompt_task)
+                    prompt_task.fused = True
+                    await self.save_prompt_result(batch_id, prompt_task, prompt_index)
+                return
+
+        await self.ollama_service.validate_files_with_prompts(
+            files,
+            prompts,
+            [prompt_task for _, prompt_task in prompt_tasks],
+            retry_budget=self.retry_budgets.for_batch(batch_id),
+        )
 
-        return
+        for position, (prompt_index, prompt_task) in enumerate(prompt_tasks):
+            if cache_keys is not None:
+                await self.result_cache.put(
+                    cache_keys[position], self.ollama_service.model, prompt_task, db
+                )
+            await self.save_prompt_result(batch_id, prompt_task, prompt_index)
+
+    async def save_prompt_result(
+        self,
+        batch_id: int,
+        prompt_task: ValidationPromptResult,
+        prompt_index: int,
+        final: bool = True,
+        batch_status: Status = Status.completed,
+        only_if_pending: bool = False,
+    ) -> bool:
+        """Write a prompt's state through the committer and publish it.
+
+        ``final`` results count towards batch completion; partial ones only
+        replace the stored issues, and a newer partial result replaces one
+        that has not been committed yet. ``batch_status`` is what the batch
+        becomes when this is its last prompt to finish. With
+        ``only_if_pending`` a prompt that already finished is left as it is.
+
+        Returns False if the write was dropped because the prompt was
+        cancelled, or because of ``only_if_pending``.
+        """
+        # prompt_task keeps changing while the model streams
+        prompt_result = prompt_task.model_copy(deep=True)
+        if final:
+            progress = await self.committer.run(
+                lambda db: _record_prompt_result(
+                    batch_id,
+                    prompt_result,
+                    prompt_index,
+                    db,
+                    batch_status,
+                    only_if_pending,
+                )
+            )
+        else:
+            progress = await self.committer.run(
+                lambda db: _update_prompt_result(
+                    batch_id, prompt_result, prompt_index, db
+                ),
+                key=("partial", batch_id, prompt_index),
+            )
+        if progress is None:
+            return False
+        _publish_prompt(batch_id, prompt_result, prompt_index, progress)
+        return True
+
+    async def fail_prompt(
+        self, batch_id: int, prompt_index: int, error_message: str, db: db_dependency
+    ) -> None:
+        """Record a prompt as failed when its job could not be run at all.
+
+        Prompts that already finished, e.g. earlier sections of a fused job,
+        keep their results.
+        """
+        pr_orm = await _get_prompt_result(batch_id, prompt_index, db)
+        if pr_orm is None or pr_orm.status in TERMINAL_STATUSES:
+            return
+
+        prompt_task = prompt_result_orm_to_schema(pr_orm)
+        prompt_task.status = Status.failed
+        prompt_task.error_message = error_message
+        await self.save_prompt_result(
+            batch_id, prompt_task, prompt_index, only_if_pending=True
+        )
+
+    async def cancel(
+        self, batch_id: int, prompt_index: int | None, db: db_dependency
+    ) -> list[int]:
+        """Record the unfinished prompts of a batch, or only the prompt
+        ``prompt_index``, as cancelled.
+
+        Returns the indices of the prompts that were cancelled. A prompt that
+        finishes first keeps its result, and a cancelled prompt keeps its
+        state when its job still answers later. Cancelling every prompt of a
+        batch leaves the batch cancelled; cancelling one prompt completes the
+        batch as usual if it was the last one running.
+        """
+        query = select(ValidationPromptResultORM).where(
+            ValidationPromptResultORM.batch_id == batch_id
+        )
+        if prompt_index is not None:
+            query = query.where(ValidationPromptResultORM.prompt_index == prompt_index)
+        query = query.order_by(ValidationPromptResultORM.prompt_index)
+        pr_orms = (
+            await db.scalars(query.execution_options(populate_existing=True))
+        ).all()
+        if not pr_orms:
+            if prompt_index is None:
+                raise ValueError(f"Batch with ID {batch_id} not found")
+            raise ValueError(
+                f"Prompt {prompt_index} of batch with ID {batch_id} not found"
+            )
+
+        batch_status = Status.cancelled if prompt_index is None else Status.completed
+        cancelled: list[int] = []
+        for pr_orm in pr_orms:
+            if pr_orm.status in TERMINAL_STATUSES:
+                continue
+            prompt_task = prompt_result_orm_to_schema(pr_orm)
+            prompt_task.status = Status.cancelled
+            prompt_task.error_message = "Cancelled"
+            if await self.save_prompt_result(
+                batch_id,
+                prompt_task,
+                pr_orm.prompt_index,
+                batch_status=batch_status,
+                only_if_pending=True,
+            ):
+                cancelled.append(pr_orm.prompt_index)
+        return cancelled
+
+    async def finished_prompts(self, batch_id: int, db: db_dependency) -> set[int]:
+        """Indices of the prompts of a batch that are in a terminal state."""
+        return set(
+            await db.scalars(
+                select(ValidationPromptResultORM.prompt_index).where(
+                    ValidationPromptResultORM.batch_id == batch_id,
+                    ValidationPromptResultORM.status.in_(TERMINAL_STATUSES),
+                )
+            )
+        )
 
 
-def change_batch_status(
+async def change_batch_status(
     batch_orig: ValidationBatchResponse, new_status: Status, db: db_dependency
 ) -> None:
-    batch: ValidationBatchORM | None = db.get(ValidationBatchORM, batch_orig.id)
-    if not batch:
+    result = await db.execute(
+        update(ValidationBatchORM)
+        .where(ValidationBatchORM.id == batch_orig.id)
+        .values(status=new_status, version=ValidationBatchORM.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
         raise ValueError(f"Batch with ID {batch_orig.id} not found")
-    batch.status = new_status
-    db.commit()
-    db.refresh(batch)
+    progress = await _batch_progress(batch_orig.id, db)
+    await db.commit()
+    batch_snapshots.invalidate(batch_orig.id)
 
     batch_orig.status = new_status
+    batch_events.publish(batch_orig.id, "status", progress)
 
 
-def increment_completed_prompts_of_batch(batch_id: int, db: db_dependency) -> None:
-    batch: ValidationBatchORM | None = db.get(ValidationBatchORM, batch_id)
-    if not batch:
+async def increment_completed_prompts_of_batch(
+    batch_id: int, db: db_dependency
+) -> None:
+    # Incremented in SQL so that concurrent completions cannot lose updates.
+    result = await db.execute(
+        update(ValidationBatchORM)
+        .where(ValidationBatchORM.id == batch_id)
+        .values(
+            completed_prompts=ValidationBatchORM.completed_prompts + 1,
+            version=ValidationBatchORM.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
         raise ValueError(f"Batch with ID {batch_id} not found")
-    batch.completed_prompts += 1
-    db.commit()
-    db.refresh(batch)
+    await db.commit()
+    batch_snapshots.invalidate(batch_id)
 
     return
 
 
-def update_prompt_result_of_batch(
+async def _get_prompt_result(
+    batch_id: int, prompt_index: int, db: db_dependency
+) -> ValidationPromptResultORM | None:
+    return (
+        await db.scalars(
+            select(ValidationPromptResultORM)
+            .where(
+                ValidationPromptResultORM.batch_id == batch_id,
+                ValidationPromptResultORM.prompt_index == prompt_index,
+            )
+            .execution_options(populate_existing=True)
+        )
+    ).one_or_none()
+
+
+async def _write_prompt_result(
+    batch_id: int,
+    prompt_result: ValidationPromptResult,
+    prompt_index: int,
+    db: db_dependency,
+    only_if_pending: bool = False,
+) -> bool:
+    """UPDATE one prompt's row. Returns whether a row was changed.
+
+    The row is stamped with the batch version the write will produce; the
+    caller increments the batch version in the same transaction. Cancelled
+    rows are never changed.
+    """
+    stmt = update(ValidationPromptResultORM).where(
+        ValidationPromptResultORM.batch_id == batch_id,
+        ValidationPromptResultORM.prompt_index == prompt_index,
+        ValidationPromptResultORM.status != Status.cancelled,
+    )
+    if only_if_pending:
+        stmt = stmt.where(ValidationPromptResultORM.status.not_in(TERMINAL_STATUSES))
+    result = await db.execute(
+        stmt.values(
+            **prompt_result_values(prompt_result),
+            version=_next_version(batch_id),
+            updated_at=func.current_timestamp(),
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def _prompt_exists(batch_id: int, prompt_index: int, db: db_dependency) -> bool:
+    return (
+        await db.scalar(
+            select(ValidationPromptResultORM.id).where(
+                ValidationPromptResultORM.batch_id == batch_id,
+                ValidationPromptResultORM.prompt_index == prompt_index,
+            )
+        )
+    ) is not None
+
+
+def _next_version(batch_id: int):
+    return (
+        select(ValidationBatchORM.version + 1)
+        .where(ValidationBatchORM.id == batch_id)
+        .scalar_subquery()
+    )
+
+
+async def _touch_batch(batch_id: int, db: db_dependency) -> None:
+    await db.execute(
+        update(ValidationBatchORM)
+        .where(ValidationBatchORM.id == batch_id)
+        .values(
+            updated_at=func.current_timestamp(),
+            version=ValidationBatchORM.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def update_prompt_result_of_batch(
     batch_id: int,
     prompt_result: ValidationPromptResult,
     prompt_index: int,
     db: db_dependency,
 ) -> None:
-    batch: ValidationBatchORM | None = db.get(ValidationBatchORM, batch_id)
-    if not batch:
-        raise ValueError(f"Batch with ID {batch_id} not found")
+    try:
+        progress = await _update_prompt_result(
+            batch_id, prompt_result, prompt_index, db
+        )
+    except Exception:
+        await db.rollback()
+        raise
+    await db.commit()
+    if progress is not None:
+        _publish_prompt(batch_id, prompt_result, prompt_index, progress)
+
+    return
+
 
-    updated_results = batch.prompt_results.copy()
-    updated_results[prompt_index] = prompt_result.model_dump()
-    batch.prompt_results = updated_results
+async def record_prompt_result_of_batch(
+    batch_id: int,
+    prompt_result: ValidationPromptResult,
+    prompt_index: int,
+    db: db_dependency,
+) -> None:
+    """Store a finished prompt result and count it towards batch completion.
 
-    db.commit()
-    db.refresh(batch)
+    See ``_record_prompt_result``.
+    """
+    try:
+        progress = await _record_prompt_result(
+            batch_id, prompt_result, prompt_index, db
+        )
+    except Exception:
+        await db.rollback()
+        raise
+    await db.commit()
+    if progress is not None:
+        _publish_prompt(batch_id, prompt_result, prompt_index, progress)
 
     return
+
+
+async def _update_prompt_result(
+    batch_id: int,
+    prompt_result: ValidationPromptResult,
+    prompt_index: int,
+    db: db_dependency,
+) -> dict | None:
+    """Replace a prompt's stored state without committing.
+
+    Returns None, and changes nothing, if the prompt was cancelled.
+    """
+    if not await _write_prompt_result(batch_id, prompt_result, prompt_index, db):
+        if await _prompt_exists(batch_id, prompt_index, db):
+            return None
+        raise ValueError(f"Batch with ID {batch_id} not found")
+    await _touch_batch(batch_id, db)
+    return await _batch_progress(batch_id, db)
+
+
+async def _record_prompt_result(
+    batch_id: int,
+    prompt_result: ValidationPromptResult,
+    prompt_index: int,
+    db: db_dependency,
+    batch_status: Status = Status.completed,
+    only_if_pending: bool = False,
+) -> dict | None:
+    """Store a finished prompt result without committing.
+
+    Returns the batch progress to publish once the transaction is committed,
+    or None if nothing was written: a cancelled prompt is not overwritten,
+    and with ``only_if_pending`` neither is a prompt that already finished.
+
+    Safe to call more than once for the same prompt (e.g. when a job is retried):
+    completed_prompts is only incremented the first time a prompt reaches a
+    terminal state. Both steps are conditional UPDATEs, so concurrent
+    completions of prompts of the same batch cannot overwrite each other.
+    """
+    first_time = await _write_prompt_result(
+        batch_id, prompt_result, prompt_index, db, only_if_pending=True
+    )
+    if not first_time and (
+        only_if_pending
+        or not await _write_prompt_result(batch_id, prompt_result, prompt_index, db)
+    ):
+        if await _prompt_exists(batch_id, prompt_index, db):
+            return None
+        raise ValueError(f"Batch with ID {batch_id} not found")
+
+    if prompt_result.status in TERMINAL_STATUSES:
+        # also when a retry replaces a finished result
+        await _refresh_rollups(batch_id, db)
+        await search_index.replace_issues(
+            batch_id,
+            prompt_index,
+            (prompt_result.result or [])
+            if prompt_result.status == Status.completed
+            else [],
+            db,
+        )
+    if first_time and prompt_result.status in TERMINAL_STATUSES:
+        await db.execute(
+            update(ValidationBatchORM)
+            .where(ValidationBatchORM.id == batch_id)
+            .values(
+                completed_prompts=ValidationBatchORM.completed_prompts + 1,
+                version=ValidationBatchORM.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        total_prompts = (
+            select(func.count(ValidationPromptResultORM.id))
+            .where(ValidationPromptResultORM.batch_id == batch_id)
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(ValidationBatchORM)
+            .where(
+                ValidationBatchORM.id == batch_id,
+                ValidationBatchORM.completed_prompts >= total_prompts,
+            )
+            .values(status=batch_status)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        await _touch_batch(batch_id, db)
+    return await _batch_progress(batch_id, db)
+
+
+async def _refresh_rollups(batch_id: int, db: db_dependency) -> None:
+    """Recompute a batch's issue and prompt rollups from its prompt rows.
+
+    Recomputed rather than incremented, so rewriting a prompt's result
+    cannot count its issues twice.
+    """
+    pr = ValidationPromptResultORM
+    sums = (
+        await db.execute(
+            select(
+                func.coalesce(func.sum(pr.high_issues), 0).label("high"),
+                func.coalesce(func.sum(pr.medium_issues), 0).label("medium"),
+                func.coalesce(func.sum(pr.low_issues), 0).label("low"),
+                func.count(pr.id).filter(pr.status == Status.failed).label("failed"),
+                func.coalesce(
+                    func.sum(pr.total_duration_ns).filter(pr.cached.is_(False)), 0
+                ).label("duration"),
+            ).where(pr.batch_id == batch_id)
+        )
+    ).one()
+    await db.execute(
+        update(ValidationBatchORM)
+        .where(ValidationBatchORM.id == batch_id)
+        .values(
+            high_issues=sums.high,
+            medium_issues=sums.medium,
+            low_issues=sums.low,
+            total_issues=sums.high + sums.medium + sums.low,
+            failed_prompts=sums.failed,
+            total_duration_ns=sums.duration,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    type_counts: Counter[str] = Counter()
+    for counts in await db.scalars(
+        select(pr.issue_type_counts).where(
+            pr.batch_id == batch_id, pr.issue_type_counts.is_not(None)
+        )
+    ):
+        type_counts.update(counts)
+    await db.execute(
+        delete(BatchIssueTypeORM).where(BatchIssueTypeORM.batch_id == batch_id)
+    )
+    if type_counts:
+        await db.execute(
+            insert(BatchIssueTypeORM),
+            [
+                {"batch_id": batch_id, "type": issue_type, "count": count}
+                for issue_type, count in type_counts.items()
+            ],
+        )
+
+
+async def _batch_progress(batch_id: int, db: db_dependency) -> dict:
+    row = (
+        await db.execute(
+            select(
+                ValidationBatchORM.status,
+                ValidationBatchORM.completed_prompts,
+                ValidationBatchORM.version,
+                ValidationBatchORM.updated_at,
+            ).where(ValidationBatchORM.id == batch_id)
+        )
+    ).one()
+    return {
+        "status": row.status,
+        "completed_prompts": row.completed_prompts,
+        "version": row.version,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+def _publish_prompt(
+    batch_id: int,
+    prompt_result: ValidationPromptResult,
+    prompt_index: int,
+    progress: dict,
+) -> None:
+    """Notify /logs/batches/{id}/events subscribers of one prompt's new state.
+
+    Called once the write is committed, which also makes cached snapshots of
+    the batch stale.
+    """
+    batch_snapshots.invalidate(batch_id)
+    batch_events.publish(
+        batch_id,
+        "prompt",
+        {
+            "prompt_index": prompt_index,
+            "prompt_result": prompt_result.model_dump(mode="json"),
+            **progress,
+        },
+    )
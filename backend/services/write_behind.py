@@ -0,0 +1,128 @@
+import asyncio
+import os
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models.database import SessionLocal
+
+Write = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteBehindCommitter:
+    """Groups small writes from many concurrent tasks into one transaction.
+
+    Writes submitted within ``interval_ms`` of each other are applied in
+    submission order and committed together. If one of them raises, the group
+    is rolled back and its writes are committed one by one instead, so a
+    failing write does not take the others down. ``run`` returns once the
+    write is committed. A write submitted with the ``key`` of one that is
+    still pending replaces it, so only the latest state of e.g. a streaming
+    prompt is written.
+
+    Until ``start`` is called (or with ``interval_ms`` 0) every write is
+    committed on its own immediately.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        interval_ms: float | None = None,
+    ):
+        self.session_factory = session_factory
+        if interval_ms is None:
+            interval_ms = float(os.getenv("DB_WRITE_BEHIND_MS", "50"))
+        self.interval = interval_ms / 1000
+        self._pending: dict[Hashable, tuple[Write, asyncio.Future]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._loop_task: asyncio.Task | None = None
+        self.flushes = 0
+        self.writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None
+
+    async def start(self) -> None:
+        if self.interval > 0 and self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the timer and commit whatever is still pending."""
+        if self._loop_task is not None:
+            # Not while a flush is running: its writes would be lost.
+            async with self._flush_lock:
+                self._loop_task.cancel()
+                await asyncio.gather(self._loop_task, return_exceptions=True)
+                self._loop_task = None
+        await self.flush()
+
+    async def run(self, write: Write, key: Hashable | None = None) -> Any:
+        """Apply ``write`` to a session and return its result once committed."""
+        if not self.running:
+            async with self.session_factory() as db:
+                result = await write(db)
+                await db.commit()
+                return result
+
+        if key is None:
+            key = object()
+        pending = self._pending.get(key)
+        future = (
+            pending[1]
+            if pending is not None
+            else asyncio.get_running_loop().create_future()
+        )
+        self._pending[key] = (write, future)
+        self._wakeup.set()
+        # A cancelled caller must not cancel a write other callers may share.
+        return await asyncio.shield(future)
+
+    async def _loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Commit all pending writes in one transaction."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+            outcomes: list[tuple[asyncio.Future, Any, Exception | None]] = []
+            try:
+                results = await self._commit([write for write, _ in pending])
+                outcomes = [
+                    (future, result, None)
+                    for (_, future), result in zip(pending, results, strict=True)
+                ]
+                self.flushes += 1
+            except Exception:
+                for write, future in pending:
+                    try:
+                        [result] = await self._commit([write])
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                    self.flushes += 1
+            self.writes += len(pending)
+
+            for future, result, error in outcomes:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    async def _commit(self, writes: list[Write]) -> list[Any]:
+        async with self.session_factory() as db:
+            results = [await write(db) for write in writes]
+            await db.commit()
+        return results
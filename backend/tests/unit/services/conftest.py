@@ -1,5 +1,9 @@
 import pytest
 from pathlib import Path
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, configure_sqlite
 from services.prompt_service import PromptService
 
 
@@ -93,4 +97,21 @@ def prompt_service_no_dir():
     """存在しないディレクトリ用PromptServiceインスタンス"""
     service = PromptService()
     service.prompts_dir = Path("/non/existent/directory")
-    return service
\ No newline at end of file
+    return service
+
+
+@pytest.fixture
+async def db_session():
+    """テスト用インメモリSQLiteセッション"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    configure_sqlite(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )()
+    try:
+        yield session
+    finally:
+        await session.close()
+        await engine.dispose()
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.database import (
+    FileBlobORM,
+    ValidationBatchORM,
+    ValidationFileORM,
+    file_search_table,
+)
+from schema import Status
+from services.blob_store import BlobStore, decode_blob
+from services.search_index import search_index
+from services.utils import calc_sha256
+
+CONTENT = ("echo hello\n" * 200).encode("utf-8")
+SHA256 = calc_sha256(CONTENT)
+
+
+async def _add_file(db, blob):
+    batch = ValidationBatchORM(
+        name="b", status=Status.waiting, completed_prompts=0, prompt_results=[]
+    )
+    batch.files = [
+        ValidationFileORM(
+            file_name="a.sh", file_type="shell", sha256=blob.sha256, blob=blob
+        )
+    ]
+    db.add(batch)
+    await db.commit()
+    return batch
+
+
+class TestBlobStore:
+    """BlobStoreの単体テストクラス"""
+
+    @pytest.mark.parametrize("compression", ["none", "zlib"])
+    async def test_roundtrip(self, db_session, compression):
+        """保存した内容がそのまま復元される"""
+        store = BlobStore(compression=compression, min_size=0)
+        blob = await store.put(SHA256, CONTENT, db_session)
+        await db_session.commit()
+
+        assert blob.compression == compression
+        assert blob.size == len(CONTENT)
+        stored = await db_session.get(FileBlobORM, SHA256)
+        assert decode_blob(stored) == CONTENT.decode()
+        if compression == "zlib":
+            assert len(blob.data) < len(CONTENT)
+
+    async def test_small_files_stay_uncompressed(self, db_session):
+        """閾値未満のファイルは圧縮しない"""
+        store = BlobStore(compression="zlib", min_size=1024)
+        blob = await store.put(calc_sha256(b"x"), b"x", db_session)
+        assert blob.compression == "none"
+
+    async def test_deduplicates_and_counts_references(self, db_session):
+        """同じ内容は1行だけ保存され参照数が増える"""
+        store = BlobStore(compression="zlib", min_size=0)
+        await _add_file(db_session, await store.put(SHA256, CONTENT, db_session))
+        await _add_file(db_session, await store.put(SHA256, CONTENT, db_session))
+
+        assert len((await db_session.scalars(select(FileBlobORM))).all()) == 1
+        blob = await db_session.get(FileBlobORM, SHA256, populate_existing=True)
+        assert blob.ref_count == 2
+        assert len((await db_session.scalars(select(ValidationFileORM))).all()) == 2
+
+    async def test_collect_garbage_recounts(self, db_session):
+        """collect_garbageは参照数を数え直し、孤立したblobを削除する"""
+        store = BlobStore(compression="none")
+        await _add_file(db_session, await store.put(SHA256, CONTENT, db_session))
+        orphan = calc_sha256(b"orphan")
+        await store.put(orphan, b"orphan", db_session)
+        await store.put(SHA256, CONTENT, db_session)  # reference without a file row
+        await db_session.commit()
+
+        assert await store.collect_garbage(db_session) == 1
+        db_session.expunge_all()
+        assert await db_session.get(FileBlobORM, orphan) is None
+        assert (await db_session.get(FileBlobORM, SHA256)).ref_count == 1
+
+    async def test_collect_garbage_unindexes_contents(self, db_session):
+        """削除したblobの内容は全文検索の索引からも消える"""
+        store = BlobStore(compression="zlib", min_size=0)
+        blob = await store.put(SHA256, CONTENT, db_session)
+        await search_index.add_files(1, [("a.sh", blob, CONTENT.decode())], db_session)
+        await db_session.commit()
+        phrase = literal_column("file_search").op("MATCH")('"echo hello"')
+        query = select(func.count()).select_from(file_search_table).where(phrase)
+        assert (await db_session.execute(query)).scalar_one() == 1
+
+        assert await store.collect_garbage(db_session) == 1
+        assert (await db_session.execute(query)).scalar_one() == 0
+
+    async def test_garbage_collected_on_start(self, db_session):
+        """start()で孤立したblobが回収される"""
+        store = BlobStore(
+            compression="none",
+            gc_interval=3600,
+            session_factory=async_sessionmaker(
+                bind=db_session.bind, expire_on_commit=False
+            ),
+        )
+        await store.put(SHA256, CONTENT, db_session)
+        await db_session.commit()
+
+        await store.start()
+        try:
+            for _ in range(100):
+                db_session.expunge_all()
+                if await db_session.get(FileBlobORM, SHA256) is None:
+                    break
+                await asyncio.sleep(0.01)
+            assert await db_session.get(FileBlobORM, SHA256) is None
+        finally:
+            await store.stop()
+
+    def test_unknown_compression(self):
+        """未知の圧縮方式はエラー"""
+        with pytest.raises(ValueError):
+            BlobStore(compression="lz4")
@@ -0,0 +1,207 @@
+import json
+
+import pytest
+
+from schema import (
+    PromptInfo,
+    Status,
+    ValidationFile,
+    ValidationIssue,
+    ValidationPromptResult,
+)
+from services.chunking import ChunkPlanner, estimate_tokens, merge_issues
+from services.ollama_service import OllamaService
+
+
+def _file(id: int, name: str, content: str) -> ValidationFile:
+    return ValidationFile(
+        id=id, file_name=name, content=content, file_type="text", sha256=str(id)
+    )
+
+
+def _issue(file="a.sh", content="x", severity="low", description="d", type="quality"):
+    return ValidationIssue(
+        file=file,
+        content=content,
+        severity=severity,
+        description=description,
+        type=type,
+    )
+
+
+class TestEstimateTokens:
+    """トークン数の見積もり"""
+
+    def test_counts_utf8_bytes(self):
+        """マルチバイト文字は多めに見積もられる"""
+        assert estimate_tokens("abcdef") == 2
+        assert estimate_tokens("あいう") == 3
+
+
+class TestChunkPlanner:
+    """コンテキストに収まるようにファイルを分割する"""
+
+    def test_small_files_share_one_window(self):
+        """収まるファイルはまとめて一つのウィンドウに入る"""
+        planner = ChunkPlanner(
+            context_tokens=1000, output_tokens=100, bytes_per_token=1
+        )
+        files = [_file(1, "a.sh", "a" * 100), _file(2, "b.sh", "b" * 100)]
+
+        windows = planner.plan(files, "prompt")
+
+        assert len(windows) == 1
+        assert [c.file.file_name for c in windows[0]] == ["a.sh", "b.sh"]
+        assert not any(c.is_partial for c in windows[0])
+
+    def test_files_packed_in_order(self):
+        """溢れた分は次のウィンドウに回される"""
+        planner = ChunkPlanner(context_tokens=400, output_tokens=100, bytes_per_token=1)
+        files = [_file(i, f"{i}.sh", "x" * 150) for i in range(3)]
+
+        windows = planner.plan(files, "p")
+
+        assert [[c.file.id for c in w] for w in windows] == [[0], [1], [2]]
+
+    def test_large_file_split_at_lines(self):
+        """大きなファイルは行単位で分割され、行番号が記録される"""
+        planner = ChunkPlanner(context_tokens=200, output_tokens=50, bytes_per_token=1)
+        content = "".join(f"{i:09d}\n" for i in range(1, 41))
+        windows = planner.plan([_file(1, "big.txt", content)], "p")
+
+        chunks = [c for w in windows for c in w]
+        assert len(chunks) > 1
+        assert all(c.is_partial for c in chunks)
+        assert "".join(c.content for c in chunks) == content
+        assert chunks[0].start_line == 1
+        assert chunks[-1].end_line == 40
+        for prev, cur in zip(chunks[:-1], chunks[1:], strict=True):
+            assert cur.start_line == prev.end_line + 1
+
+    def test_long_line_is_cut(self):
+        """ウィンドウより長い一行も分割される"""
+        planner = ChunkPlanner(context_tokens=200, output_tokens=50, bytes_per_token=1)
+        content = "y" * 1000
+        windows = planner.plan([_file(1, "min.js", content)], "p")
+
+        chunks = [c for w in windows for c in w]
+        assert "".join(c.content for c in chunks) == content
+        assert all(c.tokens <= planner.budget("p") for c in chunks)
+
+    def test_prompt_too_long(self):
+        """プロンプトだけでコンテキストを使い切る場合はエラー"""
+        planner = ChunkPlanner(context_tokens=100, output_tokens=50, bytes_per_token=1)
+        with pytest.raises(ValueError):
+            planner.plan([_file(1, "a", "a")], "p" * 100)
+
+
+class TestMergeIssues:
+    """ウィンドウごとの結果の統合"""
+
+    def test_duplicates_dropped_keeping_highest_severity(self):
+        """同じ指摘は一つにまとめられ、最も高い重要度が残る"""
+        merged = merge_issues(
+            [
+                [_issue(content="rm -rf /", severity="low", description="first")],
+                [
+                    _issue(
+                        content="  rm -rf  / ", severity="high", description="again"
+                    ),
+                    _issue(content="chmod 777", severity="medium"),
+                ],
+            ]
+        )
+
+        assert [(i.content, i.severity, i.description) for i in merged] == [
+            ("rm -rf /", "high", "first"),
+            ("chmod 777", "medium", "d"),
+        ]
+
+    def test_different_files_kept(self):
+        """ファイルが異なれば別の指摘として扱う"""
+        merged = merge_issues([[_issue(file="a.sh")], [_issue(file="b.sh")]])
+        assert len(merged) == 2
+
+    def test_file_level_issues_compared_by_description(self):
+        """該当行がない指摘は説明文で比較する"""
+        merged = merge_issues(
+            [
+                [_issue(content=None, description="No license")],
+                [_issue(content=None, description="no  license")],
+                [_issue(content=None, description="Unpinned image")],
+            ]
+        )
+        assert [i.description for i in merged] == ["No license", "Unpinned image"]
+
+
+class WindowClient:
+    """ウィンドウごとに、含まれるファイル名を指摘として返すクライアント"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        names = sorted({n for n in ("a.sh", "b.sh") if f'"{n}"' in prompt})
+        return {
+            "response": json.dumps(
+                {
+                    "has_issues": True,
+                    "issues": [
+                        {
+                            "file": name,
+                            "content": None,
+                            "severity": "low",
+                            "description": "shared",
+                            "type": "quality",
+                        }
+                        for name in names
+                    ]
+                    + [
+                        {
+                            "file": "a.sh",
+                            "content": None,
+                            "severity": "high",
+                            "description": "shared",
+                            "type": "quality",
+                        }
+                    ],
+                }
+            ),
+            "total_duration": 10,
+            "load_duration": 1,
+            "prompt_eval_duration": 2,
+            "eval_duration": 5,
+        }
+
+
+class TestChunkedValidation:
+    """複数ウィンドウでの検証"""
+
+    async def test_windows_run_and_merge(self):
+        """全ウィンドウの結果が重複なく統合され、所要時間は合算される"""
+        service = OllamaService(hosts=["http://a:11434"], model="m")
+        service.planner = ChunkPlanner(
+            context_tokens=300, output_tokens=50, bytes_per_token=1
+        )
+        client = WindowClient()
+        service.pool.hosts[0].client = client
+        task = ValidationPromptResult(
+            prompt=PromptInfo(name="all", category="pipeline_validity")
+        )
+
+        await service.validate_files_with_prompt(
+            [_file(1, "a.sh", "a" * 150), _file(2, "b.sh", "b" * 150)],
+            task.prompt,
+            "prompt",
+            task,
+        )
+
+        assert len(client.prompts) == 2
+        assert task.status == Status.completed
+        assert [(i.file, i.severity) for i in task.result] == [
+            ("a.sh", "high"),
+            ("b.sh", "low"),
+        ]
+        assert task.total_duration_ns == 20
+        assert task.eval_duration_ns == 10
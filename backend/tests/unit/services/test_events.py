@@ -0,0 +1,57 @@
+from services.events import BatchEventBroker
+
+
+class TestBatchEventBroker:
+    """BatchEventBrokerの単体テストクラス"""
+
+    def test_ids_are_per_batch(self):
+        """イベントIDはバッチごとに1から採番される"""
+        broker = BatchEventBroker()
+        assert broker.publish(1, "prompt", {}).id == 1
+        assert broker.publish(1, "prompt", {}).id == 2
+        assert broker.publish(2, "prompt", {}).id == 1
+
+    async def test_subscribers_receive_events(self):
+        """購読者に配信され、購読解除後は配信されない"""
+        broker = BatchEventBroker()
+        sub = broker.subscribe(1)
+        broker.publish(1, "prompt", {"prompt_index": 0})
+        broker.publish(2, "prompt", {"prompt_index": 9})
+
+        event = sub.queue.get_nowait()
+        assert event.data == {"prompt_index": 0}
+        assert sub.queue.empty()
+
+        broker.unsubscribe(sub)
+        broker.publish(1, "prompt", {})
+        assert sub.queue.empty()
+        assert broker.subscriber_count() == 0
+
+    def test_replay_after_last_event_id(self):
+        """Last-Event-ID以降のイベントだけが再送される"""
+        broker = BatchEventBroker()
+        for i in range(5):
+            broker.publish(1, "prompt", {"i": i})
+
+        assert [e.id for e in broker.replay(1, 3)] == [4, 5]
+        assert broker.replay(1, 5) == []
+
+    def test_replay_gap_requires_snapshot(self):
+        """履歴から消えたイベントがある場合はNoneを返す"""
+        broker = BatchEventBroker(history_size=2)
+        for i in range(5):
+            broker.publish(1, "prompt", {"i": i})
+
+        assert broker.replay(1, 1) is None
+        assert [e.id for e in broker.replay(1, 3)] == [4, 5]
+        # id from before a restart
+        assert broker.replay(1, 99) is None
+
+    def test_old_batches_are_dropped(self):
+        """max_batchesを超えた古いバッチの履歴は破棄される"""
+        broker = BatchEventBroker(max_batches=2)
+        for batch_id in (1, 2, 3):
+            broker.publish(batch_id, "prompt", {})
+
+        assert broker.replay(1, 1) is None
+        assert len(broker.replay(3, 0)) == 1
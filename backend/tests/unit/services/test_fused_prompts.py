@@ -0,0 +1,93 @@
+import json
+
+from schema import (
+    PromptInfo,
+    Status,
+    ValidationFile,
+    ValidationPromptResult,
+)
+from services.ollama_service import OllamaService
+
+
+def _issue(description):
+    return {
+        "file": "a.sh",
+        "content": None,
+        "severity": "low",
+        "description": description,
+        "type": "quality",
+    }
+
+
+class FusedClient:
+    """セクションごとの回答を返すクライアント"""
+
+    def __init__(self, body):
+        self.body = body
+        self.calls = []
+
+    async def generate(self, prompt, format, **kwargs):
+        self.calls.append((prompt, format))
+        return {
+            "response": json.dumps(self.body),
+            "total_duration": 10,
+            "load_duration": 1,
+            "prompt_eval_duration": 2,
+            "eval_duration": 5,
+        }
+
+
+def _run(body):
+    service = OllamaService(hosts=["http://a:11434"], model="m")
+    client = FusedClient(body)
+    service.pool.hosts[0].client = client
+    prompts = [
+        (PromptInfo(name="all", category="pipeline_validity"), "check validity"),
+        (PromptInfo(name="all", category="pipeline_portability"), "check portability"),
+    ]
+    tasks = [ValidationPromptResult(prompt=info) for info, _ in prompts]
+    files = [
+        ValidationFile(
+            id=1, file_name="a.sh", content="echo", file_type="shell", sha256="0"
+        )
+    ]
+    return service, client, prompts, tasks, files
+
+
+class TestFusedPrompts:
+    """複数プロンプトを一度に検証するモード"""
+
+    async def test_one_request_split_into_results(self):
+        """一度のリクエストの結果がプロンプトごとに分けられる"""
+        service, client, prompts, tasks, files = _run(
+            {
+                "prompt_1": {"has_issues": True, "issues": [_issue("validity")]},
+                "prompt_2": {"has_issues": False, "issues": []},
+            }
+        )
+
+        await service.validate_files_with_prompts(files, prompts, tasks)
+
+        assert len(client.calls) == 1
+        prompt, format = client.calls[0]
+        assert "check validity" in prompt and "check portability" in prompt
+        assert prompt.count('File "a.sh"') == 1
+        assert format["required"] == ["prompt_1", "prompt_2"]
+        assert format == service.fused_format_schema([info for info, _ in prompts])
+
+        assert [t.status for t in tasks] == [Status.completed, Status.completed]
+        assert [i.description for i in tasks[0].result] == ["validity"]
+        assert tasks[1].result == []
+        assert all(t.fused and t.total_duration_ns == 10 for t in tasks)
+
+    async def test_broken_section_fails_only_its_prompt(self):
+        """壊れたセクションは該当するプロンプトだけを失敗にする"""
+        service, client, prompts, tasks, files = _run(
+            {"prompt_1": {"has_issues": False, "issues": []}}
+        )
+
+        await service.validate_files_with_prompts(files, prompts, tasks)
+
+        assert tasks[0].status == Status.completed
+        assert tasks[1].status == Status.failed
+        assert "invalid response" in tasks[1].error_message
@@ -0,0 +1,200 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.database import ValidationBatchORM, ValidationJobORM
+from schema import JobStatus, Status
+from services.job_queue import JobQueue, JobWorker
+
+
+@pytest.fixture
+async def batch(db_session):
+    """ジョブを紐付けるバッチ"""
+    batch = ValidationBatchORM(
+        name="batch", status=Status.processing, completed_prompts=0, prompt_results=[]
+    )
+    db_session.add(batch)
+    await db_session.commit()
+    return batch
+
+
+class TestJobQueue:
+    """JobQueueの単体テストクラス"""
+
+    async def test_claim_in_order(self, db_session, batch):
+        """古いジョブから順にリースされる"""
+        queue = JobQueue(lease_seconds=60, max_attempts=3, worker_id="w1")
+        await queue.enqueue(batch.id, [0, 1], db_session)
+
+        first = await queue.claim(db_session)
+        second = await queue.claim(db_session)
+
+        assert (first.prompt_index, second.prompt_index) == (0, 1)
+        assert first.status == JobStatus.leased
+        assert first.lease_owner == "w1"
+        assert first.attempts == 1
+        assert await queue.claim(db_session) is None
+
+    async def test_fused_groups(self, db_session, batch):
+        """group_sizeごとにプロンプトがまとめられる"""
+        queue = JobQueue(worker_id="w1")
+        jobs = await queue.enqueue(batch.id, [0, 1, 2, 3, 4], db_session, group_size=2)
+
+        assert [job.indices for job in jobs] == [[0, 1], [2, 3], [4]]
+        assert jobs[2].prompt_indices is None
+
+    async def test_leased_job_not_claimable_by_others(self, db_session, batch):
+        """有効なリースを持つジョブは他のワーカーに取られない"""
+        await JobQueue(worker_id="w1").enqueue(batch.id, [0], db_session)
+        assert await JobQueue(lease_seconds=60, worker_id="w1").claim(db_session)
+        other = JobQueue(lease_seconds=60, worker_id="w2")
+        assert await other.claim(db_session) is None
+
+    async def test_expired_lease_is_reclaimed(self, db_session, batch):
+        """期限切れリースは再キューされる"""
+        queue = JobQueue(lease_seconds=60, max_attempts=3, worker_id="w1")
+        await queue.enqueue(batch.id, [0], db_session)
+        job = await queue.claim(db_session)
+        job.lease_expires_at = datetime.now(UTC) - timedelta(seconds=1)
+        await db_session.commit()
+
+        assert await queue.reclaim_expired(db_session) == []
+        await db_session.refresh(job)
+        assert job.status == JobStatus.queued
+
+        reclaimed = await JobQueue(lease_seconds=60, worker_id="w2").claim(db_session)
+        assert reclaimed.id == job.id
+        assert reclaimed.attempts == 2
+
+    async def test_exhausted_job_fails(self, db_session, batch):
+        """試行回数を使い切ったジョブは失敗扱いになる"""
+        queue = JobQueue(lease_seconds=60, max_attempts=1, worker_id="w1")
+        await queue.enqueue(batch.id, [0], db_session)
+        job = await queue.claim(db_session)
+        job.lease_expires_at = datetime.now(UTC) - timedelta(seconds=1)
+        await db_session.commit()
+
+        exhausted = await queue.reclaim_expired(db_session)
+
+        assert [j.id for j in exhausted] == [job.id]
+        assert exhausted[0].status == JobStatus.failed
+        assert await queue.claim(db_session) is None
+
+    async def test_fail_requeues_until_max_attempts(self, db_session, batch):
+        """fail()は残り試行回数がある間だけ再キューする"""
+        queue = JobQueue(lease_seconds=60, max_attempts=2, worker_id="w1")
+        await queue.enqueue(batch.id, [0], db_session)
+
+        job = await queue.claim(db_session)
+        assert await queue.fail(job.id, "boom", db_session) is True
+
+        job = await queue.claim(db_session)
+        assert await queue.fail(job.id, "boom", db_session) is False
+        job = await db_session.get(ValidationJobORM, job.id)
+        assert job.status == JobStatus.failed
+
+    async def test_heartbeat_requires_lease(self, db_session, batch):
+        """リースを保持していないワーカーのハートビートは拒否される"""
+        queue = JobQueue(lease_seconds=60, worker_id="w1")
+        await queue.enqueue(batch.id, [0], db_session)
+        job = await queue.claim(db_session)
+
+        assert await queue.heartbeat(job.id, db_session) is True
+        assert await JobQueue(worker_id="w2").heartbeat(job.id, db_session) is False
+
+        await queue.complete(job.id, db_session)
+        assert await queue.heartbeat(job.id, db_session) is False
+
+    async def test_cancel_withdraws_finished_jobs(self, db_session, batch):
+        """キャンセルしたプロンプトを含み、全プロンプトが終わったジョブだけが取り下げられる"""
+        queue = JobQueue(lease_seconds=60, worker_id="w1")
+        fused, single = await queue.enqueue(batch.id, [0, 1, 2], db_session, 2)
+        leased = await queue.claim(db_session)
+        assert leased.id == fused.id
+
+        assert await queue.cancel(batch.id, [1, 2], {1, 2}, db_session) == [single.id]
+        assert await queue.is_cancelled(fused.id, db_session) is False
+        # only jobs running one of the cancelled prompts are withdrawn
+        assert await queue.cancel(batch.id, [2], {0, 1, 2}, db_session) == []
+        assert await queue.cancel(batch.id, [0], {0, 1, 2}, db_session) == [fused.id]
+
+        # the holder can neither finish nor requeue a cancelled job
+        await queue.complete(fused.id, db_session)
+        assert await queue.fail(fused.id, "boom", db_session) is False
+        assert await queue.is_cancelled(fused.id, db_session) is True
+        assert await queue.heartbeat(fused.id, db_session) is False
+        assert await queue.claim(db_session) is None
+
+
+class _BlockingService:
+    """終わらないジョブを実行するValidationServiceの代役"""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.aborted = False
+
+    async def process_job(self, batch_id, prompt_indices, db):
+        self.started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            self.aborted = True
+            raise
+
+    async def cancel(self, batch_id, prompt_index, db):
+        return [0]
+
+    async def finished_prompts(self, batch_id, db):
+        return {0}
+
+
+class TestJobWorkerCancel:
+    """JobWorker.cancelの単体テストクラス"""
+
+    async def test_cancel_aborts_running_job(self, db_session, batch):
+        """実行中のジョブはキャンセルで中断される"""
+        service = _BlockingService()
+        queue = JobQueue(lease_seconds=60, worker_id="w1")
+        worker = JobWorker(
+            service,
+            queue,
+            session_factory=async_sessionmaker(
+                bind=db_session.bind, expire_on_commit=False
+            ),
+        )
+        await queue.enqueue(batch.id, [0], db_session)
+        job = await queue.claim(db_session)
+        run = worker._spawn(job)
+        await asyncio.wait_for(service.started.wait(), 5)
+
+        assert await worker.cancel(batch.id, None, db_session) == ([0], 1)
+        assert run.cancelled()
+        assert service.aborted
+        assert not worker._running
+        assert await queue.is_cancelled(job.id, db_session) is True
+
+    async def test_lost_lease_aborts_running_job(self, db_session, batch):
+        """リースを失ったジョブは中断され、二重に実行されない"""
+        service = _BlockingService()
+        queue = JobQueue(lease_seconds=1, worker_id="w1")
+        worker = JobWorker(
+            service,
+            queue,
+            session_factory=async_sessionmaker(
+                bind=db_session.bind, expire_on_commit=False
+            ),
+        )
+        await queue.enqueue(batch.id, [0], db_session)
+        job = await queue.claim(db_session)
+        run = worker._spawn(job)
+        await asyncio.wait_for(service.started.wait(), 5)
+
+        # another worker reclaims the job
+        job.lease_owner = "w2"
+        await db_session.commit()
+
+        await asyncio.wait({run}, timeout=5)
+        assert run.cancelled()
+        assert service.aborted
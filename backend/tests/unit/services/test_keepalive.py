@@ -0,0 +1,128 @@
+from datetime import UTC, datetime, timedelta
+
+from ollama import GenerateResponse, Options, ProcessResponse
+
+from services.keepalive import ModelKeepAlive
+from services.ollama_pool import OllamaHostPool
+from services.scheduler import OllamaScheduler
+
+
+class FakeClient:
+    """ロード済みモデルを覚えておくクライアント"""
+
+    def __init__(self, loaded=None, context_length=4096):
+        self.loaded = loaded
+        self.context_length = context_length
+        self.expires_in = timedelta(minutes=10)
+        self.loads = []
+
+    async def ps(self):
+        models = []
+        if self.loaded:
+            models.append(
+                ProcessResponse.Model(
+                    model=self.loaded,
+                    context_length=self.context_length,
+                    expires_at=datetime.now(UTC) + self.expires_in,
+                )
+            )
+        return ProcessResponse(models=models)
+
+    async def generate(self, model, prompt, options, keep_alive):
+        self.loads.append(keep_alive)
+        self.loaded = model
+        self.context_length = options.num_ctx
+        return GenerateResponse(model=model, response="", done=True, load_duration=123)
+
+
+def _keepalive(client, **kwargs):
+    pool = OllamaHostPool(["http://a:11434"], "m:1", OllamaScheduler())
+    pool.hosts[0].client = client
+    return ModelKeepAlive(
+        pool,
+        "m:1",
+        lambda: Options(num_ctx=4096),
+        idle_seconds=kwargs.pop("idle_seconds", 600),
+        interval=kwargs.pop("interval", 60),
+        **kwargs,
+    )
+
+
+class TestModelKeepAlive:
+    """モデルのウォームアップと保持"""
+
+    async def test_preload_on_start(self):
+        """起動時にロードされていなければロードする"""
+        client = FakeClient()
+        keepalive = _keepalive(client, warmup=True)
+        keepalive.touch()
+
+        await keepalive.refresh_all()
+
+        assert len(client.loads) == 1
+        assert 590 <= client.loads[0] <= 600
+        [state] = keepalive.status()
+        assert state.warm is True
+        assert state.last_load_duration_ns == 123
+
+    async def test_already_warm(self):
+        """ロード済みなら何も送らない"""
+        client = FakeClient(loaded="m:1")
+        keepalive = _keepalive(client)
+        keepalive.touch()
+
+        await keepalive.refresh_all()
+
+        assert client.loads == []
+        assert keepalive.status()[0].warm is True
+
+    async def test_wrong_context_is_cold(self):
+        """コンテキスト長が異なるロードはウォームとみなさない"""
+        client = FakeClient(loaded="m:1", context_length=2048)
+        keepalive = _keepalive(client)
+        keepalive.touch()
+
+        await keepalive.refresh_all()
+
+        assert len(client.loads) == 1
+
+    async def test_reload_before_expiry(self):
+        """利用中に期限切れが近づいたら延長する"""
+        client = FakeClient(loaded="m:1")
+        client.expires_in = timedelta(seconds=30)
+        keepalive = _keepalive(client)
+        keepalive.touch()
+
+        await keepalive.refresh_all()
+
+        assert len(client.loads) == 1
+
+    async def test_idle_lets_model_unload(self):
+        """アイドル中はロードし直さない"""
+        client = FakeClient()
+        keepalive = _keepalive(client)
+
+        await keepalive.refresh_all()
+
+        assert client.loads == []
+        [state] = keepalive.status()
+        assert state.active is False
+        assert state.warm is False
+
+    async def test_unhealthy_host_skipped(self):
+        """異常なホストは状態不明として扱う"""
+        client = FakeClient()
+        keepalive = _keepalive(client)
+        keepalive.pool.hosts[0].healthy = False
+        keepalive.touch()
+
+        await keepalive.refresh_all()
+
+        assert client.loads == []
+        assert keepalive.status()[0].warm is None
+
+    def test_disabled(self):
+        """保持時間0ではサーバーの既定値に任せる"""
+        keepalive = _keepalive(FakeClient(), idle_seconds=0)
+        keepalive.touch()
+        assert keepalive.keep_alive() is None
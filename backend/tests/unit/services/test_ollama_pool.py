@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+from ollama import ResponseError
+
+from services.ollama_service import OllamaService
+from services.retry import HedgePolicy, RetryBudget, RetryPolicy
+
+
+class FakeClient:
+    """generate()の呼び出しを記録するだけのクライアント"""
+
+    def __init__(
+        self,
+        error: Exception | None = None,
+        delay: float = 0,
+        failures: int | None = None,
+    ):
+        self.error = error
+        self.delay = delay
+        # fail only the first ``failures`` calls (all calls when None)
+        self.failures = failures
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error and (self.failures is None or self.calls <= self.failures):
+            raise self.error
+        return {"response": '{"has_issues": false, "issues": []}'}
+
+
+@pytest.fixture
+def service():
+    return OllamaService(hosts=["http://a:11434", "http://b:11434"], model="m")
+
+
+class TestOllamaHostPool:
+    """OllamaHostPoolの単体テストクラス"""
+
+    def test_pick_least_loaded(self, service):
+        """負荷の低いホストが選ばれる"""
+        a, b = service.pool.hosts
+        service.scheduler.limiter(a.url)._in_flight = 2
+        assert service.pool.pick() is b
+
+    def test_pick_skips_unhealthy(self, service):
+        """異常なホストは健全なホストがある限り選ばれない"""
+        a, b = service.pool.hosts
+        service.scheduler.limiter(b.url)._in_flight = 2
+        service.pool.report_failure(a, ConnectionError("down"))
+        assert service.pool.pick() is b
+        assert service.pool.pick(exclude={b.url}) is a
+
+    async def test_generate_fails_over(self, service):
+        """接続できないホストから別のホストへフェイルオーバーする"""
+        a, b = service.pool.hosts
+        a.client = FakeClient(ConnectionError("refused"))
+        b.client = FakeClient()
+
+        response = await service._generate(prompt="p")
+
+        assert response["response"]
+        assert (a.client.calls, b.client.calls) == (1, 1)
+        assert not a.healthy
+
+    async def test_generate_does_not_fail_over_on_bad_request(self, service):
+        """リクエスト自体の誤りではフェイルオーバーしない"""
+        for host in service.pool.hosts:
+            host.client = FakeClient(ResponseError("bad request", 400))
+
+        with pytest.raises(ResponseError):
+            await service._generate(prompt="p")
+        assert sum(h.client.calls for h in service.pool.hosts) == 1
+
+    async def test_generate_raises_when_all_hosts_fail(self, service):
+        """全ホストが失敗した場合は最後のエラーを送出する"""
+        service.retry = RetryPolicy(max_attempts=1)
+        for host in service.pool.hosts:
+            host.client = FakeClient(ConnectionError("refused"))
+
+        with pytest.raises(ConnectionError):
+            await service._generate(prompt="p")
+        assert all(h.client.calls == 1 for h in service.pool.hosts)
+
+    async def test_stop_closes_clients(self, service):
+        """停止するとホストごとのHTTPクライアントが閉じられる"""
+        await service.pool.stop()
+
+        for host in service.pool.hosts:
+            assert host.probe_client.is_closed
+            assert host.client._client.is_closed
+
+
+class TestRetriesAndHedging:
+    """Ollama呼び出しのタイムアウト・リトライ・ヘッジのテストクラス"""
+
+    @pytest.fixture
+    def single(self):
+        service = OllamaService(hosts=["http://a:11434"], model="m")
+        service.retry = RetryPolicy(max_attempts=3, base_delay=0)
+        return service
+
+    async def test_retries_transient_errors(self, single):
+        """一時的なエラーはバックオフの後にリトライされる"""
+        client = FakeClient(ResponseError("busy", 503), failures=2)
+        single.pool.hosts[0].client = client
+
+        response = await single._generate(prompt="p")
+
+        assert response["response"]
+        assert client.calls == 3
+        assert single.call_stats().retries == 2
+
+    async def test_attempts_are_bounded(self, single):
+        """リトライ回数には上限がある"""
+        client = FakeClient(ConnectionError("refused"))
+        single.pool.hosts[0].client = client
+
+        with pytest.raises(ConnectionError):
+            await single._generate(prompt="p")
+        assert client.calls == 3
+
+    async def test_budget_limits_retries(self, single):
+        """バッチのリトライ予算を使い切るとそれ以上リトライしない"""
+        client = FakeClient(ConnectionError("refused"))
+        single.pool.hosts[0].client = client
+        budget = RetryBudget(1)
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await single._generate(prompt="p", retry_budget=budget)
+
+        assert client.calls == 3  # 2 + 1: the second call gets no retry
+        assert single.call_stats().retries_denied == 2
+
+    async def test_no_retry_on_bad_request(self, single):
+        """リクエスト自体の誤りはリトライしない"""
+        client = FakeClient(ResponseError("bad request", 400))
+        single.pool.hosts[0].client = client
+
+        with pytest.raises(ResponseError):
+            await single._generate(prompt="p")
+        assert client.calls == 1
+
+    async def test_timeout_releases_slot(self, single):
+        """応答のないホストへの呼び出しは打ち切られ、スロットが解放される"""
+        single.retry = RetryPolicy(max_attempts=1)
+        single.timeout = 0.05
+        client = FakeClient(delay=10)
+        single.pool.hosts[0].client = client
+
+        with pytest.raises(TimeoutError, match="did not answer"):
+            await single._generate(prompt="p")
+
+        assert client.cancelled == 1
+        assert single.scheduler.limiter(single.pool.hosts[0].url).in_flight == 0
+        assert single.call_stats().timeouts == 1
+
+    async def test_hedge_slow_call(self, service):
+        """遅い呼び出しは別ホストにも送られ、先に返った結果が使われる"""
+        service.hedging = HedgePolicy(enabled=True, min_samples=1)
+        service.hedging.record(0.05)
+        a, b = service.pool.hosts
+        a.client = FakeClient(delay=10)
+        b.client = FakeClient()
+        service.scheduler.limiter(b.url)._in_flight = 1  # a is picked first
+
+        response = await service._generate(prompt="p")
+
+        assert response["response"]
+        assert (a.client.calls, b.client.calls) == (1, 1)
+        assert a.client.cancelled == 1
+        stats = service.call_stats()
+        assert (stats.hedges, stats.hedge_wins) == (1, 1)
+
+    async def test_no_hedge_when_fast(self, service):
+        """p95より早く返る呼び出しはヘッジされない"""
+        service.hedging = HedgePolicy(enabled=True, min_samples=1)
+        service.hedging.record(10)
+        for host in service.pool.hosts:
+            host.client = FakeClient()
+
+        await service._generate(prompt="p")
+
+        assert sum(h.client.calls for h in service.pool.hosts) == 1
+        assert service.call_stats().hedges == 0
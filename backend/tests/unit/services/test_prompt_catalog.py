@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from services.prompt_service import PromptService
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _touch(path, text):
+    """mtimeが確実に変わるように書き換える"""
+    stat = path.stat()
+    _write(path, text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def prompts_dir(tmp_path):
+    _write(tmp_path / "pipeline_validity" / "all.txt", "# Validity\nCheck it.")
+    _write(tmp_path / "pipeline_validity" / "beta.txt", "Beta prompt. More text")
+    _write(tmp_path / "pipeline_validity" / "notes.md", "not a prompt")
+    _write(tmp_path / "artifacts_validity" / "all.txt", "Artifacts.")
+    _write(tmp_path / "unknown_category" / "all.txt", "ignored")
+    return tmp_path
+
+
+def _names(service):
+    return [
+        (group.category, [info.name for info in group.prompts])
+        for group in service.get_available_prompts() or []
+    ]
+
+
+class TestPromptCatalog:
+    """PromptServiceのメモリ上のカタログのテストクラス"""
+
+    def test_listing(self, prompts_dir):
+        """カテゴリ順・名前順に一覧が作られ、説明とハッシュを持つ"""
+        service = PromptService(prompts_dir, reload_seconds=0)
+
+        assert _names(service) == [
+            ("pipeline_validity", ["all", "beta"]),
+            ("artifacts_validity", ["all"]),
+        ]
+        info = service.get_available_prompts()[0].prompts[0]
+        assert info.description == "Validity"
+        content = service.load_prompt_content("all", "pipeline_validity")
+        assert info.sha256 == content.sha256
+
+    def test_served_from_memory(self, prompts_dir, mocker):
+        """変更がなければ一覧も内容もファイルを読まずに返す"""
+        service = PromptService(prompts_dir, reload_seconds=0)
+        read_bytes = mocker.spy(Path, "read_bytes")
+
+        for _ in range(3):
+            service.get_available_prompts()
+            content = service.load_prompt_content("beta", "pipeline_validity")
+
+        assert content.content == "Beta prompt. More text"
+        read_bytes.assert_not_called()
+
+    def test_detects_changes(self, prompts_dir):
+        """追加・変更・削除されたファイルが反映され、ETagが変わる"""
+        service = PromptService(prompts_dir, reload_seconds=0)
+        etag = service.listing_etag
+
+        _write(prompts_dir / "pipeline_usability" / "all.txt", "Usability.")
+        _touch(prompts_dir / "pipeline_validity" / "beta.txt", "Changed beta.")
+        (prompts_dir / "artifacts_validity" / "all.txt").unlink()
+
+        assert _names(service) == [
+            ("pipeline_validity", ["all", "beta"]),
+            ("pipeline_usability", ["all"]),
+        ]
+        beta = service.load_prompt_content("beta", "pipeline_validity")
+        assert beta.content == "Changed beta."
+        assert service.load_prompt_content("all", "artifacts_validity") is None
+        assert service.listing_etag != etag
+
+    def test_etag_stable_without_changes(self, prompts_dir):
+        """内容が同じならETagは変わらない"""
+        first = PromptService(prompts_dir, reload_seconds=0)
+        second = PromptService(prompts_dir, reload_seconds=0)
+        first.get_available_prompts()
+
+        assert first.listing_etag == second.listing_etag
+        assert first.listing_json() == second.listing_json()
+
+    def test_reload_interval(self, prompts_dir):
+        """ディレクトリの再確認は間隔を空けて行われる"""
+        service = PromptService(prompts_dir, reload_seconds=3600)
+
+        _write(prompts_dir / "pipeline_validity" / "gamma.txt", "Gamma.")
+
+        assert service.load_prompt_content("gamma", "pipeline_validity") is None
+        service.refresh(force=True)
+        assert service.load_prompt_content("gamma", "pipeline_validity") is not None
+
+    @pytest.mark.parametrize(
+        "name, category",
+        [("../artifacts_validity/all", "pipeline_validity"), ("all", "nope")],
+    )
+    def test_unknown_prompt(self, prompts_dir, name, category):
+        """カタログにないプロンプトや不正なカテゴリはNoneになる"""
+        service = PromptService(prompts_dir, reload_seconds=0)
+        assert service.load_prompt_content(name, category) is None
+
+    def test_empty_directory(self, tmp_path):
+        """プロンプトがなければ一覧はNone"""
+        assert PromptService(tmp_path / "missing").get_available_prompts() is None
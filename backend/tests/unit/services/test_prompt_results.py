@@ -0,0 +1,226 @@
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.database import ValidationBatchORM, ValidationPromptResultORM
+from schema import (
+    PromptInfo,
+    Status,
+    ValidationFileModel,
+    ValidationIssue,
+    ValidationPromptResult,
+)
+from services.converter import batch_orm_to_json, batch_orm_to_schema
+from services.validation_service import (
+    ValidationService,
+    record_prompt_result_of_batch,
+    update_prompt_result_of_batch,
+)
+from services.write_behind import WriteBehindCommitter
+
+PROMPTS = [
+    PromptInfo(name="all", category="pipeline_validity"),
+    PromptInfo(name="all", category="pipeline_portability"),
+]
+
+
+@pytest.fixture
+async def batch(db_session):
+    """2つのプロンプトを持つバッチ"""
+    response, _ = await ValidationService().create_validation_batch_and_files(
+        [
+            ValidationFileModel(
+                file_name="a.sh", content="echo", file_type="shell", sha256="0" * 64
+            )
+        ],
+        PROMPTS,
+        "batch",
+        db_session,
+    )
+    return response
+
+
+def _done(prompt, description="found"):
+    return ValidationPromptResult(
+        prompt=prompt,
+        status=Status.completed,
+        result=[
+            ValidationIssue(
+                file="a.sh",
+                content="echo",
+                severity="low",
+                description=description,
+                type="quality",
+            )
+        ],
+        total_duration_ns=10,
+    )
+
+
+def _cancelled(prompt):
+    return ValidationPromptResult(
+        prompt=prompt, status=Status.cancelled, error_message="Cancelled"
+    )
+
+
+@pytest.fixture
+async def service(db_session):
+    """テスト用DBにコミットするValidationService"""
+    service = ValidationService()
+    service.committer = WriteBehindCommitter(
+        session_factory=async_sessionmaker(
+            bind=db_session.bind, expire_on_commit=False
+        ),
+        interval_ms=1,
+    )
+    await service.committer.start()
+    yield service
+    await service.committer.stop()
+
+
+async def _reload(db_session, batch_id):
+    db_session.expire_all()
+    return await db_session.get(ValidationBatchORM, batch_id)
+
+
+class TestPromptResults:
+    """プロンプトごとの結果テーブル"""
+
+    async def test_one_row_per_prompt(self, db_session, batch):
+        """プロンプトごとに行が作られ、APIの形は変わらない"""
+        rows = (await db_session.scalars(select(ValidationPromptResultORM))).all()
+        assert [(r.prompt_index, r.prompt_category) for r in rows] == [
+            (0, "pipeline_validity"),
+            (1, "pipeline_portability"),
+        ]
+        assert [pr.prompt for pr in batch.prompt_results] == PROMPTS
+        assert batch.total_prompts == 2
+
+    async def test_record_counts_once(self, db_session, batch):
+        """同じプロンプトを二度記録しても完了数は一度だけ増える"""
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[0]), 0, db_session)
+        await record_prompt_result_of_batch(
+            batch.id, _done(PROMPTS[0], "again"), 0, db_session
+        )
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.completed_prompts == 1
+        assert batch_orm.status == Status.waiting
+        schema = batch_orm_to_schema(batch_orm)
+        assert schema.prompt_results[0].result[0].description == "again"
+        assert schema.prompt_results[1].status == Status.processing
+
+    async def test_batch_completes_with_last_prompt(self, db_session, batch):
+        """全プロンプトが終わるとバッチが完了になる"""
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[1]), 1, db_session)
+        failed = ValidationPromptResult(
+            prompt=PROMPTS[0], status=Status.failed, error_message="boom"
+        )
+        await record_prompt_result_of_batch(batch.id, failed, 0, db_session)
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.completed_prompts == 2
+        assert batch_orm.status == Status.completed
+        schema = batch_orm_to_schema(batch_orm)
+        assert schema.prompt_results[0].error_message == "boom"
+        assert schema.prompt_results[1].total_duration_ns == 10
+
+    async def test_partial_update_does_not_count(self, db_session, batch):
+        """途中経過の保存は完了数に影響しない"""
+        partial = _done(PROMPTS[0])
+        partial.status = Status.processing
+        await update_prompt_result_of_batch(batch.id, partial, 0, db_session)
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.completed_prompts == 0
+        assert len(batch_orm_to_schema(batch_orm).prompt_results[0].result) == 1
+
+    async def test_cancelled_prompt_is_not_overwritten(self, db_session, batch):
+        """キャンセル後に届いた結果や途中経過はキャンセルを上書きしない"""
+        await record_prompt_result_of_batch(
+            batch.id, _cancelled(PROMPTS[0]), 0, db_session
+        )
+        partial = _done(PROMPTS[0])
+        partial.status = Status.processing
+        await update_prompt_result_of_batch(batch.id, partial, 0, db_session)
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[0]), 0, db_session)
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.completed_prompts == 1
+        prompt_result = batch_orm_to_schema(batch_orm).prompt_results[0]
+        assert prompt_result.status == Status.cancelled
+        assert prompt_result.result is None
+
+    async def test_fail_keeps_finished_prompts(self, db_session, batch, service):
+        """ジョブの失敗は完了済みのプロンプトを失敗で上書きしない"""
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[0]), 0, db_session)
+        await service.fail_prompt(batch.id, 0, "boom", db_session)
+        await service.fail_prompt(batch.id, 1, "boom", db_session)
+
+        # the prompt finishing after it was read is not overwritten either
+        failed = ValidationPromptResult(
+            prompt=PROMPTS[0], status=Status.failed, error_message="boom"
+        )
+        assert not await service.save_prompt_result(
+            batch.id, failed, 0, only_if_pending=True
+        )
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.completed_prompts == 2
+        assert batch_orm.failed_prompts == 1
+        schema = batch_orm_to_schema(batch_orm)
+        assert [pr.status for pr in schema.prompt_results] == [
+            Status.completed,
+            Status.failed,
+        ]
+
+    async def test_cancel_batch(self, db_session, batch, service):
+        """バッチのキャンセルは未完了のプロンプトだけをキャンセルする"""
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[1]), 1, db_session)
+
+        assert await service.cancel(batch.id, None, db_session) == [0]
+        assert await service.cancel(batch.id, None, db_session) == []
+        assert await service.finished_prompts(batch.id, db_session) == {0, 1}
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.status == Status.cancelled
+        assert batch_orm.completed_prompts == 2
+        schema = batch_orm_to_schema(batch_orm)
+        assert [pr.status for pr in schema.prompt_results] == [
+            Status.cancelled,
+            Status.completed,
+        ]
+
+    async def test_cancel_prompt(self, db_session, batch, service):
+        """プロンプト単位のキャンセルでは他のプロンプトが続行される"""
+        assert await service.cancel(batch.id, 0, db_session) == [0]
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.status == Status.waiting
+
+        # the batch completes with its last prompt as usual
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[1]), 1, db_session)
+        batch_orm = await _reload(db_session, batch.id)
+        assert batch_orm.status == Status.completed
+
+        with pytest.raises(ValueError):
+            await service.cancel(batch.id, 5, db_session)
+
+    async def test_unknown_batch(self, db_session):
+        """存在しないバッチはエラー"""
+        with pytest.raises(ValueError):
+            await record_prompt_result_of_batch(999, _done(PROMPTS[0]), 0, db_session)
+
+    async def test_trusted_json_matches_schema(self, db_session, batch):
+        """検証を省いたJSONはスキーマを通したJSONと同じ"""
+        await record_prompt_result_of_batch(batch.id, _done(PROMPTS[0]), 0, db_session)
+        failed = ValidationPromptResult(
+            prompt=PROMPTS[1], status=Status.failed, error_message="boom"
+        )
+        await record_prompt_result_of_batch(batch.id, failed, 1, db_session)
+
+        batch_orm = await _reload(db_session, batch.id)
+        assert json.loads(batch_orm_to_json(batch_orm)) == json.loads(
+            batch_orm_to_schema(batch_orm).model_dump_json()
+        )
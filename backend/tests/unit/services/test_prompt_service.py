@@ -2,6 +2,7 @@ from pathlib import Path
 
 import pytest
 
+from schema import PromptCategoryKind
 from services.prompt_service import PromptService
 
 
@@ -115,63 +116,54 @@ class TestPromptService:
             content = prompt_service_no_dir.load_prompt("any_prompt")
             assert content is None
 
-    class TestExtractDescription:
-        """_extract_description()プライベートメソッドのテスト"""
+    class TestDescribe:
+        """_describe()プライベートメソッドのテスト"""
 
-        def test_extract_comment_description(self, test_prompts_dir):
+        @staticmethod
+        def _first_line(path: Path) -> str:
+            return path.read_text(encoding="utf-8").partition("\n")[0]
+
+        def test_describe_comment(self, test_prompts_dir):
             """コメント行からの説明抽出"""
             service = PromptService()
-            file_path = test_prompts_dir / "comment_prompt.txt"
+            first_line = self._first_line(test_prompts_dir / "comment_prompt.txt")
 
-            description = service._extract_description(file_path)
-            assert description == "コード品質分析プロンプト"
+            assert service._describe(first_line) == "コード品質分析プロンプト"
 
-        def test_extract_first_sentence_description(self, test_prompts_dir):
+        def test_describe_first_sentence(self, test_prompts_dir):
             """最初の文からの説明抽出"""
             service = PromptService()
-            file_path = test_prompts_dir / "short_description_prompt.txt"
+            first_line = self._first_line(
+                test_prompts_dir / "short_description_prompt.txt"
+            )
 
-            description = service._extract_description(file_path)
-            assert description == "Short description text"
+            assert service._describe(first_line) == "Short description text"
 
-        def test_extract_long_description_returns_none(self, test_prompts_dir):
+        def test_describe_long_sentence_returns_none(self, test_prompts_dir):
             """長い説明文の場合はNoneを返す"""
             service = PromptService()
-            file_path = test_prompts_dir / "long_description_prompt.txt"
-
-            description = service._extract_description(file_path)
-            assert description is None
-
-        def test_extract_empty_file_returns_none(self, test_prompts_dir):
-            """空ファイルの場合はNoneを返す"""
-            service = PromptService()
-            file_path = test_prompts_dir / "empty_prompt.txt"
+            first_line = self._first_line(
+                test_prompts_dir / "long_description_prompt.txt"
+            )
 
-            description = service._extract_description(file_path)
-            assert description is None
+            assert service._describe(first_line) is None
 
-        def test_extract_nonexistent_file_returns_none(self):
-            """存在しないファイルの場合はNoneを返す"""
+        def test_describe_empty_line_returns_none(self):
+            """空行の場合はNoneを返す"""
             service = PromptService()
-            file_path = Path("/nonexistent/file.txt")
 
-            description = service._extract_description(file_path)
-            assert description is None
+            assert service._describe("") is None
 
-        def test_extract_with_encoding_error(self, test_prompts_dir, mocker):
-            """エンコーディングエラーの場合はNoneを返す"""
+        def test_read_skips_undecodable_file(self, tmp_path):
+            """UTF-8として読めないファイルはプロンプトにならない"""
             service = PromptService()
-            file_path = test_prompts_dir / "comment_prompt.txt"
+            path = tmp_path / "broken.txt"
+            path.write_bytes(b"\xff\xfe broken")
 
-            # openをモックしてUnicodeDecodeErrorを発生させる
-            mock_open = mocker.mock_open()
-            mock_open.side_effect = UnicodeDecodeError(
-                "utf-8", b"", 0, 1, "invalid start byte"
+            prompt_file = service._read(
+                path, PromptCategoryKind.pipeline_validity, path.stat()
             )
-            mocker.patch("builtins.open", mock_open)
-
-            description = service._extract_description(file_path)
-            assert description is None
+            assert prompt_file is None
 
     class TestIntegration:
         """統合的なテスト"""
@@ -0,0 +1,152 @@
+import json
+import time
+
+import pytest
+from pydantic_core import ValidationError
+
+from services.response_parser import ResponseParser, fix_unescaped_quotes
+
+ISSUE = {
+    "file": "a.sh",
+    "content": "echo hi",
+    "severity": "high",
+    "description": "first",
+    "type": "security",
+}
+
+
+def _reference_fix(json_str):
+    """文字単位で走査する以前の実装（比較用）"""
+    out = []
+    in_string = False
+    escape = False
+    n = len(json_str)
+    for i, ch in enumerate(json_str):
+        if ch == '"' and not escape:
+            if not in_string:
+                in_string = True
+                out.append(ch)
+            else:
+                j = i + 1
+                while j < n and json_str[j].isspace():
+                    j += 1
+                if j >= n or json_str[j] in ":,}]":
+                    in_string = False
+                    out.append(ch)
+                else:
+                    out.append('\\"')
+            continue
+        if ch == "\\" and not escape:
+            escape = True
+        elif escape:
+            escape = False
+        out.append(ch)
+    return "".join(out)
+
+
+class TestFixUnescapedQuotes:
+    """fix_unescaped_quotes()の単体テストクラス"""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            '{"a": "say "hi" now"}',
+            '{"a": "already \\"escaped\\" here", "b": "x"}',
+            '{"a": "ends with backslash \\\\", "b": "y"}',
+            '{"a": "spaced "quote"   , "b": 1}',
+            '{"a": "multi\nline "q"\n}',
+            '["x", "y "z" w"]',
+            '"unterminated "string',
+            "",
+            "no quotes at all",
+        ],
+    )
+    def test_matches_reference(self, text):
+        """以前の実装と同じ結果になる"""
+        assert fix_unescaped_quotes(text) == _reference_fix(text)
+
+    def test_escapes_inner_quotes(self):
+        """文字列内の裸のダブルクオートがエスケープされる"""
+        fixed = fix_unescaped_quotes('{"content": "echo "hi"", "file": "a.sh"}')
+        assert json.loads(fixed) == {"content": 'echo "hi"', "file": "a.sh"}
+
+    def test_linear_time(self):
+        """空白の多い長い入力でも線形時間で処理できる"""
+        text = '{"a": "' + ('x " ' + " " * 50) * 20000 + '"}'
+        start = time.perf_counter()
+        fixed = fix_unescaped_quotes(text)
+        assert time.perf_counter() - start < 2
+        assert fixed == _reference_fix(text)
+
+
+class TestResponseParser:
+    """ResponseParserの単体テストクラス"""
+
+    def test_strict_tier(self):
+        """正しいJSONはそのまま解析される"""
+        parser = ResponseParser()
+        issues = parser.parse(json.dumps({"has_issues": True, "issues": [ISSUE]}))
+        assert [i.description for i in issues] == ["first"]
+        assert parser.tier_counts == {"strict": 1, "quotes": 0, "repair": 0}
+
+    def test_quotes_tier(self):
+        """文字列内の裸のクオートはクオート修正で解析される"""
+        parser = ResponseParser()
+        text = json.dumps({"has_issues": True, "issues": [ISSUE]}).replace(
+            "echo hi", 'echo "hi"'
+        )
+        issues = parser.parse(text)
+        assert issues[0].content == 'echo "hi"'
+        assert parser.tier_counts == {"strict": 0, "quotes": 1, "repair": 0}
+
+    def test_repair_tier(self):
+        """途中で切れたJSONはjson_repairで修復される"""
+        parser = ResponseParser()
+        text = json.dumps({"has_issues": True, "issues": [ISSUE]})[:-3]
+        issues = parser.parse(text)
+        assert [i.file for i in issues] == ["a.sh"]
+        assert parser.tier_counts == {"strict": 0, "quotes": 0, "repair": 1}
+
+    def test_no_issues(self):
+        """has_issuesがfalseなら空のリストを返す"""
+        parser = ResponseParser()
+        assert parser.parse('{"has_issues": false, "issues": []}') == []
+        assert parser.tier_counts["strict"] == 1
+
+    @pytest.mark.parametrize(
+        "text",
+        ["", "   ", '{"has_issues": "yes"}', '{"has_issues": true}', "[1, 2]"],
+    )
+    def test_invalid_format(self, text):
+        """形式が想定と異なる応答はValueErrorになり失敗として数えられる"""
+        parser = ResponseParser()
+        with pytest.raises(ValueError):
+            parser.parse(text)
+        assert parser.stats().failures == 1
+
+    def test_invalid_issue_schema(self):
+        """issueのスキーマが不正ならValidationErrorになる"""
+        parser = ResponseParser()
+        text = json.dumps(
+            {"has_issues": True, "issues": [{**ISSUE, "severity": "urgent"}]}
+        )
+        with pytest.raises(ValidationError):
+            parser.parse(text)
+        assert parser.failures == 1
+
+    def test_parse_sections(self):
+        """融合応答は節ごとに解析され、壊れた節だけがエラーになる"""
+        parser = ResponseParser()
+        text = json.dumps(
+            {
+                "p0": {"has_issues": True, "issues": [ISSUE]},
+                "p1": {"has_issues": False, "issues": []},
+                "p2": {"has_issues": None},
+            }
+        )
+        parsed = parser.parse_sections(text, ["p0", "p1", "p2", "p3"])
+        assert [i.file for i in parsed[0]] == ["a.sh"]
+        assert parsed[1] == []
+        assert isinstance(parsed[2], ValueError)
+        assert isinstance(parsed[3], ValueError)
+        assert parser.stats().strict == 1
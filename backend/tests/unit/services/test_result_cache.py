@@ -0,0 +1,115 @@
+from datetime import UTC, datetime, timedelta
+
+from models.database import LLMResultCacheORM
+from schema import PromptInfo, Status, ValidationIssue, ValidationPromptResult
+from services.result_cache import ResultCache
+
+
+def _completed_task() -> ValidationPromptResult:
+    return ValidationPromptResult(
+        prompt=PromptInfo(name="all", category="pipeline_validity"),
+        status=Status.completed,
+        result=[
+            ValidationIssue(
+                file="a.sh",
+                content="curl | sh",
+                severity="high",
+                description="pipes a remote script into a shell",
+                type="security",
+            )
+        ],
+        total_duration_ns=100,
+        eval_duration_ns=40,
+        load_duration_ns=10,
+        prompt_eval_duration_ns=50,
+    )
+
+
+def _key(**overrides) -> str:
+    args = {
+        "model": "m",
+        "options": {"seed": 0, "temperature": 0.0},
+        "chunking": {"output_tokens": 2048, "bytes_per_token": 3.0},
+        "format_schema": {"type": "object"},
+        "prompt_sha256": "p",
+        "file_sha256s": ["a", "b"],
+    }
+    args.update(overrides)
+    return ResultCache.make_key(**args)
+
+
+class TestResultCache:
+    """ResultCacheの単体テストクラス"""
+
+    def test_key_depends_on_every_input(self):
+        """キーはモデル・オプション・分割設定・スキーマ・プロンプト・ファイル順序に依存する"""
+        base = _key()
+        assert base == _key()
+        assert base != _key(model="other")
+        assert base != _key(options={"seed": 1, "temperature": 0.0})
+        assert base != _key(chunking={"output_tokens": 1024, "bytes_per_token": 3.0})
+        assert base != _key(chunking={"output_tokens": 2048, "bytes_per_token": 4.0})
+        assert base != _key(format_schema={"type": "array"})
+        assert base != _key(prompt_sha256="q")
+        assert base != _key(file_sha256s=["b", "a"])
+
+    async def test_put_then_get(self, db_session):
+        """保存した結果がキャッシュ済みとして復元される"""
+        cache = ResultCache(enabled=True, memory_size=0, ttl_seconds=0, max_rows=10)
+        await cache.put("k", "m", _completed_task(), db_session)
+
+        hit = await cache.get("k", db_session)
+        task = ValidationPromptResult(
+            prompt=PromptInfo(name="all", category="pipeline_validity")
+        )
+        hit.apply_to(task)
+
+        assert task.cached is True
+        assert task.status == Status.completed
+        assert task.result == _completed_task().result
+        assert task.total_duration_ns == 100
+        assert (await db_session.get(LLMResultCacheORM, "k")).hit_count == 1
+
+    async def test_memory_lru_in_front(self, db_session):
+        """2回目以降はメモリ上のLRUから返される"""
+        cache = ResultCache(enabled=True, memory_size=1, ttl_seconds=0, max_rows=10)
+        await cache.put("k", "m", _completed_task(), db_session)
+        assert await cache.get("k", db_session) is not None
+        assert cache.memory_hits == 1
+
+    async def test_failed_results_are_not_stored(self, db_session):
+        """失敗した結果は保存されない"""
+        cache = ResultCache(enabled=True, memory_size=4, ttl_seconds=0, max_rows=10)
+        task = _completed_task()
+        task.status = Status.failed
+        await cache.put("k", "m", task, db_session)
+        assert await cache.get("k", db_session) is None
+        assert cache.misses == 1
+
+    async def test_ttl_expiry(self, db_session):
+        """TTLを過ぎたエントリは使われず、evictで削除される"""
+        cache = ResultCache(enabled=True, memory_size=0, ttl_seconds=60, max_rows=10)
+        await cache.put("k", "m", _completed_task(), db_session)
+        row = await db_session.get(LLMResultCacheORM, "k")
+        row.created_at = datetime.now(UTC) - timedelta(seconds=120)
+        await db_session.commit()
+
+        assert await cache.get("k", db_session) is None
+        assert await cache.evict(db_session) == 1
+
+    async def test_trim_to_max_rows(self, db_session):
+        """max_rowsを超えた分は最近使われていない順に削除される"""
+        cache = ResultCache(enabled=True, memory_size=0, ttl_seconds=0, max_rows=2)
+        for key in ("a", "b", "c"):
+            await cache.put(key, "m", _completed_task(), db_session)
+        await cache.get("a", db_session)
+
+        assert await cache.evict(db_session) == 1
+        assert await db_session.get(LLMResultCacheORM, "b") is None
+        assert await db_session.get(LLMResultCacheORM, "a") is not None
+
+    async def test_disabled(self, db_session):
+        """無効化されている場合は何もしない"""
+        cache = ResultCache(enabled=False)
+        await cache.put("k", "m", _completed_task(), db_session)
+        assert await cache.get("k", db_session) is None
@@ -0,0 +1,63 @@
+from services.retry import HedgePolicy, RetryBudgets, RetryPolicy
+
+
+class TestRetryPolicy:
+    """RetryPolicyの単体テストクラス"""
+
+    def test_delay_is_jittered_and_capped(self):
+        """待ち時間は0から指数的な上限までの乱数で、最大値を超えない"""
+        policy = RetryPolicy(max_attempts=5, base_delay=1, max_delay=3)
+
+        delays = [policy.delay(retry) for retry in (1, 2, 3, 4) for _ in range(50)]
+
+        assert all(0 <= d <= 3 for d in delays)
+        assert all(policy.delay(1) <= 1 for _ in range(50))
+        assert len(set(delays)) > 1
+
+
+class TestRetryBudgets:
+    """RetryBudgetsの単体テストクラス"""
+
+    def test_budget_per_batch(self):
+        """予算はバッチごとに共有され、別のバッチには影響しない"""
+        budgets = RetryBudgets(retries=1)
+
+        assert budgets.for_batch(1).spend()
+        assert not budgets.for_batch(1).spend()
+        assert budgets.for_batch(2).spend()
+
+    def test_oldest_batches_forgotten(self):
+        """保持するバッチ数を超えると古いものから忘れられる"""
+        budgets = RetryBudgets(retries=1, max_batches=2)
+        budgets.for_batch(1).spend()
+        budgets.for_batch(2)
+        budgets.for_batch(3)
+
+        assert budgets.for_batch(1).remaining == 1
+
+
+class TestHedgePolicy:
+    """HedgePolicyの単体テストクラス"""
+
+    def test_quantile(self):
+        """直近のレイテンシのp95でヘッジする"""
+        policy = HedgePolicy(enabled=True, quantile=0.95, min_samples=10)
+        for seconds in range(1, 101):
+            policy.record(float(seconds))
+
+        assert policy.delay() == 96.0
+
+    def test_needs_samples(self):
+        """サンプルが少ないうちはヘッジしない"""
+        policy = HedgePolicy(enabled=True, min_samples=10)
+        policy.record(1.0)
+
+        assert policy.delay() is None
+
+    def test_disabled(self):
+        """無効ならヘッジしないが、レイテンシは記録する"""
+        policy = HedgePolicy(enabled=False, min_samples=1)
+        policy.record(1.0)
+
+        assert policy.delay() is None
+        assert policy.latency() == 1.0
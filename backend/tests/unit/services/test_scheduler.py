@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from services.scheduler import AdaptiveLimiter, OllamaScheduler
+
+
+def _response(total, load=0, prompt_eval=0, eval_=0):
+    return {
+        "total_duration": total,
+        "load_duration": load,
+        "prompt_eval_duration": prompt_eval,
+        "eval_duration": eval_,
+    }
+
+
+class TestAdaptiveLimiter:
+    """AdaptiveLimiterの単体テストクラス"""
+
+    async def test_additive_increase(self):
+        """待ち時間がなければ上限が徐々に増える"""
+        limiter = AdaptiveLimiter("h", initial=2, min_limit=1, max_limit=4)
+        for _ in range(10):
+            ticket = await limiter.acquire()
+            ticket.record_response(_response(100, prompt_eval=50, eval_=50))
+            await limiter.release(ticket)
+        assert limiter.limit == 4
+
+    async def test_queueing_decreases(self):
+        """サーバ側の待ち時間が大きいと上限が下がる"""
+        limiter = AdaptiveLimiter("h", initial=8, min_limit=1, max_limit=16)
+        ticket = await limiter.acquire()
+        ticket.record_response(_response(100, prompt_eval=10, eval_=10))
+        await limiter.release(ticket)
+        assert limiter.limit < 8
+        assert limiter.queueing_ratio == pytest.approx(0.8)
+
+    async def test_single_decrease_per_round(self):
+        """同時に走っていた呼び出しのエラーでは一度しか下がらない"""
+        limiter = AdaptiveLimiter("h", initial=8, min_limit=1, max_limit=16)
+        tickets = [await limiter.acquire() for _ in range(4)]
+        for ticket in tickets:
+            limiter.on_error(ticket)
+            await limiter.release(ticket)
+        assert limiter.limit == 5
+        assert limiter.errors == 4
+
+    async def test_never_below_min(self):
+        """上限はmin_limitを下回らない"""
+        limiter = AdaptiveLimiter("h", initial=2, min_limit=2, max_limit=4)
+        for _ in range(5):
+            ticket = await limiter.acquire()
+            limiter.on_error(ticket)
+            await limiter.release(ticket)
+        assert limiter.limit == 2
+
+    async def test_acquire_blocks_at_limit(self):
+        """上限に達すると解放されるまで待たされる"""
+        limiter = AdaptiveLimiter("h", initial=1, min_limit=1, max_limit=1)
+        first = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert limiter.waiting == 1
+
+        await limiter.release(first)
+        second = await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 1
+        await limiter.release(second)
+
+
+class TestOllamaScheduler:
+    """OllamaSchedulerの単体テストクラス"""
+
+    async def test_limits_are_per_host(self):
+        """ホストごとに独立した上限を持つ"""
+        scheduler = OllamaScheduler(initial=2, min_limit=1, max_limit=4)
+        with pytest.raises(RuntimeError):
+            async with scheduler.slot("a"):
+                raise RuntimeError("boom")
+        async with scheduler.slot("b") as ticket:
+            ticket.record_response(_response(100, eval_=100))
+
+        stats = {s.host: s for s in scheduler.stats()}
+        assert stats["a"].limit == 1
+        assert stats["a"].errors == 1
+        assert stats["a"].in_flight == 0
+        assert stats["b"].limit == 2
+        assert stats["b"].successes == 1
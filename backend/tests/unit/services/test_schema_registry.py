@@ -0,0 +1,159 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from services.schema_registry import FormatSchemaRegistry, load_format_schema
+
+
+def _schema(description="issues", required=("file", "severity", "description", "type")):
+    return {
+        "type": "object",
+        "required": ["has_issues", "issues"],
+        "properties": {
+            "has_issues": {"type": "boolean"},
+            "issues": {
+                "type": "array",
+                "description": description,
+                "items": {
+                    "type": "object",
+                    "required": list(required),
+                    "properties": {name: {"type": "string"} for name in required},
+                },
+            },
+        },
+    }
+
+
+def _write(path, schema):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(schema), encoding="utf-8")
+
+
+def _touch(path, schema):
+    """mtimeが確実に変わるように書き換える"""
+    stat = path.stat()
+    _write(path, schema)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    default = tmp_path / "generate.schema.json"
+    _write(default, _schema("default"))
+    prompts = tmp_path / "prompts"
+    (prompts / "pipeline_validity").mkdir(parents=True)
+    return default, prompts
+
+
+def _description(format_schema):
+    return format_schema.schema["properties"]["issues"]["description"]
+
+
+class TestFormatSchemaRegistry:
+    """FormatSchemaRegistryの単体テストクラス"""
+
+    def test_override_order(self, dirs):
+        """プロンプト別、カテゴリ別、デフォルトの順にスキーマが選ばれる"""
+        default, prompts = dirs
+        _write(prompts / "pipeline_validity" / "schema.json", _schema("category"))
+        _write(prompts / "pipeline_validity" / "all.schema.json", _schema("prompt"))
+        registry = FormatSchemaRegistry(default, prompts, reload_seconds=0)
+
+        assert _description(registry.get("pipeline_validity", "all")) == "prompt"
+        assert _description(registry.get("pipeline_validity", "other")) == "category"
+        assert _description(registry.get("artifacts_validity", "all")) == "default"
+
+    def test_loaded_once(self, dirs, mocker):
+        """変更がなければファイルは再読み込みされない"""
+        default, prompts = dirs
+        registry = FormatSchemaRegistry(default, prompts, reload_seconds=0)
+        load = mocker.patch("services.schema_registry.load_format_schema")
+
+        for _ in range(3):
+            registry.get("pipeline_validity", "all")
+
+        load.assert_not_called()
+
+    def test_hot_reload(self, dirs):
+        """変更・追加・削除されたスキーマが反映される"""
+        default, prompts = dirs
+        registry = FormatSchemaRegistry(default, prompts, reload_seconds=0)
+        assert _description(registry.get("pipeline_validity", "all")) == "default"
+
+        override = prompts / "pipeline_validity" / "all.schema.json"
+        _write(override, _schema("prompt"))
+        assert _description(registry.get("pipeline_validity", "all")) == "prompt"
+
+        _touch(override, _schema("edited"))
+        assert _description(registry.get("pipeline_validity", "all")) == "edited"
+
+        _touch(default, _schema("new default"))
+        override.unlink()
+        assert _description(registry.get("pipeline_validity", "all")) == "new default"
+
+    def test_reload_interval(self, dirs):
+        """再読み込みの確認は間隔を空けて行われる"""
+        default, prompts = dirs
+        registry = FormatSchemaRegistry(default, prompts, reload_seconds=3600)
+        registry.get("pipeline_validity", "all")
+
+        _write(prompts / "pipeline_validity" / "all.schema.json", _schema("prompt"))
+
+        assert _description(registry.get("pipeline_validity", "all")) == "default"
+
+    def test_invalid_edit_keeps_last_version(self, dirs):
+        """不正な内容に書き換えられても直前の有効なスキーマを使い続ける"""
+        default, prompts = dirs
+        override = prompts / "pipeline_validity" / "all.schema.json"
+        _write(override, _schema("prompt"))
+        registry = FormatSchemaRegistry(default, prompts, reload_seconds=0)
+
+        _touch(override, {"type": "array"})
+
+        assert _description(registry.get("pipeline_validity", "all")) == "prompt"
+
+    def test_invalid_schema_at_startup(self, dirs):
+        """起動時に不正なスキーマがあればエラーになる"""
+        default, prompts = dirs
+        _write(prompts / "pipeline_validity" / "schema.json", {"type": "object"})
+
+        with pytest.raises(ValueError, match="has_issues"):
+            FormatSchemaRegistry(default, prompts)
+
+
+class TestLoadFormatSchema:
+    """load_format_schema()の単体テストクラス"""
+
+    def test_bundled_schema(self):
+        """同梱のスキーマは有効"""
+        path = Path(__file__).parents[3] / "format" / "generate.schema.json"
+        assert load_format_schema(path).schema["type"] == "object"
+
+    @pytest.mark.parametrize(
+        "schema, message",
+        [
+            ({"type": "array"}, "root"),
+            (_schema(required=("file", "severity", "description")), "type"),
+            (
+                _schema(required=("file", "severity", "description", "type", "lines")),
+                "lines",
+            ),
+        ],
+    )
+    def test_rejects_incompatible_schema(self, tmp_path, schema, message):
+        """ValidationIssueとして読めない出力を表すスキーマは拒否される"""
+        path = tmp_path / "schema.json"
+        _write(path, schema)
+
+        with pytest.raises(ValueError, match=message):
+            load_format_schema(path)
+
+    def test_invalid_json(self, tmp_path):
+        """JSONとして不正なファイルはエラーになる"""
+        path = tmp_path / "schema.json"
+        path.write_text("{", encoding="utf-8")
+
+        with pytest.raises(ValueError, match="Invalid JSON schema"):
+            load_format_schema(path)
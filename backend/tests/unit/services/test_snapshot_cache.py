@@ -0,0 +1,43 @@
+from services.snapshot_cache import BatchSnapshotCache
+
+
+class TestBatchSnapshotCache:
+    """BatchSnapshotCacheの単体テストクラス"""
+
+    def test_only_the_cached_version_is_served(self):
+        """キャッシュしたバージョン以外は返さない"""
+        cache = BatchSnapshotCache(max_entries=4)
+        cache.put(1, 3, b"v3")
+
+        assert cache.get(1, 3) == b"v3"
+        assert cache.get(1, 4) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_older_version_does_not_replace_newer(self):
+        """古いバージョンで新しいスナップショットを上書きしない"""
+        cache = BatchSnapshotCache(max_entries=4)
+        cache.put(1, 5, b"v5")
+        cache.put(1, 4, b"v4")
+
+        assert cache.get(1, 5) == b"v5"
+
+    def test_least_recently_used_is_evicted(self):
+        """上限を超えると最も使われていないバッチから捨てる"""
+        cache = BatchSnapshotCache(max_entries=2)
+        cache.put(1, 0, b"a")
+        cache.put(2, 0, b"b")
+        cache.get(1, 0)
+        cache.put(3, 0, b"c")
+
+        assert len(cache) == 2
+        assert cache.get(2, 0) is None
+        assert cache.get(1, 0) == b"a"
+
+    def test_invalidate(self):
+        """書き込み後は破棄される"""
+        cache = BatchSnapshotCache(max_entries=2)
+        cache.put(1, 0, b"a")
+        cache.invalidate(1)
+        cache.invalidate(9)
+
+        assert cache.get(1, 0) is None
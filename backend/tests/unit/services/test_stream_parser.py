@@ -0,0 +1,122 @@
+import json
+
+import pytest
+from ollama import GenerateResponse
+
+from schema import PromptInfo, Status, ValidationFile, ValidationPromptResult
+from services.ollama_service import OllamaService
+from services.stream_parser import IncrementalIssueParser
+
+DOCUMENT = json.dumps(
+    {
+        "has_issues": True,
+        "issues": [
+            {
+                "file": "a.sh",
+                "content": 'echo "}]" done',
+                "severity": "high",
+                "description": "first",
+                "type": "security",
+            },
+            {
+                "file": "b.sh",
+                "content": None,
+                "severity": "low",
+                "description": "second",
+                "type": "quality",
+            },
+        ],
+    }
+)
+
+
+def _feed(parser, text, step):
+    found = []
+    for i in range(0, len(text), step):
+        found.extend(parser.feed(text[i : i + step]))
+    return found
+
+
+class TestIncrementalIssueParser:
+    """IncrementalIssueParserの単体テストクラス"""
+
+    @pytest.mark.parametrize("step", [1, 2, 5, 64, len(DOCUMENT)])
+    def test_emits_each_issue_once(self, step):
+        """分割位置に関係なく各issueが一度だけ取り出される"""
+        issues = _feed(IncrementalIssueParser(), DOCUMENT, step)
+        assert [i["description"] for i in issues] == ["first", "second"]
+        assert issues[0]["content"] == 'echo "}]" done'
+
+    def test_emits_as_soon_as_element_closes(self):
+        """要素の閉じ括弧が届いた時点で返される"""
+        parser = IncrementalIssueParser()
+        first_end = DOCUMENT.index("}, {") + 1
+        assert parser.feed(DOCUMENT[: first_end - 1]) == []
+        assert len(parser.feed(DOCUMENT[first_end - 1 : first_end])) == 1
+
+    def test_ignores_other_arrays(self):
+        """issues以外のキーの配列は無視する"""
+        doc = json.dumps({"notes": [{"a": 1}], "issues": [{"b": 2}]})
+        assert _feed(IncrementalIssueParser(), doc, 3) == [{"b": 2}]
+
+    def test_buffer_is_trimmed(self):
+        """読み終えた部分はバッファから捨てられる"""
+        parser = IncrementalIssueParser()
+        _feed(parser, DOCUMENT, 7)
+        assert parser._buf == ""
+
+
+class StreamingClient:
+    """断片ごとにレスポンスを返すクライアント"""
+
+    async def generate(self, **kwargs):
+        assert kwargs["stream"] is True
+
+        async def parts():
+            for i in range(0, len(DOCUMENT), 10):
+                yield GenerateResponse(response=DOCUMENT[i : i + 10], done=False)
+            yield GenerateResponse(
+                response="",
+                done=True,
+                total_duration=100,
+                load_duration=1,
+                prompt_eval_duration=20,
+                eval_duration=70,
+            )
+
+        return parts()
+
+
+class TestStreamingValidation:
+    """ストリーミングモードでの検証"""
+
+    async def test_partial_results_then_final(self):
+        """途中経過が通知され、最終結果と所要時間が記録される"""
+        service = OllamaService(hosts=["http://a:11434"], model="m")
+        service.stream = True
+        service.pool.hosts[0].client = StreamingClient()
+        task = ValidationPromptResult(
+            prompt=PromptInfo(name="all", category="pipeline_validity")
+        )
+        partials = []
+
+        async def on_partial(issues):
+            partials.append([i.description for i in issues])
+
+        await service.validate_files_with_prompt(
+            [
+                ValidationFile(
+                    id=1, file_name="a.sh", content="x", file_type="shell", sha256="0"
+                )
+            ],
+            task.prompt,
+            "prompt",
+            task,
+            on_partial=on_partial,
+        )
+
+        assert partials == [["first"], ["first", "second"]]
+        assert task.status == Status.completed
+        assert [i.description for i in task.result] == ["first", "second"]
+        assert task.total_duration_ns == 100
+        assert task.eval_duration_ns == 70
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.database import ValidationBatchORM
+from schema import Status
+from services.write_behind import WriteBehindCommitter
+
+
+@pytest.fixture
+async def batch_id(db_session):
+    """書き込み先のバッチ"""
+    batch = ValidationBatchORM(
+        name="batch", status=Status.processing, completed_prompts=0, prompt_results=[]
+    )
+    db_session.add(batch)
+    await db_session.commit()
+    return batch.id
+
+
+@pytest.fixture
+async def committer(db_session):
+    """テスト用セッションと同じDBに書き込むWriteBehindCommitter"""
+    committer = WriteBehindCommitter(
+        session_factory=async_sessionmaker(
+            bind=db_session.bind, expire_on_commit=False
+        ),
+        interval_ms=20,
+    )
+    await committer.start()
+    yield committer
+    await committer.stop()
+
+
+def _increment(batch_id):
+    async def write(db):
+        await db.execute(
+            update(ValidationBatchORM)
+            .where(ValidationBatchORM.id == batch_id)
+            .values(completed_prompts=ValidationBatchORM.completed_prompts + 1)
+        )
+        return (
+            await db.execute(
+                select(ValidationBatchORM.completed_prompts).where(
+                    ValidationBatchORM.id == batch_id
+                )
+            )
+        ).scalar_one()
+
+    return write
+
+
+async def _completed_prompts(db_session, batch_id):
+    return (
+        await db_session.execute(
+            select(ValidationBatchORM.completed_prompts).where(
+                ValidationBatchORM.id == batch_id
+            )
+        )
+    ).scalar_one()
+
+
+class TestWriteBehindCommitter:
+    """WriteBehindCommitterの単体テストクラス"""
+
+    async def test_concurrent_writes_share_one_commit(
+        self, db_session, batch_id, committer
+    ):
+        """同時に投入された書き込みは1つのトランザクションでコミットされる"""
+        results = await asyncio.gather(
+            *(committer.run(_increment(batch_id)) for _ in range(5))
+        )
+
+        assert sorted(results) == [1, 2, 3, 4, 5]
+        assert committer.flushes == 1
+        assert committer.writes == 5
+        assert await _completed_prompts(db_session, batch_id) == 5
+
+    async def test_failing_write_is_isolated(self, db_session, batch_id, committer):
+        """失敗した書き込みだけが取り消され、他はコミットされる"""
+
+        async def broken(db):
+            await _increment(batch_id)(db)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            committer.run(_increment(batch_id)),
+            committer.run(broken),
+            committer.run(_increment(batch_id)),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[1], ValueError)
+        assert await _completed_prompts(db_session, batch_id) == 2
+
+    async def test_pending_write_with_same_key_is_replaced(
+        self, db_session, batch_id, committer
+    ):
+        """同じキーの未コミットの書き込みは最新のものだけが実行される"""
+        await asyncio.gather(
+            *(committer.run(_increment(batch_id), key="k") for _ in range(3))
+        )
+        assert await _completed_prompts(db_session, batch_id) == 1
+
+    async def test_stop_flushes_pending(self, db_session, batch_id):
+        """停止時に未コミットの書き込みがコミットされる"""
+        committer = WriteBehindCommitter(
+            session_factory=async_sessionmaker(bind=db_session.bind),
+            interval_ms=60_000,
+        )
+        await committer.start()
+        task = asyncio.create_task(committer.run(_increment(batch_id)))
+        await asyncio.sleep(0)
+
+        await committer.stop()
+
+        assert await task == 1
+        assert await _completed_prompts(db_session, batch_id) == 1
+
+    async def test_not_started_commits_immediately(self, db_session, batch_id):
+        """開始前は書き込みごとにすぐコミットする"""
+        committer = WriteBehindCommitter(
+            session_factory=async_sessionmaker(bind=db_session.bind),
+            interval_ms=60_000,
+        )
+        assert await committer.run(_increment(batch_id)) == 1
+        assert committer.flushes == 0
@@ -1,4 +1,4 @@
-import { ValidationBatch } from "../types";
+import { ValidationBatch, ValidationBatchSummary } from "../types";
 import { useLogList } from "../hooks/useLogList";
 import { useStatusColors } from "../hooks/useStatusColors";
 import { useSeverityCounts } from "../hooks/useSeverityCounts";
@@ -143,7 +143,7 @@ const LogList: React.FC<LogListProps> = ({ onError }) => {
                 ログが見つかりませんでした
               </div>
             ) : (
-              logsData?.logs.map((log: ValidationBatch) => (
+              logsData?.logs.map((log: ValidationBatchSummary) => (
                 <div
                   key={log.id}
                   className="border border-gray-200 rounded-lg p-4 hover:shadow-md transition-shadow"
@@ -174,8 +174,7 @@ const LogList: React.FC<LogListProps> = ({ onError }) => {
                     <div className="flex items-center space-x-4 ml-auto">
                       {log.status === "completed" &&
                         (() => {
-                          const severityCounts =
-                            severityMethods.calculateBatchSeverityCounts(log);
+                          const severityCounts = log.severity_counts;
                           return (
                             <div className="text-right">
                               <p className="text-sm text-gray-600 mb-1">
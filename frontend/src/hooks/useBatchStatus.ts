@@ -1,7 +1,12 @@
-import { useMemo, useRef } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { useQuery, useQueryClient } from "@tanstack/react-query";
 import apiClient from "../services/api";
-import { ValidationBatch } from "../types";
+import {
+  BatchPromptEventSchema,
+  BatchStatusEventSchema,
+  ValidationBatch,
+  ValidationBatchSchema,
+} from "../types";
 import { isTerminal, nextInterval } from "../utils";
 
 type useBatchStatusOptions = {
@@ -14,9 +19,84 @@ export function useBatchStatus(
 ) {
   const qc = useQueryClient();
   const attemptRef = useRef(0);
+  const onCompleteRef = useRef(opts?.onComplete);
+  onCompleteRef.current = opts?.onComplete;
+  // SSEで更新を受信している間はポーリングしない
+  const [streaming, setStreaming] = useState(false);
 
   type Batch = ValidationBatch | null;
 
+  useEffect(() => {
+    if (batchId === null || typeof EventSource === "undefined") return;
+
+    const queryKey = ["validation-batch", batchId];
+    const source = apiClient.openBatchEvents(batchId);
+    let finished = false;
+
+    const finish = (batch: ValidationBatch) => {
+      if (finished || !isTerminal(batch.status)) return;
+      finished = true;
+      source.close();
+      setStreaming(false);
+      attemptRef.current = 0;
+      onCompleteRef.current?.(batch);
+    };
+
+    source.onopen = () => setStreaming(true);
+    // EventSourceはLast-Event-ID付きで自動再接続する。閉じられた場合のみポーリングに戻す
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) setStreaming(false);
+    };
+
+    source.addEventListener("snapshot", (e) => {
+      const batch = ValidationBatchSchema.parse(
+        JSON.parse((e as MessageEvent).data)
+      );
+      qc.setQueryData<Batch>(queryKey, batch);
+      finish(batch);
+    });
+
+    source.addEventListener("prompt", (e) => {
+      const ev = BatchPromptEventSchema.parse(
+        JSON.parse((e as MessageEvent).data)
+      );
+      const prev = qc.getQueryData<Batch>(queryKey);
+      if (!prev) return;
+      const prompt_results = prev.prompt_results.slice();
+      prompt_results[ev.prompt_index] = ev.prompt_result;
+      const batch: ValidationBatch = {
+        ...prev,
+        prompt_results,
+        status: ev.status,
+        completed_prompts: ev.completed_prompts,
+        updated_at: ev.updated_at ?? prev.updated_at,
+      };
+      qc.setQueryData<Batch>(queryKey, batch);
+      finish(batch);
+    });
+
+    source.addEventListener("status", (e) => {
+      const ev = BatchStatusEventSchema.parse(
+        JSON.parse((e as MessageEvent).data)
+      );
+      const prev = qc.getQueryData<Batch>(queryKey);
+      if (!prev) return;
+      const batch: ValidationBatch = {
+        ...prev,
+        status: ev.status,
+        completed_prompts: ev.completed_prompts,
+        updated_at: ev.updated_at ?? prev.updated_at,
+      };
+      qc.setQueryData<Batch>(queryKey, batch);
+      finish(batch);
+    });
+
+    return () => {
+      source.close();
+      setStreaming(false);
+    };
+  }, [batchId, qc]);
+
   const {
     data: currentBatch,
     isFetching,
@@ -31,16 +111,16 @@ export function useBatchStatus(
 
       if (isTerminal(b.status)) {
         attemptRef.current = 0;
-        opts?.onComplete?.(b);
+        onCompleteRef.current?.(b);
       } else {
         attemptRef.current += 1;
       }
       return b;
     },
-    // 非終端中のみポーリング、終端で自動停止
+    // SSEが使えない場合の非終端中のみポーリング、終端で自動停止
     refetchInterval: (query) => {
       const data = query.state.data as Batch | undefined;
-      return data && !isTerminal(data.status)
+      return !streaming && data && !isTerminal(data.status)
         ? nextInterval(attemptRef.current)
         : false;
     },
@@ -83,10 +163,14 @@ export function useBatchStatus(
     currentBatch,
     // status
     isFetching,
+    isStreaming: streaming,
     isPolling:
-      Boolean(batchId) && !isTerminal(currentBatch?.status) && isFetching,
+      Boolean(batchId) &&
+      !streaming &&
+      !isTerminal(currentBatch?.status) &&
+      isFetching,
     pollingIntervalHint:
-      currentBatch && !isTerminal(currentBatch.status)
+      currentBatch && !streaming && !isTerminal(currentBatch.status)
         ? nextInterval(Math.max(1, attemptRef.current))
         : null,
     ...derived,
@@ -1,14 +1,24 @@
 import { useMemo } from "react";
-import type { Severity, Status, IssueType, ValidationBatch } from "../types";
+import type {
+  Severity,
+  Status,
+  IssueType,
+  ValidationBatch,
+  ValidationBatchSummary,
+} from "../types";
 
-function getBatchStatusConsolidatedStatus(batch: ValidationBatch): Status {
+function getBatchStatusConsolidatedStatus(
+  batch: ValidationBatch | ValidationBatchSummary
+): Status {
   switch (batch.status) {
     case "completed":
-      const anyFailed: boolean = batch.prompt_results.some(
-        (issue) => issue.status === "failed"
-      );
+      const anyFailed: boolean =
+        "failed_prompts" in batch
+          ? batch.failed_prompts > 0
+          : batch.prompt_results.some((issue) => issue.status === "failed");
       return anyFailed ? "failed" : "completed";
     case "failed":
+    case "cancelled":
     case "processing":
     case "waiting":
       return batch.status;
@@ -38,7 +48,9 @@ export const useStatusColors = () => {
         }
       },
 
-      getBatchStatusColor: (batch: ValidationBatch): string => {
+      getBatchStatusColor: (
+        batch: ValidationBatch | ValidationBatchSummary
+      ): string => {
         const consolidatedStatus = getBatchStatusConsolidatedStatus(batch);
         switch (consolidatedStatus) {
           case "completed":
@@ -62,6 +74,8 @@ export const useStatusColors = () => {
             return "完了";
           case "failed":
             return "失敗";
+          case "cancelled":
+            return "キャンセル";
           case "processing":
             return "処理中";
           case "waiting":
@@ -74,13 +88,17 @@ export const useStatusColors = () => {
       /**
        * Batchのステータステキストを取得
        */
-      getBatchStatusText: (batch: ValidationBatch): string => {
+      getBatchStatusText: (
+        batch: ValidationBatch | ValidationBatchSummary
+      ): string => {
         const consolidatedStatus = getBatchStatusConsolidatedStatus(batch);
         switch (consolidatedStatus) {
           case "completed":
             return "完了";
           case "failed":
             return "失敗";
+          case "cancelled":
+            return "キャンセル";
           case "processing":
             return "処理中";
           case "waiting":
@@ -31,7 +31,8 @@ export const apiClient = {
   async uploadFiles(
     files: File[],
     promptCategoryNames: string[],
-    batchName: string
+    batchName: string,
+    fusePrompts?: boolean
   ): Promise<ValidationBatch> {
     const formData = new FormData();
 
@@ -45,6 +46,10 @@ export const apiClient = {
 
     formData.append("batch_name", batchName);
 
+    if (fusePrompts !== undefined) {
+      formData.append("fuse_prompts", String(fusePrompts));
+    }
+
     const response = await api.post("/validate", formData, {
       headers: {
         "Content-Type": "multipart/form-data",
@@ -79,6 +84,11 @@ export const apiClient = {
     return validateApiResponse(response.data, ValidationBatchSchema);
   },
 
+  // バッチ進捗のServer-Sent Eventsを購読
+  openBatchEvents(batchId: number): EventSource {
+    return new EventSource(`${API_BASE_URL}/logs/batches/${batchId}/events`);
+  },
+
   async getPromptCategories(): Promise<PromptCategory[]> {
     const response = await api.get("/prompts");
     return validateApiResponse(response.data, PromptCategorySchema.array());
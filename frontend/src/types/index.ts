@@ -10,6 +10,7 @@ export const StatusSchema = z.enum([
   "processing",
   "completed",
   "failed",
+  "cancelled",
 ]);
 export type Status = z.infer<typeof StatusSchema>;
 
@@ -91,6 +92,8 @@ export const ValidationPromptResultSchema = z.object({
   eval_duration_ns: z.number().nullable().optional(),
   load_duration_ns: z.number().nullable().optional(),
   prompt_eval_duration_ns: z.number().nullable().optional(),
+  cached: z.boolean().optional(),
+  fused: z.boolean().optional(),
 });
 export type ValidationPromptResult = z.infer<
   typeof ValidationPromptResultSchema
@@ -137,21 +140,67 @@ export const ValidationBatchSchema = z.object({
   updated_at: z.string(), // ISO datestring
   total_files: z.number(),
   total_prompts: z.number(),
+  version: z.number().optional(), // 書き込みのたびに増える
 });
 export type ValidationBatch = z.infer<typeof ValidationBatchSchema>;
 
+// /logs/batches/{id}/events で配信されるイベント
+export const BatchStatusEventSchema = z.object({
+  status: StatusSchema,
+  completed_prompts: z.number(),
+  version: z.number().optional(),
+  updated_at: z.string().nullable().optional(),
+});
+export type BatchStatusEvent = z.infer<typeof BatchStatusEventSchema>;
+
+export const BatchPromptEventSchema = BatchStatusEventSchema.extend({
+  prompt_index: z.number(),
+  prompt_result: ValidationPromptResultSchema,
+});
+export type BatchPromptEvent = z.infer<typeof BatchPromptEventSchema>;
+
 // ========================================
 // Log関連
 // ========================================
 
+export const SeverityCountsSchema = z.object({
+  high: z.number(),
+  medium: z.number(),
+  low: z.number(),
+});
+export type SeverityCounts = z.infer<typeof SeverityCountsSchema>;
+
+// /logs の一覧用。プロンプト結果の代わりに件数を持つ
+export const ValidationBatchSummarySchema = z.object({
+  id: z.number(),
+  name: z.string(),
+  status: StatusSchema,
+  model: z.string().nullable(),
+  file_ids: z.array(ValidationFileIdSchema),
+  completed_prompts: z.number(),
+  total_prompts: z.number(),
+  failed_prompts: z.number(),
+  severity_counts: SeverityCountsSchema,
+  total_issues: z.number(),
+  issue_type_counts: z.record(z.string(), z.number()),
+  total_duration_ns: z.number(),
+  created_at: z.string(), // ISO datestring
+  updated_at: z.string(), // ISO datestring
+  total_files: z.number(),
+});
+export type ValidationBatchSummary = z.infer<
+  typeof ValidationBatchSummarySchema
+>;
+
 export const ValidationLogPaginatedSchema = z.object({
-  logs: z.array(ValidationBatchSchema),
-  curr_page: z.number(),
-  total_pages: z.number(),
+  logs: z.array(ValidationBatchSummarySchema),
+  curr_page: z.number().nullable(), // cursor指定時はnull
+  total_pages: z.number().nullable(), // 件数を数えなかった場合はnull
   per_page: z.number(),
-  total: z.number(),
+  total: z.number().nullable(),
   has_next: z.boolean(),
   has_prev: z.boolean(),
+  next_cursor: z.string().nullable().optional(),
 });
 export type ValidationLogPaginated = z.infer<
   typeof ValidationLogPaginatedSchema
@@ -1,7 +1,7 @@
 import { PromptInfo, Status } from "./types";
 
 export const isTerminal = (s?: Status | null) =>
-  s === "completed" || s === "failed";
+  s === "completed" || s === "failed" || s === "cancelled";
 
 // 1s→2s→4s… 上限60s、±10%ジッタ
 export const nextInterval = (n: number) => {